@@ -0,0 +1,2 @@
+# The runner modules in python/ aren't tests, even though test_report.py looks like one
+collect_ignore = ["python"]
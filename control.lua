@@ -1,6 +1,90 @@
-local execute_unit_tests = require("unit-tests")
-script.on_event(defines.events.on_tick, function()
-  if game.tick == 1 * 60 then
-    execute_unit_tests()
+local unit_test_runner = require("unit-tests")
+local unit_test_functions = require("unit-test-functions")
+
+-- temp-test-options.lua is generated by the python side for each configuration
+local status, test_options = pcall(require, "temp-test-options")
+if not status then
+  test_options = {}
+end
+local start_tick = test_options.start_tick or 1 * 60
+-- Factorio gives mods no clock to budget the time of a tick with, so the work per tick
+-- is limited by a step count instead. Steps usually take microseconds, so by default
+-- a for_each_step over thousands of prototypes still finishes within a few ticks.
+local steps_per_tick = test_options.steps_per_tick or 1000
+
+-- Configurations that only differ in runtime-global settings share a launch,
+-- the tests are executed once for each of these variants.
+local variants = test_options.variants or { { settings = {} } }
+
+-- Settings changed by any variant are reset before the next variant applies its own
+local function read_original_values()
+  local original_values = {}
+  for _, variant in ipairs(variants) do
+    for setting_name, _ in pairs(variant.settings) do
+      if original_values[setting_name] == nil then
+        if settings.global[setting_name] then
+          original_values[setting_name] = settings.global[setting_name].value
+        else
+          unit_test_functions.print_msg(string.format("Unknown runtime-global setting %q.", setting_name), 0)
+        end
+      end
+    end
   end
-end)
+  return original_values
+end
+
+local function apply_variant(variant, original_values)
+  for setting_name, original_value in pairs(original_values) do
+    local value = variant.settings[setting_name]
+    if value == nil then
+      value = original_value
+    end
+    settings.global[setting_name] = { value = value }
+  end
+end
+
+-- Cursor of the unit tests: the current variant and its test run. Each step either
+-- starts the run of the next variant or executes one step of the current run.
+local cursor = nil
+
+-- Returns true once the unit tests of all variants finished
+local function step_unit_tests()
+  if cursor == nil then
+    cursor = { variant_index = 0, run = nil, original_values = read_original_values() }
+  end
+  if cursor.run == nil then
+    cursor.variant_index = cursor.variant_index + 1
+    local variant = variants[cursor.variant_index]
+    if variant == nil then
+      return true
+    end
+    apply_variant(variant, cursor.original_values)
+    cursor.run = unit_test_runner.start_run(test_options)
+  elseif unit_test_runner.run_step(cursor.run) then
+    cursor.run = nil
+  end
+  return false
+end
+
+-- Executes up to max_steps steps, so long running tests are spread over several ticks
+local function execute_unit_tests(max_steps)
+  for _ = 1, max_steps do
+    if step_unit_tests() then
+      return true
+    end
+  end
+  return false
+end
+
+if start_tick <= 0 then
+  -- There are no ticks before on_init, so the tests run to completion right away
+  script.on_init(function()
+    execute_unit_tests(math.huge)
+  end)
+else
+  script.on_event(defines.events.on_tick, function(event)
+    if event.tick >= start_tick and execute_unit_tests(steps_per_tick) then
+      script.on_event(defines.events.on_tick, nil) -- only run the tests once
+    end
+  end)
+end
@@ -9,12 +9,45 @@ except ModuleNotFoundError as ex:
     raise
 
 import argparse
+import shlex
 from pathlib import Path
 
-from python.unit_test_controller import UnitTestController
+from python.mod_directory_index import ModDirectoryIndex
+from python.unit_test_controller import (
+    UnitTestController,
+    findDirectories,
+    findModFolder,
+    resolveTests,
+)
 from python.unit_test_configuration import UnitTestConfiguration
 
 
+def findConfigFile(
+    modDirectory: Path, modIndex: ModDirectoryIndex, modToTest: str
+) -> Path:
+    configFile = (
+        findModFolder(modDirectory, modIndex, modToTest) / "unit-test-config.jsonnet"
+    )
+    if not configFile.exists():
+        raise FileNotFoundError(
+            f"Configuration file {configFile} does not exist. Please ensure the mod has a valid unit test configuration."
+        )
+    return configFile
+
+
+def parseShard(value: str) -> tuple[int, int]:
+    # i/n, the i-th of n shards (1-based)
+    try:
+        shardIndex, shardCount = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Expected a shard as i/n, got '{value}'.")
+    if not 1 <= shardIndex <= shardCount:
+        raise argparse.ArgumentTypeError(
+            f"Shard '{value}' is invalid, i must be between 1 and n."
+        )
+    return shardIndex, shardCount
+
+
 def main():
     parser = argparse.ArgumentParser(description="Factorio Unit Test CLI")
     subparsers = parser.add_subparsers(dest="command", required=True)
@@ -47,10 +80,142 @@ def main():
         default=False,
         help="Log output to file",
     )
+    run_parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of configurations to test in parallel, each in its own Factorio instance",
+    )
+    run_parser.add_argument(
+        "--start-tick",
+        type=int,
+        help="Game tick at which the unit tests start, 0 runs them on init. Overrides start_tick from the configuration file (default 60)",
+    )
+    run_parser.add_argument(
+        "-p",
+        "--profile",
+        type=str,
+        choices=["default", "benchmark", "headless"],
+        default="default",
+        help="Launch profile: default runs freeplay in the game client, benchmark loads a blank map without audio, headless runs a server (also works with the headless binary)",
+    )
+    run_parser.add_argument(
+        "--factorio-args",
+        type=str,
+        default="",
+        help='Extra arguments passed to Factorio, e.g. --factorio-args="--verbose"',
+    )
+    run_parser.add_argument(
+        "-c",
+        "--cache",
+        action="store_true",
+        help="Skip launching the game for configurations that are unchanged since they last passed",
+    )
+    run_parser.add_argument(
+        "--cache-max-entries",
+        type=int,
+        default=256,
+        help="Maximum number of passing configurations remembered by the cache",
+    )
+    run_parser.add_argument(
+        "--cache-max-age",
+        type=float,
+        default=14,
+        help="Number of days a cached pass stays valid",
+    )
+    run_parser.add_argument(
+        "--no-grouping",
+        action="store_true",
+        help="Launch the game for every configuration, even if configurations only differ in runtime-global settings",
+    )
+    run_parser.add_argument(
+        "--timeout",
+        type=float,
+        help="Seconds a configuration may take, from launch until its tests finished",
+    )
+    run_parser.add_argument(
+        "--test-timeout",
+        type=float,
+        help="Seconds a single unit test may take",
+    )
+    run_parser.add_argument(
+        "--stall-timeout",
+        type=float,
+        help="Seconds without any game output after which the game is considered stalled",
+    )
+    run_parser.add_argument(
+        "--no-dependency-check",
+        action="store_true",
+        help="Launch configurations without checking their mod lists against the installed mods' dependencies",
+    )
+    run_parser.add_argument(
+        "-t",
+        "--test",
+        type=str,
+        action="append",
+        default=[],
+        help="Only run this unit test, by test name (e.g. unit_test_010) or test file name (e.g. unit-test-010). Can be given multiple times",
+    )
+    run_parser.add_argument(
+        "--shard",
+        type=parseShard,
+        help="Only run shard i of n (e.g. 2/4) of the configuration x unit test matrix, to split a run across machines",
+    )
+    run_parser.add_argument(
+        "--report",
+        type=str,
+        action="append",
+        default=[],
+        help="Write the results of every configuration and unit test to this file, as JUnit XML for .xml files and JSON otherwise. Can be given multiple times",
+    )
     run_parser.add_argument("modname", type=str, help="The mod to test")
 
+    list_parser = subparsers.add_parser(
+        "list-tests",
+        help="List the test files selected by the configuration, without launching the game",
+    )
+    list_parser.add_argument(
+        "-u",
+        "--user-data-directory",
+        type=str,
+        help="Path to the user data directory. See https://wiki.factorio.com/Application_directory",
+    )
+    list_parser.add_argument(
+        "-m",
+        "--mod-directory",
+        type=str,
+        help="Path to the Factorio mods directory. Uses /mods in user data directory by default",
+    )
+    list_parser.add_argument("modname", type=str, help="The mod to list the tests of")
+
     args = parser.parse_args()
 
+    if args.command == "list-tests":
+        if args.mod_directory:
+            modDirectory = Path(args.mod_directory).expanduser().resolve()
+        else:
+            _, modDirectory = findDirectories(
+                (
+                    Path(args.user_data_directory).expanduser().resolve()
+                    if args.user_data_directory
+                    else None
+                )
+            )
+        modIndex = ModDirectoryIndex(modDirectory)
+        modIndex.refresh()
+        configFile = findConfigFile(modDirectory, modIndex, args.modname)
+        print(f"Using configuration file: {configFile}")
+
+        resolvedTests = resolveTests(
+            UnitTestConfiguration(args.modname, configFile), modDirectory, modIndex
+        )
+        for testFile in resolvedTests.files:
+            print(f"{testFile.sha1[:12]}  {testFile.pattern:<24} {testFile.path}")
+        for pattern in resolvedTests.unmatchedPatterns:
+            print(f"No matching test files found for {pattern}")
+        print(f"{len(resolvedTests.files)} test files")
+
     if args.command == "run":
         factorioPath = (
             Path(args.factorio_path).expanduser().resolve()
@@ -68,6 +233,11 @@ def main():
             else None
         )
         logToFile = args.log
+        jobs = args.jobs
+        startTick = args.start_tick
+        launchProfile = args.profile
+        factorioArgs = shlex.split(args.factorio_args)
+        useResultCache = args.cache
         modToTest = args.modname
 
         testController = UnitTestController(
@@ -76,19 +246,34 @@ def main():
             userDataDirectory=userDataDirectory,
             modDirectory=modDirectory,
             logToFile=logToFile,
+            jobs=jobs,
+            startTick=startTick,
+            launchProfile=launchProfile,
+            factorioArgs=factorioArgs,
+            useResultCache=useResultCache,
+            resultCacheMaxEntries=args.cache_max_entries,
+            resultCacheMaxAgeDays=args.cache_max_age,
+            groupRuntimeSettings=not args.no_grouping,
+            configurationTimeout=args.timeout,
+            testTimeout=args.test_timeout,
+            stallTimeout=args.stall_timeout,
+            resolveDependencies=not args.no_dependency_check,
+            testFilter=args.test,
+            shard=args.shard,
         )
 
-        configFile = (
-            testController.modDirectory / modToTest / "unit-test-config.jsonnet"
+        testController.modIndex.refresh()
+        configFile = findConfigFile(
+            testController.modDirectory, testController.modIndex, modToTest
         )
-        if not configFile.exists():
-            raise FileNotFoundError(
-                f"Configuration file {configFile} does not exist. Please ensure the mod has a valid unit test configuration."
-            )
         testController.logger(f"Using configuration file: {configFile}")
 
         testConfigurations = UnitTestConfiguration(modToTest, configFile)
         testController.TestConfigurations(testConfigurations)
+        for reportPath in args.report:
+            reportPath = Path(reportPath).expanduser().resolve()
+            testController.report.write(reportPath)
+            testController.logger(f"Wrote report: {reportPath}")
 
 
 if __name__ == "__main__":
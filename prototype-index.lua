@@ -0,0 +1,210 @@
+-- Shared index of the prototype graph, used by the unit tests.
+-- Prototypes can't change during a game session, so each section of the index
+-- is built once, the first time a unit test accesses it, and then reused by
+-- all following unit tests (and test variants) of this launch.
+--
+-- Sections:
+--   recipe_ingredients[recipe_name]  = array of ingredients
+--   recipe_products[recipe_name]     = array of products
+--   item_producers[item_name]        = { [recipe_name] = recipe_prototype } (recipes with the item as product)
+--   fluid_producers[fluid_name]      = { [recipe_name] = recipe_prototype }
+--   item_consumers[item_name]        = { [recipe_name] = recipe_prototype } (recipes with the item as ingredient)
+--   fluid_consumers[fluid_name]      = { [recipe_name] = recipe_prototype }
+--   category_recipes[category_name]  = { [recipe_name] = recipe_prototype }
+--   category_machines[category_name] = { [entity_name] = entity_prototype } (crafting machines)
+--   category_characters[category_name] = { [entity_name] = entity_prototype }
+--   entity_items[entity_name]        = { [item_name] = item_prototype } (items to place the entity)
+--   entities_by_type[entity_type]    = { [entity_name] = entity_prototype }
+--   tech_prerequisites[tech_name]    = { [prerequisite_name] = true }
+--   tech_order                       = array of visible and enabled technology names, prerequisites first
+--   unordered_techs                  = array of visible and enabled technology names that can't be ordered,
+--                                      because (one of) their prerequisites is hidden or disabled
+-- All sections include hidden prototypes, unless stated otherwise.
+
+local builders = {}
+
+local function add_to_set(map, key, name, value)
+  local set = map[key]
+  if not set then
+    set = {}
+    map[key] = set
+  end
+  set[name] = value
+end
+
+local function build_recipe_graph(index)
+  local recipe_ingredients = {}
+  local recipe_products = {}
+  local item_producers = {}
+  local fluid_producers = {}
+  local item_consumers = {}
+  local fluid_consumers = {}
+  local category_recipes = {}
+
+  for recipe_name, recipe in pairs(prototypes.recipe) do
+    local ingredients = recipe.ingredients
+    local products = recipe.products
+    recipe_ingredients[recipe_name] = ingredients
+    recipe_products[recipe_name] = products
+    for _, ingredient in pairs(ingredients) do
+      add_to_set(ingredient.type == "item" and item_consumers or fluid_consumers, ingredient.name, recipe_name, recipe)
+    end
+    for _, product in pairs(products) do
+      if product.type == "item" then
+        add_to_set(item_producers, product.name, recipe_name, recipe)
+      elseif product.type == "fluid" then
+        add_to_set(fluid_producers, product.name, recipe_name, recipe)
+      end
+    end
+    add_to_set(category_recipes, recipe.category, recipe_name, recipe)
+  end
+
+  rawset(index, "recipe_ingredients", recipe_ingredients)
+  rawset(index, "recipe_products", recipe_products)
+  rawset(index, "item_producers", item_producers)
+  rawset(index, "fluid_producers", fluid_producers)
+  rawset(index, "item_consumers", item_consumers)
+  rawset(index, "fluid_consumers", fluid_consumers)
+  rawset(index, "category_recipes", category_recipes)
+end
+builders.recipe_ingredients = build_recipe_graph
+builders.recipe_products = build_recipe_graph
+builders.item_producers = build_recipe_graph
+builders.fluid_producers = build_recipe_graph
+builders.item_consumers = build_recipe_graph
+builders.fluid_consumers = build_recipe_graph
+builders.category_recipes = build_recipe_graph
+
+function builders.category_machines(index)
+  local category_machines = {}
+  for entity_name, entity in pairs(prototypes.get_entity_filtered({ { filter = "crafting-machine" } })) do
+    for category_name, _ in pairs(entity.crafting_categories) do
+      add_to_set(category_machines, category_name, entity_name, entity)
+    end
+  end
+  rawset(index, "category_machines", category_machines)
+end
+
+function builders.category_characters(index)
+  local category_characters = {}
+  for entity_name, entity in pairs(index.entities_by_type["character"]) do
+    for category_name, _ in pairs(entity.crafting_categories) do
+      add_to_set(category_characters, category_name, entity_name, entity)
+    end
+  end
+  rawset(index, "category_characters", category_characters)
+end
+
+function builders.entity_items(index)
+  local entity_items = {}
+  local item_prototypes = prototypes.item
+  for entity_name, entity in pairs(prototypes.get_entity_filtered({ { filter = "item-to-place" } })) do
+    local items = {}
+    for _, item in pairs(entity.items_to_place_this) do
+      local item_name = type(item) == "string" and item or item.name
+      items[item_name] = item_prototypes[item_name]
+    end
+    entity_items[entity_name] = items
+  end
+  rawset(index, "entity_items", entity_items)
+end
+
+function builders.entities_by_type(index)
+  -- Filled per entity type on first use
+  rawset(
+    index,
+    "entities_by_type",
+    setmetatable({}, {
+      __index = function(entities_by_type, entity_type)
+        local entities = {}
+        for entity_name, entity in pairs(prototypes.get_entity_filtered({ { filter = "type", type = entity_type } })) do
+          entities[entity_name] = entity
+        end
+        rawset(entities_by_type, entity_type, entities)
+        return entities
+      end,
+    })
+  )
+end
+
+local function build_tech_graph(index)
+  local tech_prerequisites = {}
+  for tech_name, tech in pairs(prototypes.technology) do
+    local prerequisites = {}
+    for prerequisite_name, _ in pairs(tech.prerequisites) do
+      prerequisites[prerequisite_name] = true
+    end
+    tech_prerequisites[tech_name] = prerequisites
+  end
+
+  -- Topological order (Kahn's algorithm) of the visible and enabled technologies,
+  -- technologies depending on any other technology are never ready
+  local tech_filters = {
+    { filter = "hidden", invert = true, mode = "and" },
+    { filter = "enabled", invert = false, mode = "and" },
+  }
+  local pending_counts = {}
+  local dependents = {}
+  local ready = {}
+  for tech_name, _ in pairs(prototypes.get_technology_filtered(tech_filters)) do
+    local pending_count = 0
+    for prerequisite_name, _ in pairs(tech_prerequisites[tech_name]) do
+      pending_count = pending_count + 1
+      add_to_set(dependents, prerequisite_name, tech_name, true)
+    end
+    pending_counts[tech_name] = pending_count
+    if pending_count == 0 then
+      table.insert(ready, tech_name)
+    end
+  end
+  table.sort(ready)
+
+  local tech_order = {}
+  local position = 1
+  while ready[position] do
+    local tech_name = ready[position]
+    position = position + 1
+    table.insert(tech_order, tech_name)
+    local newly_ready = {}
+    for dependent_name, _ in pairs(dependents[tech_name] or {}) do
+      if pending_counts[dependent_name] then
+        pending_counts[dependent_name] = pending_counts[dependent_name] - 1
+        if pending_counts[dependent_name] == 0 then
+          table.insert(newly_ready, dependent_name)
+        end
+      end
+    end
+    table.sort(newly_ready) -- deterministic order between launches
+    for _, dependent_name in ipairs(newly_ready) do
+      table.insert(ready, dependent_name)
+    end
+  end
+
+  local unordered_techs = {}
+  for tech_name, pending_count in pairs(pending_counts) do
+    if pending_count > 0 then
+      table.insert(unordered_techs, tech_name)
+    end
+  end
+  table.sort(unordered_techs)
+
+  rawset(index, "tech_prerequisites", tech_prerequisites)
+  rawset(index, "tech_order", tech_order)
+  rawset(index, "unordered_techs", unordered_techs)
+end
+builders.tech_prerequisites = build_tech_graph
+builders.tech_order = build_tech_graph
+builders.unordered_techs = build_tech_graph
+
+local prototype_index = setmetatable({}, {
+  __index = function(index, section)
+    local builder = builders[section]
+    if not builder then
+      error(string.format("Unknown prototype index section %q.", section))
+    end
+    builder(index)
+    return rawget(index, section)
+  end,
+})
+
+return prototype_index
@@ -1,24 +1,58 @@
-from typing import Callable, Union, Optional, Iterable
-import os, subprocess
+from typing import Callable, Optional, Iterable
+import os, subprocess, socket
 from shlex import shlex
 import json
 import re
+import tempfile
 import time
 from pathlib import Path
 
+try:
+    from .game_output_reader import GameEvent, GameEventType, GameOutputReader
+    from .test_report import TestCaseResult
+except ImportError:
+    from game_output_reader import GameEvent, GameEventType, GameOutputReader
+    from test_report import TestCaseResult
+
 
 class FactorioController:
+    # default: graphical client running freeplay, as a player would
+    # benchmark: graphical client without audio, loading the blank unit test scenario
+    # headless: server mode (works with the headless binary), loading the blank unit test scenario
+    launchProfiles = ("default", "benchmark", "headless")
+
     factorioPath: Path
     log: Callable[[str], None]
+    launchProfile: str
     factorioArgs: list[str]
     factorioProcess: Optional[subprocess.Popen]
+    serverSettingsPath: Optional[Path]
+    outputReader: Optional[GameOutputReader]
+    configurationTimeout: Optional[float]
+    testTimeout: Optional[float]
+    stallTimeout: Optional[float]
+    timeoutReport: Optional[str]
+    finished: bool  # whether the mod signalled the end of the last configuration
+    testCases: dict[str, TestCaseResult]
+    configurationMessages: list[str]
 
     def __init__(
         self,
         factorioPath: Optional[Path] = None,
         modDirectory: Optional[Path] = None,
         log: Optional[Callable[[str], None]] = None,
+        configPath: Optional[Path] = None,
+        launchProfile: str = "default",
+        extraArgs: Optional[list[str]] = None,
+        configurationTimeout: Optional[float] = None,
+        testTimeout: Optional[float] = None,
+        stallTimeout: Optional[float] = None,
     ):
+        if launchProfile not in self.launchProfiles:
+            raise ValueError(
+                f"Launch profile '{launchProfile}' is invalid, expected one of {', '.join(self.launchProfiles)}."
+            )
+        self.launchProfile = launchProfile
         if factorioPath is None:
             self.factorioPath = (
                 Path(self.__retrieveSteamGameInstallLocation(427520))
@@ -30,12 +64,31 @@ class FactorioController:
             self.log = lambda msg: print(f"factorio-unit-test: {msg}")
         else:
             self.log = log
-        self.factorioArgs = self.__createFactorioArgs(modDirectory)
+        self.factorioArgs = self.__createFactorioArgs(
+            modDirectory, configPath, extraArgs
+        )
         self.factorioProcess = None
+        self.serverSettingsPath = None
+        self.outputReader = None
+        self.configurationTimeout = configurationTimeout
+        self.testTimeout = testTimeout
+        self.stallTimeout = stallTimeout
+        self.timeoutReport = None
+        self.finished = False
+        self.testCases = {}
+        self.configurationMessages = []
 
-    def launchGame(self) -> None:
+    def launchGame(self, extraArgs: Optional[list[str]] = None) -> None:
         # https://developer.valvesoftware.com/wiki/Command_Line_Options#Steam_.28Windows.29
         self.log(f"Launching {self.factorioPath.name}")
+        factorioArgs = self.factorioArgs + (extraArgs or [])
+        if self.launchProfile == "headless":
+            # Parallel servers must not fight over the default port
+            factorioArgs += ["--port", str(self.__findFreePort())]
+            # Servers pause without connected players by default, so the game would
+            # never reach the tick the unit tests start at
+            self.serverSettingsPath = self.__writeServerSettings()
+            factorioArgs += ["--server-settings", str(self.serverSettingsPath)]
         try:
             # Prevents Steam from requiring user confirmation of launch
             env = os.environ.copy()
@@ -43,75 +96,155 @@ class FactorioController:
             
             self.factorioProcess = subprocess.Popen(
                 executable=self.factorioPath,
-                args=self.factorioArgs,
+                args=factorioArgs,
                 cwd=self.factorioPath.parent,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.STDOUT,
                 env=env,
             )
+            self.outputReader = GameOutputReader(self.factorioProcess, self)
         except FileNotFoundError as fnfe:
+            if self.serverSettingsPath is not None:
+                self.serverSettingsPath.unlink(missing_ok=True)
+                self.serverSettingsPath = None
             print(f"The system could not find {self.factorioPath}.")
             raise fnfe
 
-    def terminateGame(self) -> None:
+    def terminateGame(self, timeout: float = 10.0) -> None:
         if self.factorioProcess is None:
             self.log("No factorio process to terminate.")
             return
 
         if self.factorioProcess.poll() is None:
-            self.factorioProcess.terminate()
             self.log(f"Closing {self.factorioPath.name}")
-            time.sleep(3)  # Allow the game to terminate fully
-        else:
+            shutdownStart = time.perf_counter()
+            self.factorioProcess.terminate()
+            try:
+                self.factorioProcess.wait(timeout)
+            except subprocess.TimeoutExpired:
+                self.log(
+                    f"{self.factorioPath.name} did not close within {timeout:g}s, killing it"
+                )
+                self.factorioProcess.kill()
+                self.factorioProcess.wait()
+            self.log(
+                f"Closed {self.factorioPath.name} in {time.perf_counter() - shutdownStart:.2f}s"
+            )
+        elif self.timeoutReport is None:
             self.log(f"{self.factorioPath.name} terminated unexpectedly...")
+        if self.outputReader is not None:
+            self.outputReader.join(timeout)
+            self.outputReader = None
+        if self.factorioProcess.stdout is not None:
+            self.factorioProcess.stdout.close()
         self.factorioProcess = None
+        if self.serverSettingsPath is not None:
+            self.serverSettingsPath.unlink(missing_ok=True)
+            self.serverSettingsPath = None
 
-    def getGameOutput(self) -> Iterable[Union[str, bool]]:
-        if self.factorioProcess is None:
+    def getGameEvents(
+        self, timeout: Optional[float] = None
+    ) -> Iterable[Optional[GameEvent]]:
+        if self.factorioProcess is None or self.outputReader is None:
             raise RuntimeError(
                 "Factorio process is not running. Please launch the game first."
             )
-
-        for stdoutLine in iter(self.factorioProcess.stdout.readline, ""):
-            lineData = stdoutLine.strip().decode("utf-8")
-            if lineData == "":
-                yield self.factorioProcess.poll() is None
-            else:
-                yield lineData
-        self.factorioProcess.stdout.close()
-        return_code = self.factorioProcess.wait()
-        if return_code:
-            raise subprocess.CalledProcessError(return_code, self.factorioPath)
-        yield False  # App terminated
+        return self.outputReader.events(timeout)
 
     def executeUnitTests(self) -> bool:
         # This does not actually execute anything, it waits till the mod signals the tests are finished while logging all unit test results
-        for line in self.getGameOutput():
-            if type(line) is str:
-                if re.fullmatch(r"factorio\-unit\-test: .*", line):
-                    self.log(line[20:])
-                    if re.fullmatch(r"factorio\-unit\-test: Finished testing!.*", line):
-                        return (
-                            True
-                            if re.fullmatch(r".* All unit tests passed!", line)
-                            else False
+        self.timeoutReport = None
+        self.finished = False
+        self.testCases = {}
+        self.configurationMessages = []
+        configurationStart = time.monotonic()
+        currentTest: Optional[str] = None
+        testStart = configurationStart
+        pollInterval = 1.0 if self.__hasTimeouts() else None
+        for event in self.getGameEvents(pollInterval):
+            if event is not None:
+                if event.type in (
+                    GameEventType.MESSAGE,
+                    GameEventType.MOD_LOAD_ERROR,
+                    GameEventType.CRASH,
+                ):
+                    # Messages belong to the running unit test, or to the configuration
+                    if currentTest is not None:
+                        self.testCases[currentTest].messages.append(event.message)
+                    else:
+                        self.configurationMessages.append(event.message)
+                if event.type in (GameEventType.MOD_LOAD_ERROR, GameEventType.CRASH):
+                    self.log(event.message)
+                    return False  # Error during launch or while testing
+                elif event.type is GameEventType.EXITED:
+                    return False  # Terminated factorio
+                self.log(event.message)
+                if event.type is GameEventType.FINISHED:
+                    self.finished = True
+                    return event.passed
+                elif event.type is GameEventType.TEST_STARTED:
+                    currentTest = event.testName
+                    testStart = time.monotonic()
+                    self.testCases[currentTest] = TestCaseResult(currentTest)
+                elif event.type in (
+                    GameEventType.TEST_PASSED,
+                    GameEventType.TEST_FAILED,
+                ):
+                    currentTest = None
+                    if event.testName in self.testCases:
+                        self.testCases[event.testName].status = (
+                            "passed"
+                            if event.type is GameEventType.TEST_PASSED
+                            else "failed"
                         )
-                elif re.fullmatch(
-                    r" *[0-9]+\.[0-9]{3} Error ModManager\.cpp\:[0-9]+\:.*", line
+                elif (
+                    event.type is GameEventType.TEST_TIMING
+                    and event.testName in self.testCases
                 ):
-                    self.log(
-                        line[
-                            re.match(
-                                r" *[0-9]+\.[0-9]{3} Error ModManager\.cpp\:[0-9]+\: *",
-                                line,
-                            ).regs[0][1] :
-                        ]
-                    )
-                    return False  # Error during launch launch
-            elif type(line) is bool and line is False:
-                return False  # Terminated factorio
+                    self.testCases[event.testName].timing = event.timing
+
+            if self.__hasTimeouts():
+                self.timeoutReport = self.__checkTimeouts(
+                    configurationStart, currentTest, testStart
+                )
+                if self.timeoutReport is not None:
+                    self.log(self.timeoutReport)
+                    self.factorioProcess.kill()  # hung games don't react to terminate
+                    return False
         return False  # unexpected end
 
+    def __hasTimeouts(self) -> bool:
+        return (
+            self.configurationTimeout is not None
+            or self.testTimeout is not None
+            or self.stallTimeout is not None
+        )
+
+    def __checkTimeouts(
+        self, configurationStart: float, currentTest: Optional[str], testStart: float
+    ) -> Optional[str]:
+        now = time.monotonic()
+        where = (
+            f"in unit test {currentTest}" if currentTest else "outside of unit tests"
+        )
+        if (
+            self.stallTimeout is not None
+            and now - self.outputReader.lastOutputTime > self.stallTimeout
+        ):
+            return f"No game output for {self.stallTimeout:g}s, stalled {where}"
+        if (
+            self.testTimeout is not None
+            and currentTest is not None
+            and now - testStart > self.testTimeout
+        ):
+            return f"Unit test {currentTest} exceeded the {self.testTimeout:g}s test timeout"
+        if (
+            self.configurationTimeout is not None
+            and now - configurationStart > self.configurationTimeout
+        ):
+            return f"Exceeded the {self.configurationTimeout:g}s configuration timeout {where}"
+        return None
+
     def __retrieveSteamGameInstallLocation(self, steamGameID: int) -> str:
         # Find install location of steam itself
         # TODO make platform-agnostic and use pathlib
@@ -201,7 +334,44 @@ class FactorioController:
 
         return steamGameFolder
 
-    def __createFactorioArgs(self, modDirectory: Optional[Path] = None) -> list:
+    def getGameVersion(self) -> str:
+        # The base mod is versioned with the game, the binary stats catch patched executables
+        baseInfoPath = self.factorioPath.parent.parent.parent / "data/base/info.json"
+        version = "unknown"
+        if baseInfoPath.exists():
+            with baseInfoPath.open("r") as baseInfoFile:
+                version = json.load(baseInfoFile).get("version", version)
+        if self.factorioPath.exists():
+            stats = self.factorioPath.stat()
+            version += f" ({stats.st_size} bytes, {stats.st_mtime_ns})"
+        return version
+
+    def __findFreePort(self) -> int:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as udpSocket:
+            udpSocket.bind(("", 0))
+            return udpSocket.getsockname()[1]
+
+    def __writeServerSettings(self) -> Path:
+        fileDescriptor, serverSettingsPath = tempfile.mkstemp(
+            prefix="factorio-unit-test-", suffix="-server-settings.json"
+        )
+        with os.fdopen(fileDescriptor, "w", encoding="utf-8") as serverSettingsFile:
+            json.dump(
+                {
+                    "visibility": {"public": False, "lan": False},
+                    "auto_pause": False,
+                },
+                serverSettingsFile,
+                indent=2,
+            )
+        return Path(serverSettingsPath)
+
+    def __createFactorioArgs(
+        self,
+        modDirectory: Optional[Path] = None,
+        configPath: Optional[Path] = None,
+        extraArgs: Optional[list[str]] = None,
+    ) -> list:
         def convert_to_arglist(arg: str) -> list:
             return arg.split(" ")
 
@@ -210,10 +380,25 @@ class FactorioController:
             str(self.factorioPath)
         )  # because factorio expects the exe as first arg...
         # args.extend(convert_to_arglist("--verbose"))
-        args.extend(convert_to_arglist("--load-scenario base/freeplay"))
+        if self.launchProfile == "headless":
+            args.extend(
+                convert_to_arglist(
+                    "--start-server-load-scenario factorio-unit-test/blank"
+                )
+            )
+        elif self.launchProfile == "benchmark":
+            args.extend(convert_to_arglist("--load-scenario factorio-unit-test/blank"))
+            args.extend(convert_to_arglist("--disable-audio"))
+        else:
+            args.extend(convert_to_arglist("--load-scenario base/freeplay"))
         if modDirectory is not None:
             args.append("--mod-directory")
             args.append(str(modDirectory))
+        if configPath is not None:
+            args.append("--config")
+            args.append(str(configPath))
+        if extraArgs:
+            args.extend(extraArgs)
 
         return args
 
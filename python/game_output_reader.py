@@ -0,0 +1,217 @@
+from __future__ import annotations
+from typing import Any, BinaryIO, Iterable, Optional
+import re
+import queue
+import subprocess
+import threading
+import time
+from enum import Enum
+
+
+class GameEventType(Enum):
+    MESSAGE = "message"
+    TEST_STARTED = "test-started"
+    TEST_PASSED = "test-passed"
+    TEST_FAILED = "test-failed"
+    TEST_TIMING = "test-timing"
+    FINISHED = "finished"
+    MOD_LOAD_ERROR = "mod-load-error"
+    CRASH = "crash"
+    EXITED = "exited"
+
+
+class TestTiming:
+    """Time spent in a unit test, excluding the ticks it waited for, and the Lua memory it added."""
+
+    durationMs: float
+    memoryKiB: float
+    ticks: int
+
+    def __init__(self, durationMs: float, memoryKiB: float, ticks: int):
+        self.durationMs = durationMs
+        self.memoryKiB = memoryKiB
+        self.ticks = ticks
+
+    def __repr__(self) -> str:
+        return f"TestTiming({self.durationMs:g}ms, {self.memoryKiB:g}KiB, {self.ticks} ticks)"
+
+
+class GameEvent:
+    type: GameEventType
+    message: str
+    testName: Optional[str]
+    passed: Optional[bool]
+    timing: Optional[TestTiming]
+    source: Any
+
+    def __init__(
+        self,
+        type: GameEventType,
+        message: str,
+        testName: Optional[str] = None,
+        passed: Optional[bool] = None,
+        timing: Optional[TestTiming] = None,
+        source: Any = None,
+    ):
+        self.type = type
+        self.message = message
+        self.testName = testName
+        self.passed = passed
+        self.timing = timing
+        self.source = source
+
+    def __repr__(self) -> str:
+        return f"GameEvent({self.type.value}, {self.message!r})"
+
+
+class GameOutputReader:
+    """Reads the output of a Factorio process on a background thread and turns it into game events.
+
+    Lines are only matched against the patterns once a cheap substring check
+    passes, so chatty mod logs cost little more than reading them. Readers
+    sharing an event queue can be watched together, each event carries the
+    source of the reader that produced it.
+    """
+
+    unitTestPrefix = "factorio-unit-test:"
+    unitTestPatterns = [
+        (GameEventType.TEST_STARTED, re.compile(r"Starting unit test (.+)\.")),
+        (GameEventType.TEST_PASSED, re.compile(r"Unit test (.+) PASSED!")),
+        (GameEventType.TEST_FAILED, re.compile(r"Unit test (.+) FAILED!.*")),
+        (
+            GameEventType.TEST_FAILED,
+            re.compile(r"Unexpected result for unit test (.+)!"),
+        ),
+        (GameEventType.FINISHED, re.compile(r"Finished testing!.*")),
+        # The duration is a LuaProfiler, printed as e.g. "Duration: 12.345678ms",
+        # so the test name ends at the first colon
+        (
+            GameEventType.TEST_TIMING,
+            re.compile(
+                r"Timing of unit test (.+?): [^0-9]*([0-9.]+) ?ms,"
+                r" (-?[0-9.]+) KiB Lua memory, ([0-9]+) ticks"
+            ),
+        ),
+    ]
+    modLoadErrorPattern = re.compile(
+        r" *[0-9]+\.[0-9]{3} Error ModManager\.cpp\:[0-9]+\: *(.*)"
+    )
+    crashPattern = re.compile(
+        r" *[0-9]+\.[0-9]{3} (?:Error MainLoop\.cpp\:[0-9]+\:"
+        r"|.*Unexpected error occurred).*"
+    )
+
+    process: subprocess.Popen
+    source: Any
+    eventQueue: queue.Queue[GameEvent]
+    lastOutputTime: float
+    thread: threading.Thread
+
+    def __init__(
+        self,
+        process: subprocess.Popen,
+        source: Any = None,
+        eventQueue: Optional[queue.Queue[GameEvent]] = None,
+    ):
+        self.process = process
+        self.source = source
+        self.eventQueue = eventQueue if eventQueue is not None else queue.Queue()
+        self.lastOutputTime = time.monotonic()
+        self.thread = threading.Thread(
+            target=self.__readOutput, args=(process.stdout,), daemon=True
+        )
+        self.thread.start()
+
+    def events(self, timeout: Optional[float] = None) -> Iterable[Optional[GameEvent]]:
+        # Yields events until the process exited, or None whenever no event arrived within the timeout
+        while True:
+            try:
+                event = self.eventQueue.get(timeout=timeout)
+            except queue.Empty:
+                yield None
+                continue
+            yield event
+            if event.type is GameEventType.EXITED:
+                return
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        self.thread.join(timeout)
+
+    def parseLine(self, line: str) -> Optional[GameEvent]:
+        if line.startswith(self.unitTestPrefix):
+            message = line[len(self.unitTestPrefix) + 1 :]
+            for eventType, pattern in self.unitTestPatterns:
+                if match := pattern.fullmatch(message):
+                    return GameEvent(
+                        eventType,
+                        message,
+                        testName=match.group(1) if match.groups() else None,
+                        passed=(
+                            message.endswith("All unit tests passed!")
+                            if eventType is GameEventType.FINISHED
+                            else None
+                        ),
+                        timing=(
+                            TestTiming(
+                                float(match.group(2)),
+                                float(match.group(3)),
+                                int(match.group(4)),
+                            )
+                            if eventType is GameEventType.TEST_TIMING
+                            else None
+                        ),
+                        source=self.source,
+                    )
+            return GameEvent(GameEventType.MESSAGE, message, source=self.source)
+        if "ModManager.cpp" in line:
+            if match := self.modLoadErrorPattern.fullmatch(line):
+                return GameEvent(
+                    GameEventType.MOD_LOAD_ERROR, match.group(1), source=self.source
+                )
+        if "Error" in line and self.crashPattern.fullmatch(line):
+            return GameEvent(GameEventType.CRASH, line.strip(), source=self.source)
+        return None
+
+    def __readOutput(self, stream: BinaryIO) -> None:
+        for rawLine in iter(stream.readline, b""):
+            self.lastOutputTime = time.monotonic()
+            line = rawLine.decode("utf-8", errors="replace").rstrip()
+            if line and (event := self.parseLine(line)):
+                self.eventQueue.put(event)
+
+        returnCode = self.process.wait()
+        if returnCode and returnCode > 0:
+            self.eventQueue.put(
+                GameEvent(
+                    GameEventType.CRASH,
+                    f"Exited with return code {returnCode}",
+                    source=self.source,
+                )
+            )
+        self.eventQueue.put(
+            GameEvent(
+                GameEventType.EXITED,
+                f"Exited with return code {returnCode}",
+                source=self.source,
+            )
+        )
+
+
+def watchGameOutputs(
+    readers: list[GameOutputReader], timeout: Optional[float] = None
+) -> Iterable[Optional[GameEvent]]:
+    # Yields the events of several readers sharing one event queue until all of their processes exited
+    eventQueue = readers[0].eventQueue
+    assert all(
+        reader.eventQueue is eventQueue for reader in readers
+    ), "Watched readers must share their event queue!"
+    runningSources = {reader.source for reader in readers}
+    while runningSources:
+        try:
+            event = eventQueue.get(timeout=timeout)
+        except queue.Empty:
+            yield None
+            continue
+        yield event
+        if event.type is GameEventType.EXITED:
+            runningSources.discard(event.source)
@@ -0,0 +1,72 @@
+from __future__ import annotations
+import shutil
+from pathlib import Path
+
+from .path_links import linkPath, removePath
+
+
+class JobWorkspace:
+    """An isolated mod and write-data directory for one of several parallel Factorio instances.
+
+    Every entry of the shared mod directory is linked into the workspace, apart
+    from the files each instance writes itself: mod-list.json, mod-settings.dat
+    and the test options of the factorio-unit-test mod. The test bundle is the
+    same for every instance, so it is linked as well.
+    """
+
+    privateModFiles = ("mod-list.json", "mod-settings.dat")
+    privateTestModFiles = ("temp-test-options.lua",)
+
+    jobIndex: int
+    sharedModDirectory: Path
+    rootDirectory: Path
+    modDirectory: Path
+    writeDataDirectory: Path
+    configPath: Path
+
+    def __init__(
+        self, jobIndex: int, sharedModDirectory: Path, workspaceDirectory: Path
+    ):
+        self.jobIndex = jobIndex
+        self.sharedModDirectory = sharedModDirectory
+        self.rootDirectory = workspaceDirectory / f"job-{jobIndex}"
+        self.modDirectory = self.rootDirectory / "mods"
+        self.writeDataDirectory = self.rootDirectory / "write-data"
+        self.configPath = self.rootDirectory / "config" / "config.ini"
+
+    def create(self, testModFolderName: str = "factorio-unit-test") -> None:
+        if self.modDirectory.exists():
+            shutil.rmtree(self.modDirectory)
+        self.modDirectory.mkdir(parents=True)
+        self.writeDataDirectory.mkdir(parents=True, exist_ok=True)
+
+        for entry in self.sharedModDirectory.iterdir():
+            if entry.name in self.privateModFiles:
+                shutil.copy(entry, self.modDirectory / entry.name)
+            elif entry.name == testModFolderName:
+                self.__createTestMod(entry)
+            else:
+                linkPath(entry, self.modDirectory / entry.name)
+
+        self.__writeConfigFile()
+
+    def remove(self) -> None:
+        if self.rootDirectory.exists():
+            removePath(self.rootDirectory)
+
+    def __createTestMod(self, sharedTestModDirectory: Path) -> None:
+        # The test mod is a real folder so each job gets its own test options
+        testModDirectory = self.modDirectory / sharedTestModDirectory.name
+        testModDirectory.mkdir()
+        for entry in sharedTestModDirectory.iterdir():
+            if entry.name not in self.privateTestModFiles:
+                linkPath(entry, testModDirectory / entry.name)
+
+    def __writeConfigFile(self) -> None:
+        # https://wiki.factorio.com/Application_directory#Config_file
+        # A separate write-data directory gives each instance its own lock file.
+        self.configPath.parent.mkdir(parents=True, exist_ok=True)
+        with self.configPath.open("w") as configFile:
+            configFile.write("[path]\n")
+            configFile.write("read-data=__PATH__executable__/../../data\n")
+            configFile.write(f"write-data={self.writeDataDirectory.as_posix()}\n")
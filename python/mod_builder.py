@@ -1,14 +1,35 @@
 from typing import Optional
 import os, shutil, sys, getopt, re
 import json
+from pathlib import Path
+
+try:
+    from .mod_directory_index import ModDirectoryIndex
+    from .mod_sync import linkFolder, packageZip, syncFolder
+    from .path_links import removePath
+except ImportError:
+    from mod_directory_index import ModDirectoryIndex
+    from mod_sync import linkFolder, packageZip, syncFolder
+    from path_links import removePath
 
 
 class ModBuilder:
+    # copy: remove all versions and copy the mod again
+    # sync: only copy the files that changed since the last build
+    # link: link the mod folder (or its files) into the mod directory
+    # zip:  package the mod as a zip, only rewritten when a file changed
+    installModes = ("copy", "sync", "link", "zip")
+
     def __init__(
         self,
         factorioFolderDir: Optional[str] = None,
         factorioModDir: Optional[str] = None,
+        installMode: str = "copy",
     ):
+        if installMode not in self.installModes:
+            raise ValueError(f"Unknown install mode '{installMode}'.")
+        self.installMode = installMode
+
         self.modNames = [
             modName
             for modName in next(
@@ -23,6 +44,7 @@ class ModBuilder:
             self.modFolderDir = f"{os.getenv('APPDATA')}/Factorio/mods/"
         else:
             self.modFolderDir = f"{os.path.abspath(factorioFolderDir)}/mods/"
+        self.modIndex = ModDirectoryIndex(Path(self.modFolderDir))
 
     def __isReleased(self, modName: str) -> bool:
         if modName.find("angels") >= 0:
@@ -44,26 +66,21 @@ class ModBuilder:
             modData = json.load(modDataFile)
             return modData["version"]
 
-    def __deleteAllVersions(self, modName: str, deleteZip: bool = True) -> None:
-        # deleting folders
-        folders = [
-            folderName
-            for folderName in next(os.walk(self.modFolderDir))[1]
-            if re.fullmatch(modName + "(_.*)?", folderName) is not None
-        ]
-        for folder in folders:
-            print("    Removing '{0}/'".format(folder))
-            shutil.rmtree(self.modFolderDir + folder)
-
-        # deleting zip folders
-        folders = [
-            folderName
-            for folderName in os.listdir(self.modFolderDir)
-            if re.fullmatch(modName + "(_.*)?", folderName) is not None
-        ]
-        for folder in folders:
-            print("    Removing '{0}'".format(folder))
-            os.remove(self.modFolderDir + folder)
+    def __deleteAllVersions(
+        self, modName: str, deleteZip: bool = True, keepPath: Optional[Path] = None
+    ) -> None:
+        self.modIndex.refresh()
+        for modPath in self.modIndex.getModPaths(modName):
+            if modPath == keepPath:
+                continue
+            if modPath.is_dir():
+                # deleting folders
+                print("    Removing '{0}/'".format(modPath.name))
+                removePath(modPath)
+            elif deleteZip:
+                # deleting zip folders
+                print("    Removing '{0}'".format(modPath.name))
+                removePath(modPath)
 
     def __createNewVersion(self, modName: str) -> None:
         folder = "{0}_{1}/".format(modName, self.__getModVersion(modName))
@@ -73,10 +90,44 @@ class ModBuilder:
         dst_dir = self.modFolderDir + folder
         shutil.copytree(src_dir, dst_dir)
 
+    def __updateVersion(self, modName: str) -> None:
+        folder = "{0}_{1}".format(modName, self.__getModVersion(modName))
+        src_dir = Path(".") / modName
+        if self.installMode == "zip":
+            dst_path = Path(self.modFolderDir) / f"{folder}.zip"
+        else:
+            dst_path = Path(self.modFolderDir) / folder
+        self.__deleteAllVersions(modName, True, keepPath=dst_path)
+
+        if self.installMode == "sync":
+            written, removed = syncFolder(src_dir, dst_path)
+            print(
+                "    Syncing '{0}/' ({1} written, {2} removed)".format(
+                    folder, written, removed
+                )
+            )
+        elif self.installMode == "link":
+            changed = linkFolder(src_dir, dst_path)
+            print(
+                "    Linking '{0}/'{1}".format(
+                    folder, "" if changed else " (unchanged)"
+                )
+            )
+        else:
+            compressed, reused = packageZip(src_dir, dst_path, folder)
+            print(
+                "    Packaging '{0}.zip' ({1} compressed, {2} reused)".format(
+                    folder, compressed, reused
+                )
+            )
+
     def createMod(self, modName: str) -> None:
         print("Updating '{0}'".format(modName))
-        self.__deleteAllVersions(modName, True)
-        self.__createNewVersion(modName)
+        if self.installMode == "copy":
+            self.__deleteAllVersions(modName, True)
+            self.__createNewVersion(modName)
+        else:
+            self.__updateVersion(modName)
 
     def createAllMods(self) -> None:
         for modName in self.modNames:
@@ -85,9 +136,14 @@ class ModBuilder:
 
 if __name__ == "__main__":
     factorioFolderDir = None
-    opts, args = getopt.getopt(sys.argv[1:], ":m:", ["factoriodir="])
+    installMode = "copy"
+    opts, args = getopt.getopt(sys.argv[1:], ":m:", ["factoriodir=", "mode="])
     for opt, arg in opts:
         if opt in ("-m", "--factoriodir"):
             factorioFolderDir = os.path.realpath(arg.strip())
+        if opt == "--mode":
+            installMode = arg.strip()
 
-    ModBuilder(factorioFolderDir=factorioFolderDir).createAllMods()
+    ModBuilder(
+        factorioFolderDir=factorioFolderDir, installMode=installMode
+    ).createAllMods()
@@ -0,0 +1,169 @@
+from __future__ import annotations
+from typing import Optional
+import os, re
+import json
+import zipfile
+from pathlib import Path
+
+
+class ModEntry:
+    """A mod folder or zip in the mod directory."""
+
+    path: Path
+    name: str
+    version: Optional[str]
+    info: Optional[dict]
+
+    def __init__(
+        self, path: Path, name: str, version: Optional[str], info: Optional[dict]
+    ):
+        self.path = path
+        self.name = name
+        self.version = version
+        self.info = info
+
+
+class ModDirectoryIndex:
+    """An on-disk index of the mods in a mod directory, refreshed incrementally.
+
+    Entries are only re-read when the modification time of their info.json
+    (folders) or of the zip itself changed. The listing of the mod directory is
+    only repeated when the directory's own modification time changed.
+    """
+
+    entryPattern = re.compile(r"(.+?)(?:_(\d+\.\d+\.\d+))?(\.zip)?")
+
+    modDirectory: Path
+    indexFilePath: Path
+    directoryMtime: Optional[int]
+    entries: dict[str, dict]  # directory entry name -> cached entry data
+    mods: dict[str, list[ModEntry]]
+
+    def __init__(self, modDirectory: Path, indexFilePath: Optional[Path] = None):
+        self.modDirectory = modDirectory
+        self.indexFilePath = (
+            indexFilePath
+            if indexFilePath is not None
+            else modDirectory.parent / "factorio-unit-test-cache" / "mod-index.json"
+        )
+        self.directoryMtime = None
+        self.entries = dict()
+        self.mods = dict()
+        self.readIndexFile()
+
+    def readIndexFile(self) -> None:
+        if not self.indexFilePath.exists():
+            return
+        try:
+            with self.indexFilePath.open("r", encoding="utf-8") as indexFile:
+                indexData = json.load(indexFile)
+        except (OSError, ValueError):
+            return  # a corrupt index is simply rebuilt
+        if indexData.get("modDirectory") == str(self.modDirectory):
+            self.directoryMtime = indexData.get("directoryMtime")
+            self.entries = indexData.get("entries", {})
+
+    def writeIndexFile(self) -> None:
+        self.indexFilePath.parent.mkdir(parents=True, exist_ok=True)
+        with self.indexFilePath.open("w", encoding="utf-8") as indexFile:
+            json.dump(
+                {
+                    "modDirectory": str(self.modDirectory),
+                    "directoryMtime": self.directoryMtime,
+                    "entries": self.entries,
+                },
+                indexFile,
+            )
+
+    def refresh(self) -> None:
+        changed = False
+        directoryMtime = self.modDirectory.stat().st_mtime_ns
+        if directoryMtime != self.directoryMtime:
+            entryNames = set(os.listdir(self.modDirectory))
+            for removedEntry in self.entries.keys() - entryNames:
+                del self.entries[removedEntry]
+            for addedEntry in entryNames - self.entries.keys():
+                self.entries[addedEntry] = {"mtime": None}
+            self.directoryMtime = directoryMtime
+            changed = True
+
+        for entryName, entryData in list(self.entries.items()):
+            entryPath = self.modDirectory / entryName
+            entryMtime = self.__getEntryMtime(entryPath)
+            if entryMtime == entryData["mtime"]:
+                continue
+            self.entries[entryName] = self.__readEntry(entryPath, entryMtime)
+            changed = True
+
+        self.mods = dict()
+        for entryName, entryData in sorted(self.entries.items()):
+            if entryData.get("name") is not None:
+                self.mods.setdefault(entryData["name"], []).append(
+                    ModEntry(
+                        self.modDirectory / entryName,
+                        entryData["name"],
+                        entryData.get("version"),
+                        entryData.get("info"),
+                    )
+                )
+        if changed:
+            self.writeIndexFile()
+
+    def getModNames(self) -> list[str]:
+        return list(self.mods.keys())
+
+    def getModEntries(self, modName: str) -> list[ModEntry]:
+        return self.mods.get(modName, [])
+
+    def getModPaths(self, modName: str) -> list[Path]:
+        return [modEntry.path for modEntry in self.getModEntries(modName)]
+
+    def getModFolder(self, modName: str) -> Optional[Path]:
+        for modEntry in self.getModEntries(modName):
+            if modEntry.path.is_dir():
+                return modEntry.path
+        return None
+
+    def __getEntryMtime(self, entryPath: Path) -> Optional[int]:
+        # A folder's own mtime doesn't change when its info.json is edited
+        try:
+            if entryPath.is_dir():
+                return (entryPath / "info.json").stat().st_mtime_ns
+            return entryPath.stat().st_mtime_ns
+        except OSError:
+            return -1  # no info.json, not a mod (yet)
+
+    def __readEntry(self, entryPath: Path, entryMtime: Optional[int]) -> dict:
+        info = self.__readInfoJson(entryPath)
+        if info is not None and "name" in info:
+            return {
+                "mtime": entryMtime,
+                "name": info["name"],
+                "version": info.get("version"),
+                "info": info,
+            }
+        # Folders without info.json (yet) and other files are matched by their name
+        entryMatch = self.entryPattern.fullmatch(entryPath.name)
+        isMod = entryPath.is_dir() or entryPath.suffix == ".zip"
+        return {
+            "mtime": entryMtime,
+            "name": entryMatch.group(1) if entryMatch and isMod else None,
+            "version": entryMatch.group(2) if entryMatch and isMod else None,
+            "info": None,
+        }
+
+    def __readInfoJson(self, path: Path) -> Optional[dict]:
+        try:
+            if path.is_dir():
+                infoPath = path / "info.json"
+                if infoPath.is_file():
+                    with infoPath.open("r", encoding="utf-8") as infoFile:
+                        return json.load(infoFile)
+            elif path.suffix == ".zip":
+                with zipfile.ZipFile(path) as modZip:
+                    for entryName in modZip.namelist():
+                        if re.fullmatch(r"[^/]+/info\.json", entryName):
+                            return json.loads(modZip.read(entryName).decode("utf-8"))
+        except (OSError, ValueError, zipfile.BadZipFile):
+            pass  # not a (valid) mod
+        return None
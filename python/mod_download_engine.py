@@ -0,0 +1,173 @@
+from __future__ import annotations
+from typing import Iterable, Optional
+import os
+import hashlib
+import http.client
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+try:
+    from .path_links import linkPath, removePath
+except ImportError:
+    from path_links import linkPath, removePath
+
+
+class ModDownload:
+    """A single mod release to download and where to install it."""
+
+    name: str
+    fileName: str
+    url: str
+    sha1: Optional[str]
+    destination: Path
+
+    def __init__(
+        self, name: str, fileName: str, url: str, sha1: Optional[str], destination: Path
+    ):
+        self.name = name
+        self.fileName = fileName
+        self.url = url
+        self.sha1 = sha1.lower() if sha1 else None
+        self.destination = destination
+
+
+class ModDownloadEngine:
+    """Downloads mod releases concurrently into a content-addressed cache.
+
+    Releases are streamed in chunks to a partial file next to their cache entry,
+    which is resumed with a Range request when a download got interrupted. Only
+    files matching the sha1 of the mod portal make it into the cache, so
+    installing a release that was downloaded before is a link or copy.
+    """
+
+    chunkSize = 1 << 16
+    userAgent = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_4) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/83.0.4103.97 Safari/537.36"
+
+    cacheDirectory: Path
+    jobs: int
+    retries: int
+    timeout: float
+    offline: bool
+
+    def __init__(
+        self,
+        cacheDirectory: Path,
+        jobs: int = 4,
+        retries: int = 3,
+        timeout: float = 60,
+        offline: bool = False,
+    ):
+        self.cacheDirectory = cacheDirectory
+        self.jobs = max(1, jobs)
+        self.retries = retries
+        self.timeout = timeout
+        self.offline = offline
+
+    def getCachePath(self, sha1: str) -> Path:
+        return self.cacheDirectory / sha1[:2] / f"{sha1}.zip"
+
+    def isCached(self, download: ModDownload) -> bool:
+        return download.sha1 is not None and self.getCachePath(download.sha1).is_file()
+
+    def fetch(self, download: ModDownload) -> Path:
+        # Returns the cache entry of the release, downloading it when needed
+        if self.isCached(download):
+            return self.getCachePath(download.sha1)
+        if self.offline:
+            raise FileNotFoundError(
+                f"'{download.fileName}' is not in the download cache."
+            )
+
+        partKey = (
+            download.sha1 or hashlib.sha1(download.url.encode("utf-8")).hexdigest()
+        )
+        partPath = self.cacheDirectory / partKey[:2] / f"{partKey}.zip.part"
+        partPath.parent.mkdir(parents=True, exist_ok=True)
+
+        for attempt in range(self.retries + 1):
+            try:
+                sha1 = self.__downloadPart(download, partPath)
+                break
+            except (urllib.error.URLError, http.client.HTTPException, OSError) as error:
+                if isinstance(error, urllib.error.HTTPError) and error.code < 500:
+                    raise  # retrying won't change the answer
+                if attempt == self.retries:
+                    raise
+        if download.sha1 is not None and sha1 != download.sha1:
+            partPath.unlink()
+            raise ValueError(
+                f"Checksum mismatch for '{download.fileName}', expected {download.sha1} but got {sha1}."
+            )
+
+        cachePath = self.getCachePath(sha1)
+        cachePath.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(partPath, cachePath)
+        return cachePath
+
+    def install(self, download: ModDownload) -> None:
+        cachePath = self.fetch(download)
+        if download.destination.exists() or download.destination.is_symlink():
+            removePath(download.destination)
+        linkPath(cachePath, download.destination)
+
+    def fetchAll(self, downloads: Iterable[ModDownload]) -> dict[str, Optional[str]]:
+        # Fetches all releases concurrently, returns an error message (or None) per mod
+        downloads = list(downloads)
+
+        def fetch(download: ModDownload) -> Optional[str]:
+            try:
+                self.fetch(download)
+            except (
+                urllib.error.URLError,
+                http.client.HTTPException,
+                OSError,
+                ValueError,
+            ) as error:
+                return f"Could not download '{download.fileName}': {error}"
+            return None
+
+        with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            errors = list(executor.map(fetch, downloads))
+        return {download.name: error for download, error in zip(downloads, errors)}
+
+    def __downloadPart(self, download: ModDownload, partPath: Path) -> str:
+        # Continues the partial file where it stopped, returns the sha1 of the complete file
+        offset = partPath.stat().st_size if partPath.exists() else 0
+        headers = {"User-Agent": self.userAgent}
+        if offset > 0:
+            headers["Range"] = f"bytes={offset}-"
+        request = urllib.request.Request(download.url, headers=headers)
+
+        try:
+            response = urllib.request.urlopen(request, timeout=self.timeout)
+        except urllib.error.HTTPError as error:
+            if error.code != 416 or offset == 0:
+                raise
+            # The partial file is already complete
+            return self.__hashFile(partPath)
+
+        with response:
+            if offset > 0 and response.status != 206:
+                offset = 0  # the server ignored the range, start over
+            checksum = hashlib.sha1()
+            if offset > 0:
+                with partPath.open("rb") as partFile:
+                    while chunk := partFile.read(self.chunkSize):
+                        checksum.update(chunk)
+            with partPath.open("ab" if offset > 0 else "wb") as partFile:
+                while chunk := response.read(self.chunkSize):
+                    partFile.write(chunk)
+                    checksum.update(chunk)
+            if response.length:
+                # The connection dropped, keep the partial file to resume from
+                raise http.client.IncompleteRead(b"", response.length)
+        return checksum.hexdigest()
+
+    def __hashFile(self, path: Path) -> str:
+        checksum = hashlib.sha1()
+        with path.open("rb") as file:
+            while chunk := file.read(self.chunkSize):
+                checksum.update(chunk)
+        return checksum.hexdigest()
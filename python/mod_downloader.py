@@ -1,22 +1,55 @@
-from typing import Optional
+from typing import Iterable, Optional
 import os, shutil, sys, getopt
-import urllib.request
 import json
+from pathlib import Path
+
+try:
+    from .mod_directory_index import ModDirectoryIndex
+    from .mod_download_engine import ModDownload, ModDownloadEngine
+    from .mod_portal_cache import ModPortalCache
+    from .mod_version import ModVersion, parseVersion
+    from .path_links import removePath
+except ImportError:
+    from mod_directory_index import ModDirectoryIndex
+    from mod_download_engine import ModDownload, ModDownloadEngine
+    from mod_portal_cache import ModPortalCache
+    from mod_version import ModVersion, parseVersion
+    from path_links import removePath
 
 
 class ModDownloader:
-    def __init__(self, modName: str, factorioFolderDir: Optional[str] = None):
-        if factorioFolderDir is None:
-            self.factorioFolderDir = (
-                f"{os.path.abspath(os.getenv('APPDATA'))}/Factorio/"
-            )
-        else:
-            self.factorioFolderDir = f"{os.path.abspath(factorioFolderDir)}/"
+    portalUrl = "http://mods.factorio.com"
+
+    def __init__(
+        self,
+        modName: str,
+        factorioFolderDir: Optional[str] = None,
+        portalUrl: Optional[str] = None,
+        downloadEngine: Optional[ModDownloadEngine] = None,
+        portalCache: Optional[ModPortalCache] = None,
+    ):
+        self.factorioFolderDir = getFactorioFolderDir(factorioFolderDir)
+        if portalUrl is not None:
+            self.portalUrl = portalUrl.rstrip("/")
 
         self.modFolderDir = f"{self.factorioFolderDir}/mods/"
+        self.modIndex = ModDirectoryIndex(Path(self.modFolderDir))
+        self.downloadEngine = (
+            downloadEngine
+            if downloadEngine is not None
+            else ModDownloadEngine(getDownloadCacheDirectory(self.factorioFolderDir))
+        )
+        self.portalCache = (
+            portalCache
+            if portalCache is not None
+            else ModPortalCache(
+                getPortalCacheDirectory(self.factorioFolderDir), self.portalUrl
+            )
+        )
 
         self.modData = self.__getModAPI(modName)
         self.userData = self.__getUserData()
+        self.__indexReleases()
 
     def __str__(self) -> str:
         return json.dumps(self.modData, indent=4, sort_keys=True)
@@ -25,73 +58,59 @@ class ModDownloader:
         return self.modData["releases"]
 
     def getLatestModVersion(self, factorioVersion: Optional[str] = None) -> list:
-        fixedFactorioVersion = False if factorioVersion is None else True
-
-        modReleases = self.getReleases()
-
-        latestReleaseFactorioVersion = factorioVersion
-        latestReleaseModVersion = None
+        if factorioVersion is None:
+            if not self.latestReleases:
+                return [None, None]
+            factorioVersion = max(self.latestReleases)
+        else:
+            factorioVersion = parseVersion(factorioVersion)
 
-        for release in modReleases:
-            # compare factorio release version
-            releaseFactorioVersion = release["info_json"]["factorio_version"]
-            if not self.__compareVersion(
-                latestReleaseFactorioVersion, releaseFactorioVersion
-            ):
-                continue  # release is for an older version of factorio
-            if fixedFactorioVersion:
-                if not self.__compareVersion(releaseFactorioVersion, factorioVersion):
-                    continue  # release is for a newer version of factorio
-            else:
-                if not self.__compareVersion(
-                    releaseFactorioVersion, latestReleaseFactorioVersion
-                ):
-                    # newer factorioVersion detected
-                    latestReleaseFactorioVersion = releaseFactorioVersion
-                    latestReleaseModVersion = release["version"]
-                    continue  # no need to compare further
-
-            # compare mod release version
-            releaseModVersion = release["version"]
-            if not self.__compareVersion(latestReleaseModVersion, releaseModVersion):
-                continue  # release is for an older version of the mod
-            if self.__compareVersion(releaseModVersion, latestReleaseModVersion):
-                continue  # release is for the same version of the mod
-            latestReleaseModVersion = releaseModVersion
-
-        if latestReleaseModVersion is None:
-            latestReleaseFactorioVersion = None
-        return [latestReleaseFactorioVersion, latestReleaseModVersion]
+        latestRelease = self.latestReleases.get(factorioVersion)
+        if latestRelease is None:
+            return [None, None]
+        return [
+            latestRelease["info_json"]["factorio_version"],
+            latestRelease["version"],
+        ]
 
-    def downloadModVersion(
+    def getModDownload(
         self, factorioVersion: Optional[str] = None, modVersion: Optional[str] = None
-    ) -> None:
-        print("Updating '{0}'".format(self.modData["name"]))
-
-        # delete any local versions
-        self.__deleteAllVersions(self.modData["name"])
-
-        # download the most suitable release
+    ) -> ModDownload:
+        # find the most suitable release
         if factorioVersion is None:
             modVersion = None
         if modVersion is None:
             factorioVersion, modVersion = self.getLatestModVersion(factorioVersion)
         modRelease = self.__getReleaseInfo(factorioVersion, modVersion)
-        print("  Creating '{0}'".format(modRelease["file_name"]))
-        modDownloadUrl = "http://mods.factorio.com{0}?username={1}&token={2}".format(
-            modRelease["download_url"], self.userData[0], self.userData[1]
+        modDownloadUrl = "{0}{1}?username={2}&token={3}".format(
+            self.portalUrl,
+            modRelease["download_url"],
+            self.userData[0],
+            self.userData[1],
         )
-        modDownloadRequest = urllib.request.Request(
+        return ModDownload(
+            self.modData["name"],
+            modRelease["file_name"],
             modDownloadUrl,
-            headers={
-                "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_4) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/83.0.4103.97 Safari/537.36"
-            },
+            modRelease.get("sha1"),
+            Path(self.modFolderDir) / modRelease["file_name"],
         )
-        with urllib.request.urlopen(modDownloadRequest) as downloadFile:
-            with open(
-                "{0}{1}".format(self.modFolderDir, modRelease["file_name"]), "wb+"
-            ) as zipFile:
-                zipFile.write(downloadFile.read())
+
+    def downloadModVersion(
+        self, factorioVersion: Optional[str] = None, modVersion: Optional[str] = None
+    ) -> None:
+        print("Updating '{0}'".format(self.modData["name"]))
+        self.installModDownload(self.getModDownload(factorioVersion, modVersion))
+
+    def installModDownload(self, modDownload: ModDownload) -> None:
+        # fetch first, so a failed download keeps the local versions
+        self.downloadEngine.fetch(modDownload)
+
+        # delete any local versions
+        self.__deleteAllVersions(self.modData["name"])
+
+        print("  Creating '{0}'".format(modDownload.fileName))
+        self.downloadEngine.install(modDownload)
 
     def download(self) -> None:
         return self.downloadModVersion()
@@ -104,82 +123,120 @@ class ModDownloader:
         raise NotImplementedError  # TODO: implement manual authentification https://wiki.factorio.com/Web_authentication_API
 
     def __getModAPI(self, modName: str) -> dict:
-        apiQuerry = urllib.request.Request(
-            "http://mods.factorio.com/api/mods/{0}".format(modName)
-        )
-        try:
-            apiRequest = urllib.request.urlopen(apiQuerry).read()
-            apiContent = json.loads(apiRequest.decode("utf-8"))
-            apiMessage = apiContent["message"]
-        except urllib.request.HTTPError:
-            raise NameError(f"Could not find a mod named '{modName}'.")
-        except KeyError:
-            apiMessage = None
-        if apiMessage == "Mod not found":
-            raise NameError("Could not find a mod named '{modName}'.")
-        return apiContent
-
-    def __compareVersion(self, version1, version2):
-        """Returns true if version 2 >= version 1"""
-        # test version validity
-        if version1 is None:
-            return True
-        if version2 is None:
-            return False
-
-        # prematurely test equality
-        if version1 == version2:
-            return True
-
-        # compare versions graduately
-        version1 = version1.split(".")
-        version2 = version2.split(".")
-        for version in range(0, len(version1)):
-            if version2[version] < version1[version]:
-                return False
-            if version2[version] > version1[version]:
-                return True
+        return self.portalCache.getMod(modName)
 
-    def __getReleaseInfo(self, factorioVersion: str, modVersion: str) -> dict:
-        modReleases = self.getReleases()
-        for release in modReleases:
-            if (
-                factorioVersion == release["info_json"]["factorio_version"]
-                and modVersion == release["version"]
+    def __indexReleases(self) -> None:
+        # index the releases by (factorio version, mod version) and keep the latest release per factorio version
+        self.releaseIndex: dict[tuple[ModVersion, ModVersion], dict] = {}
+        self.latestReleases: dict[ModVersion, dict] = {}
+        for release in self.getReleases():
+            factorioVersion = parseVersion(release["info_json"]["factorio_version"])
+            modVersion = parseVersion(release["version"])
+            self.releaseIndex[(factorioVersion, modVersion)] = release
+            latestRelease = self.latestReleases.get(factorioVersion)
+            if latestRelease is None or modVersion > parseVersion(
+                latestRelease["version"]
             ):
-                return release
-        raise NameError(
-            f"Could not find a mod release for factorio version '{factorioVersion}' and mod version '{modVersion}'."
-        )
+                self.latestReleases[factorioVersion] = release
+
+    def __getReleaseInfo(self, factorioVersion: str, modVersion: str) -> dict:
+        release = None
+        if factorioVersion is not None and modVersion is not None:
+            release = self.releaseIndex.get(
+                (parseVersion(factorioVersion), parseVersion(modVersion))
+            )
+        if release is None:
+            raise NameError(
+                f"Could not find a mod release for factorio version '{factorioVersion}' and mod version '{modVersion}'."
+            )
+        return release
 
     def __deleteAllVersions(self, modName: str, deleteZip: bool = True) -> None:
-        # deleting folders
-        folders = [
-            folderName
-            for folderName in next(os.walk(self.modFolderDir))[1]
-            if folderName.find(modName) >= 0
-        ]
-        for folder in folders:
-            print("  Removing '{0}/'".format(folder))
-            shutil.rmtree(self.modFolderDir + folder)
-
-        # deleting zip folders
-        folders = [
-            folderName
-            for folderName in os.listdir(self.modFolderDir)
-            if deleteZip and folderName.find(modName) >= 0
-        ]
-        for folder in folders:
-            print("  Removing '{0}'".format(folder))
-            os.remove(self.modFolderDir + folder)
+        self.modIndex.refresh()
+        for modPath in self.modIndex.getModPaths(modName):
+            if modPath.is_dir():
+                # deleting folders
+                print("  Removing '{0}/'".format(modPath.name))
+                removePath(modPath)
+            elif deleteZip:
+                # deleting zip folders
+                print("  Removing '{0}'".format(modPath.name))
+                removePath(modPath)
+
+
+def getFactorioFolderDir(factorioFolderDir: Optional[str] = None) -> str:
+    if factorioFolderDir is None:
+        return f"{os.path.abspath(os.getenv('APPDATA'))}/Factorio/"
+    return f"{os.path.abspath(factorioFolderDir)}/"
+
+
+def getPortalCacheDirectory(factorioFolderDir: str) -> Path:
+    return Path(factorioFolderDir) / "factorio-unit-test-cache"
+
+
+def getDownloadCacheDirectory(factorioFolderDir: str) -> Path:
+    return getPortalCacheDirectory(factorioFolderDir) / "downloads"
+
+
+def downloadMods(
+    modNames: Iterable[str],
+    factorioFolderDir: Optional[str] = None,
+    jobs: int = 4,
+    portalUrl: Optional[str] = None,
+    offline: bool = False,
+) -> dict[str, Optional[str]]:
+    """Downloads the latest release of several mods concurrently.
+
+    The mod portal is queried for all mods in one pass. When offline, both the
+    mod data and the releases are only taken from the caches.
+    Returns an error message, or None when the mod was installed, for each mod.
+    """
+    factorioFolderDir = getFactorioFolderDir(factorioFolderDir)
+    downloadEngine = ModDownloadEngine(
+        getDownloadCacheDirectory(factorioFolderDir), jobs, offline=offline
+    )
+    portalCache = ModPortalCache(
+        getPortalCacheDirectory(factorioFolderDir),
+        portalUrl or ModDownloader.portalUrl,
+        offline=offline,
+        jobs=jobs,
+    )
+    modNames = list(modNames)
+    portalCache.getMods(modNames)
+
+    downloaders: list[ModDownloader] = []
+    modDownloads: list[ModDownload] = []
+    errors: dict[str, Optional[str]] = {}
+    for modName in modNames:
+        try:
+            downloader = ModDownloader(
+                modName, factorioFolderDir, portalUrl, downloadEngine, portalCache
+            )
+            modDownloads.append(downloader.getModDownload())
+        except (NameError, OSError) as error:
+            errors[modName] = str(error)
+            continue
+        downloaders.append(downloader)
+
+    errors.update(downloadEngine.fetchAll(modDownloads))
+
+    # installing touches the shared mod directory, so it happens one mod at a time
+    for downloader, modDownload in zip(downloaders, modDownloads):
+        if errors[modDownload.name] is None:
+            print("Updating '{0}'".format(modDownload.name))
+            downloader.installModDownload(modDownload)
+    return errors
 
 
 if __name__ == "__main__":
     factorioFolderDir = None
-    opts, args = getopt.getopt(sys.argv[1:], ":m:", ["factoriodir="])
+    offline = False
+    opts, args = getopt.getopt(sys.argv[1:], ":m:", ["factoriodir=", "offline"])
     for opt, arg in opts:
         if opt in ("-m", "--factoriodir"):
             factorioFolderDir = os.path.realpath(arg.strip())
+        if opt == "--offline":
+            offline = True
 
     bobmods = {
         "bobassembly": True,
@@ -201,6 +258,11 @@ if __name__ == "__main__":
         "bobvehicleequipment": True,
         "bobwarfare": True,
     }
-    for name, download in bobmods.items():
-        if download:
-            ModDownloader(name, factorioFolderDir).download()
+    errors = downloadMods(
+        [name for name, download in bobmods.items() if download],
+        factorioFolderDir,
+        offline=offline,
+    )
+    for name, error in errors.items():
+        if error is not None:
+            print(error)
@@ -0,0 +1,200 @@
+from __future__ import annotations
+from typing import Iterable, Optional, Union
+import json
+import time
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+
+class ModPortalCache:
+    """Keeps the mod portal API responses on disk and revalidates them only once they are stale.
+
+    Stale mods are first checked together with a single list request, mods
+    whose latest release is unchanged are simply renewed. The remaining mods are
+    revalidated with conditional requests (ETag / Last-Modified). In offline
+    mode, only the cached responses are served.
+    """
+
+    namelistSize = 50  # names per list request, keeps the query string short
+
+    portalUrl: str
+    cacheFilePath: Path
+    maxAge: float
+    offline: bool
+    jobs: int
+    entries: dict[str, dict]
+    lock: threading.Lock
+
+    def __init__(
+        self,
+        cacheDirectory: Path,
+        portalUrl: str = "http://mods.factorio.com",
+        maxAgeSeconds: float = 60 * 60,
+        offline: bool = False,
+        jobs: int = 4,
+    ):
+        self.portalUrl = portalUrl.rstrip("/")
+        self.cacheFilePath = cacheDirectory / "mod-portal-cache.json"
+        self.maxAge = maxAgeSeconds
+        self.offline = offline
+        self.jobs = max(1, jobs)
+        self.entries = {}
+        self.lock = threading.Lock()
+        self.readCacheFile()
+
+    def readCacheFile(self) -> None:
+        if not self.cacheFilePath.exists():
+            return
+        try:
+            with self.cacheFilePath.open("r", encoding="utf-8") as cacheFile:
+                cacheData = json.load(cacheFile)
+        except (OSError, ValueError):
+            return  # a corrupt cache is simply rebuilt
+        if cacheData.get("portalUrl") == self.portalUrl:
+            self.entries = cacheData.get("entries", {})
+
+    def writeCacheFile(self) -> None:
+        with self.lock:
+            self.cacheFilePath.parent.mkdir(parents=True, exist_ok=True)
+            with self.cacheFilePath.open("w", encoding="utf-8") as cacheFile:
+                json.dump(
+                    {"portalUrl": self.portalUrl, "entries": self.entries}, cacheFile
+                )
+
+    def getMod(self, modName: str) -> dict:
+        modData = self.getMods([modName])[modName]
+        if isinstance(modData, str):
+            raise NameError(modData)
+        return modData
+
+    def getMods(self, modNames: Iterable[str]) -> dict[str, Union[dict, str]]:
+        # Returns the API data, or an error message, for each mod
+        modNames = list(dict.fromkeys(modNames))
+        staleNames = [modName for modName in modNames if not self.__isFresh(modName)]
+
+        if staleNames and not self.offline:
+            staleNames = self.__renewUnchanged(staleNames)
+            with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+                list(executor.map(self.__revalidate, staleNames))
+            self.writeCacheFile()
+
+        results: dict[str, Union[dict, str]] = {}
+        for modName in modNames:
+            with self.lock:
+                entry = self.entries.get(modName)
+            if entry is None:
+                results[modName] = (
+                    f"Could not find a mod named '{modName}' in the offline cache."
+                    if self.offline
+                    else f"Could not find a mod named '{modName}'."
+                )
+            elif entry.get("error"):
+                results[modName] = entry["error"]
+            else:
+                results[modName] = entry["data"]
+        return results
+
+    def __isFresh(self, modName: str) -> bool:
+        with self.lock:
+            entry = self.entries.get(modName)
+        return entry is not None and time.time() - entry["time"] <= self.maxAge
+
+    def __renewUnchanged(self, modNames: list[str]) -> list[str]:
+        # Renews cached mods whose latest release didn't change, returns the mods still to revalidate
+        with self.lock:
+            cachedNames = [
+                modName
+                for modName in modNames
+                if self.entries.get(modName, {}).get("data") is not None
+            ]
+        latestReleases: dict[str, Optional[str]] = {}
+        for start in range(0, len(cachedNames), self.namelistSize):
+            query = urllib.parse.urlencode(
+                {
+                    "namelist": ",".join(
+                        cachedNames[start : start + self.namelistSize]
+                    ),
+                    "page_size": "max",
+                }
+            )
+            try:
+                with urllib.request.urlopen(
+                    f"{self.portalUrl}/api/mods?{query}"
+                ) as response:
+                    listData = json.loads(response.read().decode("utf-8"))
+            except (urllib.error.URLError, ValueError):
+                return modNames  # revalidate them one by one instead
+            for result in listData.get("results", []):
+                latestRelease = result.get("latest_release") or {}
+                latestReleases[result.get("name")] = latestRelease.get("version")
+
+        now = time.time()
+        remainingNames = []
+        with self.lock:
+            for modName in modNames:
+                entry = self.entries.get(modName)
+                modData = (entry or {}).get("data") or {}
+                releases = modData.get("releases") or [{}]
+                # Missing from the answer (False) never matches a cached version (or None)
+                if latestReleases.get(modName, False) == releases[-1].get("version"):
+                    entry["time"] = now
+                else:
+                    remainingNames.append(modName)
+        return remainingNames
+
+    def __revalidate(self, modName: str) -> None:
+        with self.lock:
+            entry = self.entries.get(modName)
+        headers = {}
+        if entry is not None and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry is not None and entry.get("lastModified"):
+            headers["If-Modified-Since"] = entry["lastModified"]
+
+        url = f"{self.portalUrl}/api/mods/{urllib.parse.quote(modName)}"
+        try:
+            request = urllib.request.Request(url, headers=headers)
+            with urllib.request.urlopen(request) as response:
+                modData = json.loads(response.read().decode("utf-8"))
+                newEntry = {
+                    "data": modData,
+                    "etag": response.headers.get("ETag"),
+                    "lastModified": response.headers.get("Last-Modified"),
+                    "time": time.time(),
+                }
+            if modData.get("message") == "Mod not found":
+                newEntry = self.__notFound(modName)
+        except urllib.error.HTTPError as error:
+            if error.code == 304 and entry is not None:
+                newEntry = dict(entry, time=time.time())
+            elif error.code == 404:
+                newEntry = self.__notFound(modName)
+            elif entry is not None:
+                return  # keep serving the stale data
+            else:
+                newEntry = self.__failed(modName, error)
+        except (urllib.error.URLError, ValueError) as error:
+            if entry is not None:
+                return  # keep serving the stale data
+            newEntry = self.__failed(modName, error)
+        with self.lock:
+            self.entries[modName] = newEntry
+
+    def __notFound(self, modName: str) -> dict:
+        return {
+            "data": None,
+            "error": f"Could not find a mod named '{modName}'.",
+            "time": time.time(),
+        }
+
+    def __failed(self, modName: str, error: Exception) -> dict:
+        # Failures aren't cached for the full age, the next run retries them
+        return {
+            "data": None,
+            "error": f"Could not look up mod '{modName}': {error}",
+            "time": 0,
+        }
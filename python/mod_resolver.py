@@ -0,0 +1,161 @@
+from __future__ import annotations
+from typing import Iterable, Optional
+import re
+from pathlib import Path
+
+from .mod_directory_index import ModDirectoryIndex
+from .mod_version import parseVersion
+
+
+class ModDependency:
+    # https://wiki.factorio.com/Tutorial:Mod_structure#dependencies
+    dependencyPattern = re.compile(
+        r"\s*(?P<prefix>\(\?\)|[!?~])?\s*(?P<name>[^<>=]+?)"
+        r"\s*(?:(?P<operator><=|>=|<|>|=)\s*(?P<version>[0-9.]+))?\s*"
+    )
+
+    name: str
+    kind: str  # "required", "optional" or "incompatible"
+    operator: Optional[str]
+    version: Optional[str]
+
+    def __init__(self, dependency: str):
+        dependencyMatch = self.dependencyPattern.fullmatch(dependency)
+        if dependencyMatch is None:
+            raise ValueError(f"Invalid dependency '{dependency}'.")
+        prefix = dependencyMatch.group("prefix")
+        self.name = dependencyMatch.group("name")
+        self.kind = (
+            "incompatible"
+            if prefix == "!"
+            else "optional" if prefix in ("?", "(?)") else "required"
+        )
+        self.operator = dependencyMatch.group("operator")
+        self.version = dependencyMatch.group("version")
+        if self.version is not None:
+            parseVersion(self.version)  # rejects versions like 1..2 right away
+
+    def __str__(self) -> str:
+        constraint = f" {self.operator} {self.version}" if self.operator else ""
+        return f"{self.name}{constraint}"
+
+    def isSatisfiedBy(self, version: Optional[str]) -> bool:
+        if self.operator is None or version is None:
+            return True
+        available, wanted = parseVersion(version), parseVersion(self.version)
+        return {
+            "<": available < wanted,
+            "<=": available <= wanted,
+            "=": available == wanted,
+            ">=": available >= wanted,
+            ">": available > wanted,
+        }[self.operator]
+
+
+class ModInfo:
+    name: str
+    version: str
+    dependencies: list[ModDependency]
+    path: Optional[Path]
+
+    def __init__(self, infoJson: dict, path: Optional[Path] = None):
+        self.name = infoJson["name"]
+        self.version = infoJson.get("version", "0.0.0")
+        parseVersion(self.version)  # rejects invalid versions right away
+        self.path = path
+        # Mods without dependencies implicitly depend on base
+        self.dependencies = [
+            ModDependency(dependency)
+            for dependency in infoJson.get("dependencies", ["base"])
+        ]
+
+
+class ModResolver:
+    """Checks mod lists against the info.json files of the installed mods before the game is launched.
+
+    Required dependencies are added to the resolved mod list, missing or
+    incompatible mods and unsatisfied version constraints are reported.
+    """
+
+    # Mods shipped with the game, these live in the data directory
+    builtinMods = ("base", "core", "elevated-rails", "quality", "space-age")
+
+    modIndex: ModDirectoryIndex
+    mods: dict[str, list[ModInfo]]
+    invalidMods: dict[str, list[str]]  # errors of mods with an unusable info.json
+
+    def __init__(self, modIndex: ModDirectoryIndex):
+        self.modIndex = modIndex
+        self.mods = dict()
+        self.invalidMods = dict()
+
+    def scanModDirectory(self) -> None:
+        self.modIndex.refresh()
+        self.mods = dict()
+        self.invalidMods = dict()
+        for modName in self.modIndex.getModNames():
+            for modEntry in self.modIndex.getModEntries(modName):
+                if modEntry.info is None:
+                    continue
+                # A broken mod only fails the mod lists it is part of
+                try:
+                    self.addMod(ModInfo(modEntry.info, modEntry.path))
+                except ValueError as error:
+                    self.invalidMods.setdefault(modName, []).append(
+                        f"Mod {modName} ({modEntry.path.name}) has an invalid info.json: {error}"
+                    )
+        for modVersions in self.mods.values():
+            modVersions.sort(key=lambda modInfo: parseVersion(modInfo.version))
+
+    def addMod(self, modInfo: ModInfo) -> None:
+        self.mods.setdefault(modInfo.name, []).append(modInfo)
+
+    def getMod(self, modName: str) -> Optional[ModInfo]:
+        # The game loads the highest version when several are installed
+        modVersions = self.mods.get(modName)
+        return modVersions[-1] if modVersions else None
+
+    def resolve(self, modNames: Iterable[str]) -> tuple[list[str], list[str]]:
+        # Returns the mod list including required dependencies, and all errors found
+        errors: list[str] = []
+        resolvedMods: list[str] = []
+        enabledMods: set[str] = set()
+        pendingMods = list(modNames)
+        while pendingMods:
+            modName = pendingMods.pop(0)
+            if modName in enabledMods:
+                continue
+            resolvedMods.append(modName)
+            enabledMods.add(modName)
+            if modName in self.builtinMods and modName not in self.mods:
+                continue
+            errors.extend(self.invalidMods.get(modName, []))
+            modInfo = self.getMod(modName)
+            if modInfo is None:
+                if modName not in self.invalidMods:
+                    errors.append(f"Mod {modName} is not installed.")
+                continue
+            for dependency in modInfo.dependencies:
+                if dependency.kind == "required" and dependency.name not in enabledMods:
+                    pendingMods.append(dependency.name)
+
+        for modName in resolvedMods:
+            modInfo = self.getMod(modName)
+            if modInfo is None:
+                continue
+            for dependency in modInfo.dependencies:
+                if dependency.name not in enabledMods:
+                    continue
+                if dependency.kind == "incompatible":
+                    errors.append(
+                        f"Mod {modName} is incompatible with {dependency.name}."
+                    )
+                    continue
+                dependencyInfo = self.getMod(dependency.name)
+                dependencyVersion = dependencyInfo.version if dependencyInfo else None
+                if not dependency.isSatisfiedBy(dependencyVersion):
+                    errors.append(
+                        f"Mod {modName} requires {dependency}, "
+                        f"but version {dependencyVersion} is installed."
+                    )
+        return resolvedMods, errors
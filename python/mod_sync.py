@@ -0,0 +1,185 @@
+from __future__ import annotations
+from typing import Callable, Optional
+import os, shutil
+import hashlib
+import time
+import zipfile
+import zlib
+from pathlib import Path
+
+try:
+    from .path_links import removePath
+except ImportError:
+    from path_links import removePath
+
+
+ignoredNames = {"__pycache__", ".git", ".vscode"}
+
+
+def listFiles(folder: Path) -> dict[str, Path]:
+    # Maps the relative posix path of every file in the folder to its path
+    files: dict[str, Path] = {}
+    for root, dirNames, fileNames in os.walk(folder):
+        dirNames[:] = sorted(d for d in dirNames if d not in ignoredNames)
+        for fileName in sorted(fileNames):
+            filePath = Path(root) / fileName
+            files[filePath.relative_to(folder).as_posix()] = filePath
+    return files
+
+
+def hashFile(path: Path) -> str:
+    checksum = hashlib.sha1()
+    with path.open("rb") as file:
+        while chunk := file.read(1 << 20):
+            checksum.update(chunk)
+    return checksum.hexdigest()
+
+
+def crcFile(path: Path) -> int:
+    crc = 0
+    with path.open("rb") as file:
+        while chunk := file.read(1 << 20):
+            crc = zlib.crc32(chunk, crc)
+    return crc
+
+
+def isSameFile(source: Path, destination: Path) -> bool:
+    # Size and mtime first, the content is only hashed when the mtime differs
+    sourceStats, destinationStats = source.stat(), destination.stat()
+    if sourceStats.st_size != destinationStats.st_size:
+        return False
+    if sourceStats.st_mtime_ns == destinationStats.st_mtime_ns:
+        return True
+    if hashFile(source) != hashFile(destination):
+        return False
+    shutil.copystat(source, destination)  # skip the hash next time
+    return True
+
+
+def linkOrCopyFile(source: Path, destination: Path) -> None:
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copy2(source, destination)
+
+
+def syncFolder(
+    source: Path,
+    destination: Path,
+    copyFile: Callable[[Path, Path], None] = shutil.copy2,
+) -> tuple[int, int]:
+    """Makes the destination folder a copy of the source folder, touching only files that changed.
+
+    Returns the number of files written and removed.
+    """
+    return syncFiles(listFiles(source), destination, copyFile)
+
+
+def syncFiles(
+    sourceFiles: dict[str, Path],
+    destination: Path,
+    copyFile: Callable[[Path, Path], None] = shutil.copy2,
+) -> tuple[int, int]:
+    # Like syncFolder, for files gathered from anywhere by their relative destination path
+    if destination.is_symlink() or destination.is_file():
+        removePath(destination)
+    destination.mkdir(parents=True, exist_ok=True)
+    destinationFiles = listFiles(destination)
+
+    removed = 0
+    for relativePath in destinationFiles.keys() - sourceFiles.keys():
+        destinationFiles[relativePath].unlink()
+        removed += 1
+    for root, _, _ in os.walk(destination, topdown=False):
+        if Path(root) != destination and not any(Path(root).iterdir()):
+            Path(root).rmdir()
+
+    written = 0
+    for relativePath, sourcePath in sourceFiles.items():
+        destinationPath = destination / relativePath
+        if relativePath in destinationFiles:
+            if copyFile is linkOrCopyFile and os.path.samefile(
+                sourcePath, destinationPath
+            ):
+                continue
+            if copyFile is not linkOrCopyFile and isSameFile(
+                sourcePath, destinationPath
+            ):
+                continue
+            destinationPath.unlink()
+        destinationPath.parent.mkdir(parents=True, exist_ok=True)
+        copyFile(sourcePath, destinationPath)
+        written += 1
+    return written, removed
+
+
+def linkFolder(source: Path, destination: Path) -> bool:
+    # Links the whole folder, or mirrors it with hard linked files; returns False when nothing changed
+    source = source.resolve()
+    if destination.is_symlink() and destination.resolve() == source:
+        return False
+    temporaryLink = destination.with_name(destination.name + ".link")
+    try:
+        temporaryLink.symlink_to(source, target_is_directory=True)
+    except (OSError, NotImplementedError):
+        written, removed = syncFolder(source, destination, linkOrCopyFile)
+        return written + removed > 0
+    if destination.exists() or destination.is_symlink():
+        removePath(destination)
+    temporaryLink.rename(destination)
+    return True
+
+
+def packageZip(source: Path, zipPath: Path, rootFolder: str) -> tuple[int, int]:
+    """Packages the source folder into a mod zip, unless the existing zip is up to date.
+
+    The zip is only rewritten when a file was added, removed or changed (size,
+    mtime or CRC). Returns the number of entries compressed and reused.
+    """
+    sourceFiles = listFiles(source)
+    previousEntries: dict[str, zipfile.ZipInfo] = {}
+    if zipPath.is_file():
+        try:
+            with zipfile.ZipFile(zipPath) as previousZip:
+                previousEntries = {
+                    info.filename: info
+                    for info in previousZip.infolist()
+                    if not info.is_dir()
+                }
+        except zipfile.BadZipFile:
+            previousEntries = {}
+
+    # Files changed shortly before the zip was written may share its timestamps, verify those by CRC
+    trustedBefore = zipPath.stat().st_mtime - 2 if previousEntries else 0
+    unchanged = zipPath.is_file() and previousEntries.keys() == {
+        f"{rootFolder}/{relativePath}" for relativePath in sourceFiles
+    }
+    for relativePath, sourcePath in sourceFiles.items():
+        if not unchanged:
+            break
+        info = previousEntries[f"{rootFolder}/{relativePath}"]
+        unchanged = _isSameEntry(sourcePath, info, trustedBefore)
+    if unchanged:
+        return 0, len(sourceFiles)
+
+    temporaryPath = zipPath.with_name(zipPath.name + ".tmp")
+    with zipfile.ZipFile(temporaryPath, "w", zipfile.ZIP_DEFLATED) as newZip:
+        for relativePath, sourcePath in sourceFiles.items():
+            newZip.write(sourcePath, f"{rootFolder}/{relativePath}")
+    os.replace(temporaryPath, zipPath)
+    return len(sourceFiles), 0
+
+
+def _zipDateTime(mtime: float) -> tuple[int, ...]:
+    # Zip files store local time with a two second resolution
+    dateTime = time.localtime(mtime)[0:6]
+    return (*dateTime[0:5], dateTime[5] // 2 * 2)
+
+
+def _isSameEntry(sourcePath: Path, info: zipfile.ZipInfo, trustedBefore: float) -> bool:
+    stats = sourcePath.stat()
+    if info.file_size != stats.st_size:
+        return False
+    if info.date_time != _zipDateTime(stats.st_mtime):
+        return False
+    return stats.st_mtime < trustedBefore or info.CRC == crcFile(sourcePath)
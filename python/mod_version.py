@@ -0,0 +1,31 @@
+from __future__ import annotations
+from functools import lru_cache
+
+
+class ModVersion(tuple):
+    """A dotted version number that compares component-wise as integers, so 0.10 sorts above 0.9.
+
+    Missing parts are 0, so 2.0 equals 2.0.0.
+    """
+
+    partCount = 3  # major.minor.sub
+
+    def __new__(cls, version: str) -> ModVersion:
+        try:
+            parts = [int(part) for part in version.strip().split(".")]
+        except ValueError:
+            raise ValueError(f"Invalid version '{version}'.") from None
+        parts += [0] * (cls.partCount - len(parts))
+        return super().__new__(cls, parts)
+
+    def __str__(self) -> str:
+        return ".".join(str(part) for part in self)
+
+    def __repr__(self) -> str:
+        return f"ModVersion('{self}')"
+
+
+@lru_cache(maxsize=4096)
+def parseVersion(version: str) -> ModVersion:
+    # Versions repeat a lot across releases and dependencies, parse each one only once
+    return ModVersion(version)
@@ -1,6 +1,6 @@
 import os, sys, getopt
 import json
-from typing import Optional
+from typing import Optional, Iterable
 from pathlib import Path
 
 
@@ -10,7 +10,8 @@ class ModlistController:
     #   https://wiki.factorio.com/Property_tree
 
     modDirectory: Path
-    modlist: Optional[dict]
+    modlist: Optional[list[dict]]
+    modIndex: dict[str, int]  # mod name -> position in modlist
 
     def __init__(
         self,
@@ -28,11 +29,26 @@ class ModlistController:
         filepath = self.modDirectory / filename
         with filepath.open("r") as modlistFile:
             self.modlist = json.load(modlistFile).get("mods")
+        self.indexModlist()
 
-    def writeConfigurationFile(self, filename: str = "mod-list.json") -> None:
+    def writeConfigurationFile(self, filename: str = "mod-list.json") -> bool:
+        # Only writes when the content changed, returns whether the file was written
         filepath = self.modDirectory / filename
+        modlistStr = json.dumps({"mods": self.modlist}, indent=2)
+        if filepath.is_file():
+            with filepath.open("r") as modlistFile:
+                if modlistFile.read() == modlistStr:
+                    return False
         with filepath.open("w") as modlistFile:
-            json.dump({"mods": self.modlist}, modlistFile, indent=2)
+            modlistFile.write(modlistStr)
+        return True
+
+    def copyModlist(self, other: "ModlistController") -> None:
+        self.modlist = [dict(mod) for mod in other.modlist]
+        self.modIndex = dict(other.modIndex)
+
+    def indexModlist(self) -> None:
+        self.modIndex = {mod["name"]: index for index, mod in enumerate(self.modlist)}
 
     def disableAllMods(self) -> None:
         for mod in self.modlist:
@@ -41,18 +57,27 @@ class ModlistController:
     def disableMod(self, modname: str) -> None:
         if modname == "base":
             return
-        for mod in self.modlist:
-            if mod["name"] == modname:
-                mod["enabled"] = modname == "base"  # base mod cannot be disabled
-                return
-        self.modlist.append({"name": modname, "enabled": modname == "base"})
+        self.__setEnabled(modname, False)
 
     def enableMod(self, modname: str) -> None:
+        self.__setEnabled(modname, True)
+
+    def setEnabledSet(self, modnames: Iterable[str]) -> None:
+        # Enables exactly the given mods (and base) in a single pass
+        enabledMods = set(modnames)
+        enabledMods.add("base")  # base mod cannot be disabled
         for mod in self.modlist:
-            if mod["name"] == modname:
-                mod["enabled"] = True
-                return
-        self.modlist.append({"name": modname, "enabled": True})
+            mod["enabled"] = mod["name"] in enabledMods
+        for modname in sorted(enabledMods - self.modIndex.keys()):
+            self.__setEnabled(modname, True)
+
+    def __setEnabled(self, modname: str, enabled: bool) -> None:
+        index = self.modIndex.get(modname)
+        if index is not None:
+            self.modlist[index]["enabled"] = enabled
+            return
+        self.modIndex[modname] = len(self.modlist)
+        self.modlist.append({"name": modname, "enabled": enabled})
 
 
 if __name__ == "__main__":
@@ -0,0 +1,41 @@
+from __future__ import annotations
+import os, shutil
+from pathlib import Path
+
+
+def linkPath(source: Path, destination: Path) -> None:
+    # Prefer symlinks, but those need extra privileges on Windows, so fall back
+    # to directory junctions and hard links there, and copy as a last resort.
+    try:
+        destination.symlink_to(source, target_is_directory=source.is_dir())
+        return
+    except (OSError, NotImplementedError):
+        pass
+
+    if source.is_dir():
+        if os.name == "nt":
+            import _winapi
+
+            try:
+                _winapi.CreateJunction(str(source), str(destination))
+                return
+            except OSError:
+                pass
+        shutil.copytree(source, destination)
+    else:
+        try:
+            os.link(source, destination)
+        except OSError:
+            shutil.copy2(source, destination)
+
+
+def removePath(path: Path) -> None:
+    # Removes a file, link or directory without following links into their target
+    if path.is_symlink() or path.is_file():
+        path.unlink()
+    elif (
+        os.name == "nt" and hasattr(os.path, "isjunction") and os.path.isjunction(path)
+    ):
+        os.rmdir(path)
+    elif path.is_dir():
+        shutil.rmtree(path)
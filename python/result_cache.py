@@ -0,0 +1,133 @@
+from __future__ import annotations
+from typing import Iterable
+import os
+import json
+import time
+import hashlib
+import threading
+from pathlib import Path
+
+from .mod_directory_index import ModDirectoryIndex
+
+
+class ResultCache:
+    """Remembers the fingerprints of configurations that passed, so unchanged configurations don't need a relaunch.
+
+    A fingerprint covers the enabled mods, the files of those mods, the written
+    mod settings, the test files and the Factorio version. Mod files are
+    fingerprinted by path, size and modification time, everything else by content.
+    """
+
+    cacheFilePath: Path
+    maxEntries: int
+    maxAge: float
+    entries: dict[str, dict]
+    lock: threading.Lock
+
+    def __init__(
+        self, cacheDirectory: Path, maxEntries: int = 256, maxAgeDays: float = 14
+    ):
+        self.cacheFilePath = cacheDirectory / "result-cache.json"
+        self.maxEntries = maxEntries
+        self.maxAge = maxAgeDays * 24 * 60 * 60
+        self.entries = {}
+        self.lock = threading.Lock()
+        self.readCacheFile()
+
+    def readCacheFile(self) -> None:
+        if not self.cacheFilePath.exists():
+            return
+        try:
+            with self.cacheFilePath.open("r") as cacheFile:
+                self.entries = json.load(cacheFile).get("entries", {})
+        except (OSError, ValueError):
+            self.entries = {}  # a corrupt cache is simply rebuilt
+        self.__evict()
+
+    def writeCacheFile(self) -> None:
+        with self.lock:
+            self.__evict()
+            self.cacheFilePath.parent.mkdir(parents=True, exist_ok=True)
+            with self.cacheFilePath.open("w") as cacheFile:
+                json.dump({"entries": self.entries}, cacheFile, indent=2)
+
+    def isCachedPass(self, fingerprint: str) -> bool:
+        with self.lock:
+            entry = self.entries.get(fingerprint)
+            return entry is not None and time.time() - entry["time"] <= self.maxAge
+
+    def storePass(self, fingerprint: str, configName: str) -> None:
+        with self.lock:
+            self.entries[fingerprint] = {"config": configName, "time": time.time()}
+
+    def fingerprint(
+        self,
+        factorioVersion: str,
+        enabledMods: Iterable[str],
+        modIndex: ModDirectoryIndex,
+        contentFiles: Iterable[Path],
+        extraData: Iterable[str] = (),
+    ) -> str:
+        fingerprint = hashlib.sha256()
+
+        def update(*values: str) -> None:
+            for value in values:
+                fingerprint.update(value.encode("utf-8"))
+                fingerprint.update(b"\0")
+
+        update("factorio", factorioVersion)
+        update("extra", *extraData)
+
+        for modName in sorted(enabledMods):
+            update("mod", modName)
+            for modPath in modIndex.getModPaths(modName):
+                self.__updateWithFileStats(fingerprint, modPath)
+
+        for contentFile in contentFiles:
+            update("file", contentFile.name)
+            fingerprint.update(contentFile.read_bytes())
+
+        return fingerprint.hexdigest()
+
+    def __updateWithFileStats(self, fingerprint, path: Path) -> None:
+        # Generated test files are covered by content, not by the test mod's stats
+        ignoredNames = {
+            "__pycache__",
+            "log",
+            "temp",
+            "temp-test-list.lua",
+            "temp-test-options.lua",
+        }
+        if path.is_file():
+            stats = path.stat()
+            fingerprint.update(
+                f"{path.name}:{stats.st_size}:{stats.st_mtime_ns}\0".encode("utf-8")
+            )
+            return
+        for root, dirNames, fileNames in os.walk(path, followlinks=True):
+            dirNames[:] = sorted(d for d in dirNames if d not in ignoredNames)
+            for fileName in sorted(fileNames):
+                if fileName in ignoredNames:
+                    continue
+                filePath = Path(root) / fileName
+                stats = filePath.stat()
+                relativePath = filePath.relative_to(path).as_posix()
+                fingerprint.update(
+                    f"{relativePath}:{stats.st_size}:{stats.st_mtime_ns}\0".encode(
+                        "utf-8"
+                    )
+                )
+
+    def __evict(self) -> None:
+        # Drop entries past their age, then the oldest entries beyond the size bound
+        now = time.time()
+        entries = sorted(
+            (
+                (fingerprint, entry)
+                for fingerprint, entry in self.entries.items()
+                if now - entry.get("time", 0) <= self.maxAge
+            ),
+            key=lambda item: item[1]["time"],
+            reverse=True,
+        )
+        self.entries = dict(entries[: self.maxEntries])
@@ -1,4 +1,5 @@
-from typing import Union, Optional, BinaryIO
+from typing import Union, Optional, Iterator
+from collections.abc import MutableMapping
 import os, sys, getopt
 import struct
 from pathlib import Path
@@ -16,50 +17,76 @@ class PTreeType(IntEnum):
     UNSIGNED_LONG = 7
 
 
+PTreeValue = Union[None, bool, float, str, int, list, dict]
+
+# Precompiled little endian layouts of the property tree fields
+_unsignedByte = struct.Struct("<B")
+_unsignedShort = struct.Struct("<H")
+_unsignedInteger = struct.Struct("<I")
+_signedLong = struct.Struct("<q")
+_unsignedLong = struct.Struct("<Q")
+_number = struct.Struct("<d")  # IEEE 754 double-precision binary floating-point format
+_version = struct.Struct("<4H")
+_propertyType = struct.Struct("<B?")  # type followed by the 'any type' flag
+
+
 class SettingsFileReader:
-    file: BinaryIO
+    """Decodes a complete settings file held in memory."""
+
+    data: memoryview
+    offset: int
 
-    def __init__(self, file):
-        self.file = file
+    def __init__(self, data: bytes):
+        self.data = memoryview(data)
+        self.offset = 0
 
     def readBool(self) -> bool:
-        return bool.from_bytes(self.file.read(1), byteorder="little")
+        value = self.data[self.offset] != 0
+        self.offset += 1
+        return value
 
     def readByte(self) -> int:
-        return int.from_bytes(self.file.read(1), byteorder="little")
+        value = self.data[self.offset]
+        self.offset += 1
+        return value
 
     def readUnsignedShort(self) -> int:
-        return int.from_bytes(self.file.read(2), byteorder="little")
+        return self.__unpack(_unsignedShort)[0]
 
     def readUnsignedInteger(self, spaceOptimised: bool = False) -> int:
-        if not spaceOptimised:
-            return int.from_bytes(self.file.read(4), byteorder="little")
-
-        value = self.readByte()
-        return value if value < 255 else self.readUnsignedInteger(spaceOptimised=False)
+        if spaceOptimised:
+            value = self.readByte()
+            if value < 255:
+                return value
+        return self.__unpack(_unsignedInteger)[0]
 
     def readSignedLong(self) -> int:
-        return int.from_bytes(self.file.read(8), byteorder="little", signed=True)
+        return self.__unpack(_signedLong)[0]
 
     def readUnsignedLong(self) -> int:
-        return int.from_bytes(self.file.read(8), byteorder="little")
+        return self.__unpack(_unsignedLong)[0]
 
     def readNumber(self) -> float:
-        # IEEE 754 double-precision binary floating-point format
-        return struct.unpack("<d", self.file.read(8))[0]
+        return self.__unpack(_number)[0]
 
     def readString(self) -> str:
         if self.readBool():
             return ""
-        return self.file.read(self.readUnsignedInteger(spaceOptimised=True)).decode(
-            "utf-8"
-        )
+        length = self.readUnsignedInteger(spaceOptimised=True)
+        value = str(self.data[self.offset : self.offset + length], "utf-8")
+        self.offset += length
+        return value
+
+    def readVersion(self) -> list:
+        return list(self.__unpack(_version))
+
+    def readPropertyType(self) -> int:
+        return self.__unpack(_propertyType)[0]
 
-    def readDictionary(self, dictName: str = "") -> Union[bool, float, str, dict]:
-        treeType = self.readByte()
-        treeBool = self.readBool()
+    def readPropertyTree(self, treeName: str = "") -> PTreeValue:
+        treeType = self.readPropertyType()
         if treeType == PTreeType.NONE:
-            raise NotImplementedError
+            return None
         elif treeType == PTreeType.BOOL:
             return self.readBool()
         elif treeType == PTreeType.NUMBER:
@@ -67,103 +94,153 @@ class SettingsFileReader:
         elif treeType == PTreeType.STRING:
             return self.readString()
         elif treeType == PTreeType.LIST:
-            raise NotImplementedError
+            # List entries have (empty) keys like dictionary entries, these are dropped
+            treeVal = []
+            for _ in range(self.readUnsignedInteger()):
+                self.readString()
+                treeVal.append(self.readPropertyTree(treeName))
+            return treeVal
         elif treeType == PTreeType.DICTIONARY:
             treeVal = dict()
-            dictSize = self.readUnsignedInteger()
-            for dictIndex in range(dictSize):
+            for dictIndex in range(self.readUnsignedInteger()):
                 dictKey = self.readString()
-                treeVal[dictIndex] = [dictKey, self.readDictionary()]
+                treeVal[dictIndex] = [dictKey, self.readPropertyTree(dictKey)]
             return treeVal
         elif treeType == PTreeType.SIGNED_LONG:
             return self.readSignedLong()
         elif treeType == PTreeType.UNSIGNED_LONG:
             return self.readUnsignedLong()
         else:
-            raise ValueError(f"Type '{treeType}' is invalid for dict {dictName}.")
+            raise ValueError(f"Type '{treeType}' is invalid for dict {treeName}.")
+
+    def __unpack(self, layout: struct.Struct) -> tuple:
+        value = layout.unpack_from(self.data, self.offset)
+        self.offset += layout.size
+        return value
 
 
 class SettingsFileWriter:
-    file: BinaryIO
+    """Encodes a settings file into a single buffer, to be written in one go."""
+
+    buffer: bytearray
+
+    def __init__(self):
+        self.buffer = bytearray()
 
-    def __init__(self, file):
-        self.file = file
+    def getBytes(self) -> bytes:
+        return bytes(self.buffer)
 
     def writeBool(self, value: bool) -> None:
-        self.file.write(value.to_bytes(1, "little"))
+        self.buffer.append(1 if value else 0)
 
     def writeByte(self, value: int) -> None:
-        self.file.write(value.to_bytes(1, "little"))
+        self.buffer.append(value)
 
     def writeUnsignedShort(self, value: int) -> None:
-        self.file.write(value.to_bytes(2, "little"))
+        self.buffer += _unsignedShort.pack(value)
 
     def writeUnsignedInteger(self, value: int, spaceOptimised: bool = False) -> None:
         if spaceOptimised:
             self.writeByte(min(value, 255))
-            if value >= 255:
-                self.writeUnsignedInteger(value, spaceOptimised=False)
-        else:
-            self.file.write(value.to_bytes(4, "little"))
+            if value < 255:
+                return
+        self.buffer += _unsignedInteger.pack(value)
 
     def writeSignedLong(self, value: int) -> None:
-        self.file.write(value.to_bytes(8, "little", signed=True))
+        self.buffer += _signedLong.pack(value)
 
     def writeUnsignedLong(self, value: int) -> None:
-        self.file.write(value.to_bytes(8, "little"))
+        self.buffer += _unsignedLong.pack(value)
 
     def writeNumber(self, value: float) -> None:
-        # IEEE 754 double-precision binary floating-point format
-        self.file.write(struct.pack("<d", value))
+        self.buffer += _number.pack(value)
 
     def writeString(self, value: str) -> None:
-        empty = value == ""
+        encodedValue = value.encode("utf-8")
         self.writeBool(False)  # not refering to nullptr
-        self.writeUnsignedInteger(len(value), spaceOptimised=True)
-        if not empty:
-            self.file.write(value.encode("utf-8"))
+        self.writeUnsignedInteger(len(encodedValue), spaceOptimised=True)
+        self.buffer += encodedValue
+
+    def writeVersion(self, version: list) -> None:
+        self.buffer += _version.pack(*version[:4])
+
+    def writePropertyType(self, type: PTreeType) -> None:
+        self.buffer += _propertyType.pack(type, False)
 
     def writeDictionary(self, value: dict) -> None:
         self.writePropertyType(PTreeType.DICTIONARY)
-        dictSize = len(value.keys())
+        dictSize = len(value)
         self.writeUnsignedInteger(dictSize)
         for dictIndex in range(dictSize):
-            dictKey, dictValue = value.get(dictIndex)
+            dictKey, dictValue = value[dictIndex]
             self.writeString(dictKey)
-            if type(dictValue) is None:
-                raise NotImplementedError
-            elif type(dictValue) is bool:
-                self.writePropertyType(PTreeType.BOOL)
-                self.writeBool(dictValue)
-            elif type(dictValue) is float:
-                self.writePropertyType(PTreeType.NUMBER)
-                self.writeNumber(dictValue)
-            elif type(dictValue) is str:
-                self.writePropertyType(PTreeType.STRING)
-                self.writeString(dictValue)
-            elif type(dictValue) is list:
-                raise NotImplementedError
-            elif type(dictValue) is dict:
-                raise NotImplementedError
-            elif type(dictValue) is int:
-                if dictValue < 0:
-                    self.writePropertyType(PTreeType.SIGNED_LONG)
-                    self.writeSignedLong(dictValue)
-                else:
-                    self.writePropertyType(PTreeType.UNSIGNED_LONG)
-                    self.writeUnsignedLong(dictValue)
+            self.writePropertyTree(dictValue, dictKey)
+
+    def writeList(self, value: list) -> None:
+        self.writePropertyType(PTreeType.LIST)
+        self.writeUnsignedInteger(len(value))
+        for listValue in value:
+            self.writeString("")
+            self.writePropertyTree(listValue)
+
+    def writePropertyTree(self, value: PTreeValue, treeName: str = "") -> None:
+        if value is None:
+            self.writePropertyType(PTreeType.NONE)
+        elif type(value) is bool:
+            self.writePropertyType(PTreeType.BOOL)
+            self.writeBool(value)
+        elif type(value) is float:
+            self.writePropertyType(PTreeType.NUMBER)
+            self.writeNumber(value)
+        elif type(value) is str:
+            self.writePropertyType(PTreeType.STRING)
+            self.writeString(value)
+        elif type(value) is list:
+            self.writeList(value)
+        elif type(value) is dict:
+            self.writeDictionary(value)
+        elif type(value) is int:
+            if value < 0:
+                self.writePropertyType(PTreeType.SIGNED_LONG)
+                self.writeSignedLong(value)
             else:
-                raise ValueError(
-                    f"Type '{type(dictValue).__name__}' is invalid for dict {dictKey}."
-                )
+                self.writePropertyType(PTreeType.UNSIGNED_LONG)
+                self.writeUnsignedLong(value)
+        else:
+            raise ValueError(
+                f"Type '{type(value).__name__}' is invalid for dict {treeName}."
+            )
 
-    def writeVersion(self, version: list) -> None:
-        for v in range(4):
-            self.writeUnsignedShort(version[v])
 
-    def writePropertyType(self, type: PTreeType) -> None:
-        self.writeByte(type)
-        self.writeBool(False)
+class SettingsStage(MutableMapping):
+    """Name based access to the setting values of one stage, e.g. controller["startup"]["setting-name"]."""
+
+    controller: "SettingsController"
+    stageName: str
+
+    def __init__(self, controller: "SettingsController", stageName: str):
+        self.controller = controller
+        self.stageName = stageName
+
+    def __getitem__(self, settingName: str) -> PTreeValue:
+        location = self.controller.settingIndex.get(settingName)
+        if location is None or location[0] != self.stageName:
+            raise KeyError(settingName)
+        return self.controller.settings[self.stageName][location[1]][1][0][1]
+
+    def __setitem__(self, settingName: str, settingValue: PTreeValue) -> None:
+        self.controller.setSettingValue(self.stageName, settingName, settingValue)
+
+    def __delitem__(self, settingName: str) -> None:
+        self.controller.removeSetting(self.stageName, settingName)
+
+    def __iter__(self) -> Iterator[str]:
+        stageSettings = self.controller.settings[self.stageName]
+        for settingSlot in range(len(stageSettings)):
+            yield stageSettings[settingSlot][0]
+
+    def __len__(self) -> int:
+        return len(self.controller.settings[self.stageName])
 
 
 class SettingsController:
@@ -171,8 +248,11 @@ class SettingsController:
     #   https://wiki.factorio.com/Mod_settings_file_format
     #   https://wiki.factorio.com/Property_tree
 
+    settingStages = ("startup", "runtime-global", "runtime-per-user")
+
     modDirectory: Path
     settings: Optional[dict]
+    settingIndex: dict[str, tuple[str, int]]  # setting name -> (stage, slot)
 
     def __init__(
         self,
@@ -185,71 +265,98 @@ class SettingsController:
             self.modDirectory = userDataDirectory / "mods"
         else:
             self.modDirectory = Path(os.getenv("APPDATA")) / "Factorio" / "mods"
+        self.settings = None
+        self.settingIndex = dict()
+
+    def __getitem__(self, settingStage: str) -> SettingsStage:
+        if settingStage not in self.settingStages:
+            raise KeyError(settingStage)
+        return SettingsStage(self, settingStage)
 
     def readSettingsFile(self, filename: str = "mod-settings.dat") -> None:
         filepath = self.modDirectory / filename
-        with filepath.open("rb") as modSettingsFile:
-            modSettings = SettingsFileReader(modSettingsFile)
-            self.settings = dict()
-            # Version of the mod
-            self.settings["version"] = [
-                modSettings.readUnsignedShort() for _ in range(4)
-            ]
-            _ = modSettings.readBool()
-            # print(f"Loading {filename} version {'.'.join([str(v) for v in self.settings.get('version')])}")
-
-            # Property tree
-            propertyTreeType = modSettings.readByte()
-            propertyTreeBool = modSettings.readBool()
-            assert propertyTreeType == 5, "Invalid settings structure type detected!"
-            settingCount = modSettings.readUnsignedInteger()
-            assert settingCount == 3, "Invalid amount of setting stages!"
-            for settingIndex in range(settingCount):
-                settingStageName = modSettings.readString()
-                # print(f"\tReading {settingStageName} settings")
-                self.settings[settingStageName] = dict()
-
-                stagePropertyTreeType = modSettings.readByte()
-                stagePropertyTreeBool = modSettings.readBool()
-                assert (
-                    stagePropertyTreeType == 5
-                ), "Invalid settings stage structure type detected!"
-                stageSettingCount = modSettings.readUnsignedInteger()
-                for stageSettingIndex in range(stageSettingCount):
-                    stageSettingIndexName = modSettings.readString()
-                    self.settings[settingStageName][stageSettingIndex] = [
-                        stageSettingIndexName,
-                        modSettings.readDictionary(stageSettingIndexName),
-                    ]
-
-    def writeSettingsFile(self, filename: str = "mod-settings.dat") -> None:
+        self.settings = self.decodeSettings(filepath.read_bytes())
+        self.indexSettings()
+
+    def copySettings(self, other: "SettingsController") -> None:
+        # Setting entries are replaced rather than modified by setSettingValue,
+        # so copying the stage dictionaries is enough to keep other unchanged
+        self.settings = {
+            key: dict(value) if key in self.settingStages else list(value)
+            for key, value in other.settings.items()
+        }
+        self.settingIndex = dict(other.settingIndex)
+
+    def indexSettings(self) -> None:
+        self.settingIndex = {
+            settingName: (settingStage, settingSlot)
+            for settingStage in self.settingStages
+            for settingSlot, (settingName, _) in self.settings[settingStage].items()
+        }
+
+    def writeSettingsFile(self, filename: str = "mod-settings.dat") -> bool:
+        return self.writeSettingsBytes(self.encodeSettings(), filename)
+
+    def writeSettingsBytes(
+        self, data: bytes, filename: str = "mod-settings.dat"
+    ) -> bool:
+        # Skips unchanged files, otherwise replaces the file atomically so the game
+        # never reads a partially written file. Returns whether the file was written.
         filepath = self.modDirectory / filename
-        filepath.unlink(missing_ok=True)  # Delete current file if exists
-        with filepath.open("wb") as modSettingsFile:
-            modSettings = SettingsFileWriter(modSettingsFile)
-
-            # Version of the mod
-            # print(f"Writing {filename} version {'.'.join([str(v) for v in self.settings.get('version')])}")
-            modSettings.writeVersion(self.settings.get("version"))
-            modSettings.writeBool(False)
-
-            # Property tree
-            modSettings.writePropertyType(PTreeType.DICTIONARY)
-
-            modSettingsStages = ["startup", "runtime-global", "runtime-per-user"]
-            modSettings.writeUnsignedInteger(len(modSettingsStages))
-            for modSettingsStage in modSettingsStages:
-                # print(f"\tWriting {modSettingsStage} settings")
-                modSettings.writeString(modSettingsStage)
-                modSettings.writePropertyType(PTreeType.DICTIONARY)
-                stageSettingCount = len(self.settings[modSettingsStage].keys())
-                modSettings.writeUnsignedInteger(stageSettingCount)
-                for stageSettingIndex in range(stageSettingCount):
-                    stageSettingKey, stageSettingValue = self.settings[
-                        modSettingsStage
-                    ].get(stageSettingIndex)
-                    modSettings.writeString(stageSettingKey)
-                    modSettings.writeDictionary(stageSettingValue)
+        if filepath.is_file() and filepath.stat().st_size == len(data):
+            if filepath.read_bytes() == data:
+                return False
+        tempFilepath = filepath.with_name(filepath.name + ".tmp")
+        with tempFilepath.open("wb") as tempFile:
+            tempFile.write(data)
+            tempFile.flush()
+            os.fsync(tempFile.fileno())
+        os.replace(tempFilepath, filepath)
+        return True
+
+    def decodeSettings(self, data: bytes) -> dict:
+        modSettings = SettingsFileReader(data)
+        settings = dict()
+        # Version of the mod
+        settings["version"] = modSettings.readVersion()
+        _ = modSettings.readBool()
+
+        # Property tree
+        propertyTreeType = modSettings.readPropertyType()
+        assert propertyTreeType == 5, "Invalid settings structure type detected!"
+        settingCount = modSettings.readUnsignedInteger()
+        assert settingCount == 3, "Invalid amount of setting stages!"
+        for settingIndex in range(settingCount):
+            settingStageName = modSettings.readString()
+            stagePropertyTreeType = modSettings.readPropertyType()
+            assert (
+                stagePropertyTreeType == 5
+            ), "Invalid settings stage structure type detected!"
+            stageSettings = settings[settingStageName] = dict()
+            for stageSettingIndex in range(modSettings.readUnsignedInteger()):
+                stageSettingIndexName = modSettings.readString()
+                stageSettings[stageSettingIndex] = [
+                    stageSettingIndexName,
+                    modSettings.readPropertyTree(stageSettingIndexName),
+                ]
+        return settings
+
+    def encodeSettings(self) -> bytes:
+        modSettings = SettingsFileWriter()
+
+        # Version of the mod
+        modSettings.writeVersion(self.settings.get("version"))
+        modSettings.writeBool(False)
+
+        # Property tree
+        modSettings.writePropertyType(PTreeType.DICTIONARY)
+
+        modSettingsStages = self.settingStages
+        modSettings.writeUnsignedInteger(len(modSettingsStages))
+        for modSettingsStage in modSettingsStages:
+            modSettings.writeString(modSettingsStage)
+            modSettings.writeDictionary(self.settings[modSettingsStage])
+        return modSettings.getBytes()
 
     def setSettingValue(
         self,
@@ -257,30 +364,49 @@ class SettingsController:
         settingName: str,
         settingValue: Union[bool, float, str, dict],
     ) -> None:
-        # Check all settings if the setting already exists
-        validSettingType = False
-        for modSettingsStage in ["startup", "runtime-global", "runtime-per-user"]:
-            for modSettingIndex, modSetting in self.settings[modSettingsStage].items():
-                dictKey, dictValue = modSetting
-                if settingName == dictKey:
-                    assert (
-                        modSettingsStage == settingType
-                    ), f"Error: Setting {settingName} is not a {settingType} setting."
-                    assert type(settingValue) is type(
-                        dictValue[0][1]
-                    ), f"Error: Setting {settingName} should be of type {type(dictValue[0][1]).__name__}"
-                    dictValue[0][1] = settingValue
-                    return
-
-            validSettingType = validSettingType or (modSettingsStage == settingType)
+        location = self.settingIndex.get(settingName)
+        if location is not None:
+            modSettingsStage, modSettingSlot = location
+            assert (
+                modSettingsStage == settingType
+            ), f"Error: Setting {settingName} is not a {settingType} setting."
+            dictKey, dictValue = self.settings[modSettingsStage][modSettingSlot]
+            assert type(settingValue) is type(
+                dictValue[0][1]
+            ), f"Error: Setting {settingName} should be of type {type(dictValue[0][1]).__name__}"
+            # Replace instead of modifying the entry, copies made by copySettings share entries
+            dictValue = dict(dictValue)
+            dictValue[0] = [dictValue[0][0], settingValue]
+            self.settings[modSettingsStage][modSettingSlot] = [dictKey, dictValue]
+            return
 
         # Setting does not exist yet at this point
-        assert validSettingType, f"Error: {settingType} is not a valid setting stage."
+        assert (
+            settingType in self.settingStages
+        ), f"Error: {settingType} is not a valid setting stage."
         modSettingStage = self.settings[settingType]
-        modSettingStage[len(modSettingStage.keys())] = [
+        modSettingSlot = len(modSettingStage)
+        modSettingStage[modSettingSlot] = [
             settingName,
             {0: ["value", settingValue]},
         ]
+        self.settingIndex[settingName] = (settingType, modSettingSlot)
+
+    def removeSetting(self, settingType: str, settingName: str) -> None:
+        location = self.settingIndex.get(settingName)
+        if location is None or location[0] != settingType:
+            raise KeyError(settingName)
+        # Slots have to stay consecutive, so the remaining settings move up
+        modSettingStage = self.settings[settingType]
+        remainingSettings = [
+            modSettingStage[modSettingSlot]
+            for modSettingSlot in range(len(modSettingStage))
+            if modSettingSlot != location[1]
+        ]
+        self.settings[settingType] = dict(enumerate(remainingSettings))
+        del self.settingIndex[settingName]
+        for modSettingSlot, (dictKey, _) in enumerate(remainingSettings):
+            self.settingIndex[dictKey] = (settingType, modSettingSlot)
 
 
 if __name__ == "__main__":
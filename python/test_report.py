@@ -0,0 +1,190 @@
+from __future__ import annotations
+from typing import Any, Optional
+import json
+import xml.etree.ElementTree as ElementTree
+from pathlib import Path
+
+try:
+    from .game_output_reader import TestTiming
+except ImportError:
+    from game_output_reader import TestTiming
+
+
+class TestCaseResult:
+    """The outcome of one unit test within a configuration, with the messages it printed."""
+
+    name: str
+    status: str  # passed, failed or error (the test didn't finish)
+    timing: Optional[TestTiming]
+    messages: list[str]
+
+    def __init__(self, name: str):
+        self.name = name
+        self.status = "error"  # until the test reports its result
+        self.timing = None
+        self.messages = []
+
+    def toDict(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "status": self.status,
+            "durationMs": self.timing.durationMs if self.timing else None,
+            "memoryKiB": self.timing.memoryKiB if self.timing else None,
+            "ticks": self.timing.ticks if self.timing else None,
+            "messages": self.messages,
+        }
+
+
+class ConfigurationResult:
+    """The outcome of a configuration: its unit tests, or why it has none."""
+
+    name: str
+    passed: bool
+    cached: bool
+    failureReport: Optional[str]
+    testCases: dict[str, TestCaseResult]
+    messages: list[str]
+
+    def __init__(
+        self,
+        name: str,
+        passed: bool,
+        cached: bool = False,
+        failureReport: Optional[str] = None,
+        testCases: Optional[dict[str, TestCaseResult]] = None,
+        messages: Optional[list[str]] = None,
+    ):
+        self.name = name
+        self.passed = passed
+        self.cached = cached
+        self.failureReport = failureReport
+        self.testCases = testCases or {}
+        self.messages = messages or []
+
+    def toDict(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "passed": self.passed,
+            "cached": self.cached,
+            "failureReport": self.failureReport,
+            "messages": self.messages,
+            "tests": [testCase.toDict() for testCase in self.testCases.values()],
+        }
+
+
+class TestReport:
+    """Results of all configurations of a run, exported as JSON or JUnit XML.
+
+    The format is chosen by the file extension: .xml writes JUnit XML with a
+    test suite per configuration, anything else writes JSON.
+    """
+
+    modName: str
+    configurations: dict[str, ConfigurationResult]
+
+    def __init__(self, modName: str):
+        self.modName = modName
+        self.configurations = {}
+
+    def add(self, configurationResult: ConfigurationResult) -> None:
+        self.configurations[configurationResult.name] = configurationResult
+
+    def write(self, reportPath: Path) -> None:
+        reportPath.parent.mkdir(parents=True, exist_ok=True)
+        if reportPath.suffix.lower() == ".xml":
+            ElementTree.ElementTree(self.toJunitXml()).write(
+                reportPath, encoding="utf-8", xml_declaration=True
+            )
+        else:
+            with reportPath.open("w", encoding="utf-8") as reportFile:
+                json.dump(self.toDict(), reportFile, indent=2)
+
+    def toDict(self) -> dict[str, Any]:
+        return {
+            "mod": self.modName,
+            "passed": all(config.passed for config in self.configurations.values()),
+            "configurations": [
+                config.toDict() for config in self.configurations.values()
+            ],
+        }
+
+    def toJunitXml(self) -> ElementTree.Element:
+        testSuites = ElementTree.Element("testsuites", name=self.modName)
+        totals = {"tests": 0, "failures": 0, "errors": 0, "skipped": 0, "time": 0.0}
+        for config in self.configurations.values():
+            testSuite = self.__createTestSuite(config)
+            testSuites.append(testSuite)
+            for key in totals:
+                totals[key] += float(testSuite.get(key))
+        for key, total in totals.items():
+            testSuites.set(key, f"{total:.3f}" if key == "time" else str(int(total)))
+        return testSuites
+
+    def __createTestSuite(self, config: ConfigurationResult) -> ElementTree.Element:
+        testSuite = ElementTree.Element("testsuite", name=config.name)
+        counts = {"failures": 0, "errors": 0, "skipped": 0}
+        suiteTime = 0.0
+
+        for testCaseResult in config.testCases.values():
+            duration = (
+                testCaseResult.timing.durationMs / 1000 if testCaseResult.timing else 0
+            )
+            suiteTime += duration
+            testCase = ElementTree.SubElement(
+                testSuite,
+                "testcase",
+                classname=config.name,
+                name=testCaseResult.name,
+                time=f"{duration:.3f}",
+            )
+            if testCaseResult.status == "failed":
+                failure = ElementTree.SubElement(testCase, "failure", message="FAILED")
+                failure.text = "\n".join(testCaseResult.messages)
+                counts["failures"] += 1
+            elif testCaseResult.status == "error":
+                error = ElementTree.SubElement(
+                    testCase,
+                    "error",
+                    message=config.failureReport or "unit test did not finish",
+                )
+                error.text = "\n".join(testCaseResult.messages)
+                counts["errors"] += 1
+            elif testCaseResult.messages:
+                systemOut = ElementTree.SubElement(testCase, "system-out")
+                systemOut.text = "\n".join(testCaseResult.messages)
+
+        # Outcomes without a failing unit test get a placeholder test case, e.g. cached
+        # configurations or a game that crashed outside of the unit tests
+        configurationFailed = not config.passed and not (
+            counts["failures"] or counts["errors"]
+        )
+        if config.cached or configurationFailed:
+            testCase = ElementTree.SubElement(
+                testSuite,
+                "testcase",
+                classname=config.name,
+                name="configuration",
+                time="0",
+            )
+            if config.cached:
+                ElementTree.SubElement(
+                    testCase, "skipped", message="unchanged since it last passed"
+                )
+                counts["skipped"] += 1
+            else:
+                error = ElementTree.SubElement(
+                    testCase,
+                    "error",
+                    message=config.failureReport or "configuration failed",
+                )
+                error.text = "\n".join(config.messages)
+                counts["errors"] += 1
+        if config.messages:
+            systemOut = ElementTree.SubElement(testSuite, "system-out")
+            systemOut.text = "\n".join(config.messages)
+
+        testSuite.set("tests", str(len(testSuite.findall("testcase"))))
+        for key, count in counts.items():
+            testSuite.set(key, str(count))
+        testSuite.set("time", f"{suiteTime:.3f}")
+        return testSuite
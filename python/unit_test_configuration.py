@@ -2,7 +2,7 @@ from __future__ import annotations
 from typing import Iterable, Optional, TypedDict
 from pathlib import Path
 import json
-import _jsonnet
+import hashlib
 
 SettingsType = dict[str, dict[str, bool]]
 ModListType = list[str]
@@ -12,6 +12,42 @@ ConfigurationType = TypedDict(
 )
 
 
+class ResolvedTestFile:
+    """A test file matched by a pattern of the tests section, with the hash of its content."""
+
+    pattern: str
+    path: Path
+    name: str
+    sha1: str
+
+    def __init__(self, pattern: str, path: Path):
+        self.pattern = pattern
+        self.path = path
+        self.name = path.stem
+        self.sha1 = hashlib.sha1(path.read_bytes()).hexdigest()
+
+
+class ResolvedTests:
+    """The test files of a configuration file, resolved once in the order of its tests section."""
+
+    files: tuple[ResolvedTestFile, ...]
+    unmatchedPatterns: tuple[str, ...]
+
+    def __init__(
+        self, files: Iterable[ResolvedTestFile], unmatchedPatterns: Iterable[str]
+    ):
+        self.files = tuple(files)
+        self.unmatchedPatterns = tuple(unmatchedPatterns)
+
+    def getTestList(self) -> str:
+        # Contents of temp-test-list.lua
+        testListFileStr = "return {\n"
+        for testFile in self.files:
+            testListFileStr += f'  "{testFile.name}",\n'
+        testListFileStr += "}\n"
+        return testListFileStr
+
+
 class UnitTestConfiguration:
     """An iterable object containing all test configurations."""
 
@@ -19,20 +55,33 @@ class UnitTestConfiguration:
     default_settings: SettingsType
     configurations: dict[str, ConfigurationType]
     tests: TestListType
+    startTick: int
+    stepsPerTick: Optional[int]
+    factorioArgs: list[str]
+    resolvedTests: dict[tuple[Path, Path], ResolvedTests]
 
     def __init__(self, modName: str, configFile: Optional[Path]):
         self.modName = modName
         self.default_settings = {}
         self.configurations = {}
         self.tests = {}
+        self.startTick = 60
+        self.stepsPerTick = None
+        self.factorioArgs = []
+        self.resolvedTests = {}
 
         # Read config json and populate configurations
         if configFile is not None:
+            import _jsonnet  # only needed to read config files
+
             configDataStr = _jsonnet.evaluate_file(str(configFile))
             allConfigData = json.loads(configDataStr)
             self.default_settings = allConfigData.get("default_settings", {})
-            self.configurations = allConfigData.get("configurations", [])
+            self.configurations = allConfigData.get("configurations", {})
             self.tests = allConfigData.get("tests", {})
+            self.startTick = allConfigData.get("start_tick", self.startTick)
+            self.stepsPerTick = allConfigData.get("steps_per_tick", self.stepsPerTick)
+            self.factorioArgs = allConfigData.get("factorio_args", [])
 
             # Apply default settings to each configuration
             for configName, configData in self.configurations.items():
@@ -52,6 +101,28 @@ class UnitTestConfiguration:
     ) -> Iterable[tuple[str, ConfigurationType]]:
         return iter(self.configurations.items())
 
+    def resolveTests(self, modFolder: Path, commonTestFolder: Path) -> ResolvedTests:
+        # Patterns prefixed with 'common.' match the tests of the factorio-unit-test
+        # mod, all others the unit-tests folder of the tested mod
+        cacheKey = (modFolder, commonTestFolder)
+        if cacheKey not in self.resolvedTests:
+            files: list[ResolvedTestFile] = []
+            unmatchedPatterns: list[str] = []
+            for pattern in self.tests.keys():
+                if pattern.startswith("common."):
+                    filePaths = sorted(commonTestFolder.glob(pattern[7:] + ".lua"))
+                else:
+                    filePaths = sorted(
+                        (modFolder / "unit-tests").glob(pattern + ".lua")
+                    )
+                if not filePaths:
+                    unmatchedPatterns.append(pattern)
+                files.extend(
+                    ResolvedTestFile(pattern, filePath) for filePath in filePaths
+                )
+            self.resolvedTests[cacheKey] = ResolvedTests(files, unmatchedPatterns)
+        return self.resolvedTests[cacheKey]
+
     """
     def addDefaultSetting(
         self,
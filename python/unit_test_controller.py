@@ -1,6 +1,9 @@
 from __future__ import annotations
-from typing import Optional, Any
-import os, sys, shutil, getopt
+from typing import Optional, Any, Callable
+import os, sys, getopt, queue
+import json
+import math
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # from mod_builder import ModBuilder
@@ -8,10 +11,110 @@ from pathlib import Path
 from .modlist_controller import ModlistController
 from .settings_controller import SettingsController
 from .factorio_controller import FactorioController
-from .unit_test_configuration import UnitTestConfiguration
+from .job_workspace import JobWorkspace
+from .mod_directory_index import ModDirectoryIndex
+from .mod_resolver import ModResolver
+from .mod_sync import linkOrCopyFile, syncFiles
+from .result_cache import ResultCache
+from .test_report import ConfigurationResult, TestCaseResult, TestReport
+from .unit_test_configuration import ResolvedTests, UnitTestConfiguration
 from .unit_test_logger import UnitTestLogger
 
 
+def findDirectories(
+    userDataDirectory: Optional[Path] = None, modDirectory: Optional[Path] = None
+) -> tuple[Path, Path]:
+    # The user data and mod directory, defaulting to the standard locations
+    if not userDataDirectory:
+        if appdataPath := os.getenv("APPDATA"):
+            userDataDirectory = Path(appdataPath).expanduser().resolve() / "Factorio"
+        else:
+            raise FileNotFoundError("Could not find user data directory.")
+
+    if not modDirectory:
+        modDirectory = userDataDirectory / "mods"
+    return userDataDirectory, modDirectory
+
+
+def findModFolder(
+    modDirectory: Path, modIndex: ModDirectoryIndex, modName: str
+) -> Path:
+    # Mod folders may carry a version (modname_1.2.3), the index knows which one
+    return modIndex.getModFolder(modName) or modDirectory / modName
+
+
+def resolveTests(
+    testConfigurations: UnitTestConfiguration,
+    modDirectory: Path,
+    modIndex: ModDirectoryIndex,
+) -> ResolvedTests:
+    # Common tests come from the factorio-unit-test mod rather than the mod being tested
+    return testConfigurations.resolveTests(
+        findModFolder(modDirectory, modIndex, testConfigurations.modName),
+        findModFolder(modDirectory, modIndex, "factorio-unit-test") / "unit-tests",
+    )
+
+
+def shardConfigurations(
+    configurations: list[tuple[str, dict[str, Any]]], shardIndex: int, shardCount: int
+) -> tuple[list[tuple[str, dict[str, Any]]], Optional[tuple[int, int]]]:
+    """Selects the part of the configuration x unit test matrix tested by shard shardIndex (1-based) of shardCount.
+
+    Launches cost the most, so with at least as many configurations as shards the
+    configurations are distributed round-robin and each one runs all of its tests.
+    With fewer configurations every shard launches a single configuration, and the
+    shards sharing a configuration split its tests. Returns the configurations and
+    the test shard (index, count) within them, if the tests are split.
+    """
+    if not 1 <= shardIndex <= shardCount:
+        raise ValueError(f"Shard {shardIndex}/{shardCount} is invalid.")
+    if len(configurations) >= shardCount or not configurations:
+        return configurations[shardIndex - 1 :: shardCount], None
+    configurationIndex = (shardIndex - 1) % len(configurations)
+    testShardCount = len(range(configurationIndex, shardCount, len(configurations)))
+    testShardIndex = (shardIndex - 1) // len(configurations) + 1
+    testShard = (testShardIndex, testShardCount) if testShardCount > 1 else None
+    return [configurations[configurationIndex]], testShard
+
+
+class UnitTestInstance:
+    """The controllers driving a single Factorio instance and the mod directory it uses."""
+
+    modDirectory: Path
+    log: Callable[[str], None]
+    modlistController: ModlistController
+    settingsController: SettingsController
+    factorioController: FactorioController
+
+    def __init__(
+        self,
+        factorioPath: Optional[Path],
+        modDirectory: Path,
+        log: Callable[[str], None],
+        configPath: Optional[Path] = None,
+        launchProfile: str = "default",
+        factorioArgs: Optional[list[str]] = None,
+        timeouts: tuple[Optional[float], Optional[float], Optional[float]] = (
+            None,
+            None,
+            None,
+        ),
+    ):
+        self.modDirectory = modDirectory
+        self.log = log
+        self.modlistController = ModlistController(modDirectory=modDirectory)
+        self.settingsController = SettingsController(modDirectory=modDirectory)
+        self.factorioController = FactorioController(
+            factorioPath,
+            modDirectory,
+            log,
+            configPath,
+            launchProfile,
+            factorioArgs,
+            *timeouts,
+        )
+
+
 class UnitTestController:
     def __init__(
         self,
@@ -20,18 +123,39 @@ class UnitTestController:
         userDataDirectory: Optional[Path] = None,
         modDirectory: Optional[Path] = None,
         logToFile: bool = False,
+        jobs: int = 1,
+        startTick: Optional[int] = None,
+        launchProfile: str = "default",
+        factorioArgs: Optional[list[str]] = None,
+        useResultCache: bool = False,
+        resultCacheMaxEntries: int = 256,
+        resultCacheMaxAgeDays: float = 14,
+        groupRuntimeSettings: bool = True,
+        configurationTimeout: Optional[float] = None,
+        testTimeout: Optional[float] = None,
+        stallTimeout: Optional[float] = None,
+        resolveDependencies: bool = True,
+        testFilter: Optional[list[str]] = None,
+        shard: Optional[tuple[int, int]] = None,
     ):
-        if not userDataDirectory:
-            if appdataPath := os.getenv("APPDATA"):
-                userDataDirectory = (
-                    Path(appdataPath).expanduser().resolve() / "Factorio"
-                )
-            else:
-                raise FileNotFoundError("Could not find user data directory.")
-
-        if not modDirectory:
-            modDirectory = userDataDirectory / "mods"
-            self.modDirectory = modDirectory
+        userDataDirectory, modDirectory = findDirectories(
+            userDataDirectory, modDirectory
+        )
+        self.modDirectory = modDirectory
+        self.userDataDirectory = userDataDirectory
+        self.factorioPath = factorioPath
+        self.jobs = max(1, jobs)
+        self.startTick = startTick
+        self.launchProfile = launchProfile
+        self.factorioArgs = factorioArgs or []
+        self.groupRuntimeSettings = groupRuntimeSettings
+        self.timeouts = (configurationTimeout, testTimeout, stallTimeout)
+        self.resolveDependencies = resolveDependencies
+        # Names of the unit tests (or test files) to run, all when empty
+        self.testFilter = testFilter or []
+        # Part (index, count) of the configuration x unit test matrix to test
+        self.shard = shard
+        self.testShard: Optional[tuple[int, int]] = None
 
         """
         if updateMods:
@@ -39,6 +163,9 @@ class UnitTestController:
             self.__buildBobsMods()
         """
 
+        # Shared index of the installed mods
+        self.modIndex = ModDirectoryIndex(modDirectory)
+
         # Backup the current mod config and mod settings
         self.currentModlistController = ModlistController(
             userDataDirectory, modDirectory
@@ -52,18 +179,46 @@ class UnitTestController:
         # Logger for unit test output
         self.logger = UnitTestLogger(logToFile)
 
-        # New controllers for the unit tests
-        self.modlistController = ModlistController(userDataDirectory, modDirectory)
-        self.settingsController = SettingsController(userDataDirectory, modDirectory)
-        self.factorioController = FactorioController(
-            factorioPath, modDirectory, self.logger
+        # New controllers for the unit tests, using the shared mod directory
+        self.instance = UnitTestInstance(
+            factorioPath,
+            modDirectory,
+            self.logger,
+            launchProfile=launchProfile,
+            factorioArgs=self.factorioArgs,
+            timeouts=self.timeouts,
         )
+        self.jobWorkspaces: list[JobWorkspace] = []
+
+        # Fingerprints of passing configurations, to skip relaunching unchanged ones
+        self.resultCache: Optional[ResultCache] = None
+        if useResultCache:
+            self.resultCache = ResultCache(
+                userDataDirectory / "factorio-unit-test-cache",
+                resultCacheMaxEntries,
+                resultCacheMaxAgeDays,
+            )
+        self.cachedConfigurations: set[str] = set()
+        # Encoded settings files by their customisation, reused across configurations and runs
+        self.settingsFiles: dict[str, bytes] = dict()
+        # Why configurations failed without test results, e.g. the test that hung
+        self.failureReports: dict[str, str] = dict()
+        # Unit test results of every launched configuration
+        self.configurationResults: dict[str, ConfigurationResult] = dict()
+        # Structured results of the last run, e.g. to export them as a report
+        self.report: Optional[TestReport] = None
+        # Test files of the current run, resolved once for all configurations
+        self.resolvedTests: Optional[ResolvedTests] = None
+        # Folder of the factorio-unit-test mod, which may carry a version
+        self.testModFolderName = "factorio-unit-test"
 
     def __del__(self):
         # Reset mod config and mod settings to the backed up values
         self.currentModlistController.disableMod("factorio-unit-test")
         self.currentModlistController.writeConfigurationFile()
         self.currentSettingsController.writeSettingsFile()
+        for jobWorkspace in self.jobWorkspaces:
+            jobWorkspace.remove()
 
     def TestConfigurations(
         self,
@@ -71,15 +226,319 @@ class UnitTestController:
         logSummary: bool = True,
     ) -> None:
         testResults: dict[str, bool] = dict()
-        for configName, config in testConfigurations:
-            self.__logTestConfiguration(configName)
-            self.__setupTestConfiguration(config["mods"], config["settings"])
-            self.__setupTestFiles(testConfigurations.modName, testConfigurations.tests)
-            testResults[configName] = self.__executeUnitTests()
+        groupResults: dict[str, bool] = dict()
+        configurations = list(testConfigurations)
+        if self.shard is not None:
+            configurations, self.testShard = shardConfigurations(
+                configurations, *self.shard
+            )
+            self.logger(
+                f"Shard {self.shard[0]}/{self.shard[1]}: "
+                + ", ".join(configName for configName, _ in configurations)
+                + (
+                    f" (unit tests {self.testShard[0]}/{self.testShard[1]})"
+                    if self.testShard is not None
+                    else ""
+                )
+            )
+        selectedConfigNames = [configName for configName, _ in configurations]
+        self.modIndex.refresh()
+        self.testModFolderName = findModFolder(
+            self.modDirectory, self.modIndex, "factorio-unit-test"
+        ).name
+        if self.resolveDependencies:
+            configurations = self.__resolveConfigurations(configurations, groupResults)
+        configurationGroups = self.__groupConfigurations(configurations)
+        # The test bundle is the same for all configurations, build it once per run
+        self.resolvedTests = self.__setupTestFiles(testConfigurations)
+        # Encode every settings file up front, launches only compare and write them
+        for configurationGroup in configurationGroups:
+            self.__encodeSettings(self.__groupSettingCustomisation(configurationGroup))
+        if self.jobs > 1 and len(configurationGroups) > 1:
+            groupResults.update(
+                self.__testConfigurationGroupsInParallel(
+                    testConfigurations, configurationGroups
+                )
+            )
+        else:
+            for configurationGroup in configurationGroups:
+                groupResults.update(
+                    self.__testConfigurationGroup(
+                        self.instance, testConfigurations, configurationGroup
+                    )
+                )
+        # Report in configuration order, regardless of how configurations were grouped
+        for configName in selectedConfigNames:
+            testResults[configName] = groupResults[configName]
+        if self.resultCache is not None:
+            self.resultCache.writeCacheFile()
+        self.report = self.__createReport(testConfigurations, testResults)
         if logSummary:
             self.logger("Summary:", leading_newline=True)
             for testName, testResult in testResults.items():
-                self.logger(f"[{'PASSED' if testResult else 'FAILED'}] {testName}")
+                note = ""
+                if testName in self.cachedConfigurations:
+                    note = " (cached)"
+                elif testName in self.failureReports:
+                    note = f" ({self.failureReports[testName]})"
+                self.logger(
+                    f"[{'PASSED' if testResult else 'FAILED'}] {testName}{note}"
+                )
+                self.__logTestTimings(self.report.configurations[testName].testCases)
+
+    def __createReport(
+        self, testConfigurations: UnitTestConfiguration, testResults: dict[str, bool]
+    ) -> TestReport:
+        report = TestReport(testConfigurations.modName)
+        for configName, testResult in testResults.items():
+            launchedResult = self.configurationResults.get(configName)
+            report.add(
+                ConfigurationResult(
+                    configName,
+                    testResult,
+                    cached=configName in self.cachedConfigurations,
+                    failureReport=self.failureReports.get(configName),
+                    testCases=launchedResult.testCases if launchedResult else None,
+                    messages=launchedResult.messages if launchedResult else None,
+                )
+            )
+        return report
+
+    def __logTestTimings(self, testCases: dict[str, TestCaseResult]) -> None:
+        # Slowest unit tests first
+        timedTestCases = [
+            testCase for testCase in testCases.values() if testCase.timing is not None
+        ]
+        for testCase in sorted(
+            timedTestCases,
+            key=lambda testCase: testCase.timing.durationMs,
+            reverse=True,
+        ):
+            timing = testCase.timing
+            self.logger(
+                f"  {timing.durationMs:10.1f} ms {timing.memoryKiB:+10.1f} KiB"
+                f" {timing.ticks:6d} ticks  {testCase.name}"
+            )
+
+    def __resolveConfigurations(
+        self,
+        configurations: list[tuple[str, dict[str, Any]]],
+        testResults: dict[str, bool],
+    ) -> list[tuple[str, dict[str, Any]]]:
+        # Broken mod lists fail here instead of costing a launch each, required
+        # dependencies that are missing from a mod list are added to it
+        modResolver = ModResolver(self.modIndex)
+        modResolver.scanModDirectory()
+        resolvedConfigurations = []
+        for configName, config in configurations:
+            resolvedMods, errors = modResolver.resolve(
+                [*config["mods"], "factorio-unit-test"]
+            )
+            if errors:
+                self.logger(f"Skipping {configName}:", True)
+                for error in errors:
+                    self.logger(f"  {error}")
+                testResults[configName] = False
+                self.failureReports[configName] = "unresolvable mod list"
+                continue
+            addedMods = [
+                modName
+                for modName in resolvedMods
+                if modName not in config["mods"]
+                and modName not in ("base", "factorio-unit-test")
+            ]
+            if addedMods:
+                self.logger(
+                    f"Adding required dependencies to {configName}: {', '.join(addedMods)}"
+                )
+            resolvedConfigurations.append(
+                (configName, {**config, "mods": resolvedMods})
+            )
+        return resolvedConfigurations
+
+    def __groupConfigurations(
+        self, configurations: list[tuple[str, dict[str, Any]]]
+    ) -> list[list[tuple[str, dict[str, Any]]]]:
+        # Configurations that only differ in runtime-global settings can share a
+        # launch, the mod applies those settings itself before each test run
+        if not self.groupRuntimeSettings:
+            return [[(configName, config)] for configName, config in configurations]
+
+        configurationGroups: dict[str, list[tuple[str, dict[str, Any]]]] = dict()
+        for configName, config in configurations:
+            startupSettings = {
+                settingsStage: stageSettings
+                for settingsStage, stageSettings in config["settings"].items()
+                if settingsStage != "runtime-global"
+            }
+            groupKey = json.dumps(
+                [sorted(set(config["mods"]) | {"factorio-unit-test"}), startupSettings],
+                sort_keys=True,
+            )
+            configurationGroups.setdefault(groupKey, []).append((configName, config))
+        return list(configurationGroups.values())
+
+    def __groupSettingCustomisation(
+        self, configurationGroup: list[tuple[str, dict[str, Any]]]
+    ) -> dict[str, dict[str, Any]]:
+        # Runtime-global settings of grouped configurations are applied by the mod instead
+        settingCustomisation = configurationGroup[0][1]["settings"]
+        if len(configurationGroup) > 1:
+            settingCustomisation = {
+                settingsStage: stageSettings
+                for settingsStage, stageSettings in settingCustomisation.items()
+                if settingsStage != "runtime-global"
+            }
+        return settingCustomisation
+
+    def __encodeSettings(
+        self, settingCustomisation: dict[str, dict[str, Any]]
+    ) -> bytes:
+        # Default settings + custom settings, encoded once per distinct customisation
+        settingsKey = json.dumps(settingCustomisation, sort_keys=True)
+        if settingsKey not in self.settingsFiles:
+            settingsController = SettingsController(modDirectory=self.modDirectory)
+            settingsController.copySettings(self.currentSettingsController)
+            for settingsStage, stageSettings in settingCustomisation.items():
+                settingsController[settingsStage].update(stageSettings)
+            self.settingsFiles[settingsKey] = settingsController.encodeSettings()
+        return self.settingsFiles[settingsKey]
+
+    def __testConfigurationGroup(
+        self,
+        instance: UnitTestInstance,
+        testConfigurations: UnitTestConfiguration,
+        configurationGroup: list[tuple[str, dict[str, Any]]],
+    ) -> dict[str, bool]:
+        configNames = [configName for configName, _ in configurationGroup]
+        firstConfig = configurationGroup[0][1]
+        testOptions: dict[str, Any] = {
+            "start_tick": (
+                self.startTick
+                if self.startTick is not None
+                else testConfigurations.startTick
+            ),
+        }
+        if self.testFilter:
+            testOptions["tests"] = self.testFilter
+        if self.testShard is not None:
+            testOptions["test_shard"] = {
+                "index": self.testShard[0],
+                "count": self.testShard[1],
+            }
+        if testConfigurations.stepsPerTick is not None:
+            testOptions["steps_per_tick"] = testConfigurations.stepsPerTick
+        if len(configurationGroup) > 1:
+            # The mod applies the runtime-global settings of each variant in turn
+            testOptions["variants"] = [
+                {
+                    "name": configName,
+                    "settings": config["settings"].get("runtime-global", {}),
+                }
+                for configName, config in configurationGroup
+            ]
+
+        self.__logTestConfiguration(instance, configNames[0])
+        self.__setupTestConfiguration(
+            instance,
+            firstConfig["mods"],
+            self.__groupSettingCustomisation(configurationGroup),
+        )
+        self.__setupTestOptions(instance, testOptions)
+
+        fingerprint: Optional[str] = None
+        if self.resultCache is not None:
+            fingerprint = self.__fingerprintConfiguration(
+                instance, testConfigurations.factorioArgs
+            )
+            if self.resultCache.isCachedPass(fingerprint):
+                instance.log(
+                    f"Skipping launch, {', '.join(configNames)} unchanged since it last passed"
+                )
+                self.cachedConfigurations.update(configNames)
+                return {configName: True for configName in configNames}
+
+        testResults = self.__executeUnitTests(
+            instance, testConfigurations.factorioArgs, configNames
+        )
+        if all(testResults.values()) and fingerprint is not None:
+            self.resultCache.storePass(fingerprint, ", ".join(configNames))
+        return testResults
+
+    def __fingerprintConfiguration(
+        self, instance: UnitTestInstance, factorioArgs: list[str]
+    ) -> str:
+        # Everything the game reads for this configuration, as written to disk
+        testModDirectory = instance.modDirectory / self.testModFolderName
+        enabledMods = [
+            mod["name"] for mod in instance.modlistController.modlist if mod["enabled"]
+        ]
+        contentFiles = [
+            instance.modDirectory / "mod-settings.dat",
+            testModDirectory / "temp-test-options.lua",
+        ]
+        # The test files are covered by the hashes taken when they were resolved
+        testHashes = [
+            f"{testFile.name}:{testFile.sha1}" for testFile in self.resolvedTests.files
+        ]
+        return self.resultCache.fingerprint(
+            instance.factorioController.getGameVersion(),
+            enabledMods,
+            self.modIndex,
+            contentFiles,
+            [self.launchProfile, *self.factorioArgs, *factorioArgs, *testHashes],
+        )
+
+    def __testConfigurationGroupsInParallel(
+        self,
+        testConfigurations: UnitTestConfiguration,
+        configurationGroups: list[list[tuple[str, dict[str, Any]]]],
+    ) -> dict[str, bool]:
+        # Each job owns an isolated workspace, a free one is claimed per launch
+        jobCount = min(self.jobs, len(configurationGroups))
+        freeInstances: queue.Queue[UnitTestInstance] = queue.Queue()
+        for jobIndex in range(len(self.jobWorkspaces), jobCount):
+            self.jobWorkspaces.append(
+                JobWorkspace(
+                    jobIndex,
+                    self.modDirectory,
+                    self.userDataDirectory / "factorio-unit-test-jobs",
+                )
+            )
+        for jobWorkspace in self.jobWorkspaces[:jobCount]:
+            jobWorkspace.create(self.testModFolderName)
+            freeInstances.put(
+                UnitTestInstance(
+                    self.factorioPath,
+                    jobWorkspace.modDirectory,
+                    lambda msg, jobIndex=jobWorkspace.jobIndex: self.logger(
+                        f"[job {jobIndex}] {msg}"
+                    ),
+                    jobWorkspace.configPath,
+                    self.launchProfile,
+                    self.factorioArgs,
+                    self.timeouts,
+                )
+            )
+
+        def testConfigurationGroup(
+            configurationGroup: list[tuple[str, dict[str, Any]]],
+        ) -> dict[str, bool]:
+            instance = freeInstances.get()
+            try:
+                return self.__testConfigurationGroup(
+                    instance, testConfigurations, configurationGroup
+                )
+            finally:
+                freeInstances.put(instance)
+
+        testResults: dict[str, bool] = dict()
+        with ThreadPoolExecutor(max_workers=jobCount) as executor:
+            for groupResults in executor.map(
+                testConfigurationGroup, configurationGroups
+            ):
+                testResults.update(groupResults)
+        return testResults
 
     """
     def __buildAngelsMods(self) -> None:
@@ -111,78 +570,156 @@ class UnitTestController:
                 ModDownloader(name, self.factorioFolderDir).download()
     """
 
-    def __logTestConfiguration(self, configName: str) -> None:
-        self.logger(f"Testing {configName}", True)
+    def __logTestConfiguration(
+        self, instance: UnitTestInstance, configName: str
+    ) -> None:
+        if instance is self.instance:
+            self.logger(f"Testing {configName}", True)
+        else:
+            instance.log(f"Testing {configName}")
 
     def __setupTestConfiguration(
-        self, modList: list[str], settingCustomisation: dict[str, dict[str, bool]]
+        self,
+        instance: UnitTestInstance,
+        modList: list[str],
+        settingCustomisation: dict[str, dict[str, bool]],
     ) -> None:
         # Configure Mods
-        self.modlistController.readConfigurationFile()
-        self.modlistController.disableAllMods()
-        for modName in modList:
-            self.modlistController.enableMod(modName)
-        if "factorio-unit-test" not in modList:
-            self.modlistController.enableMod("factorio-unit-test")
-        self.modlistController.writeConfigurationFile()
-
-        # Revert settings file (default prior to changing the settings file)
-        self.currentSettingsController.writeSettingsFile()
+        modlistController = instance.modlistController
+        modlistController.copyModlist(self.currentModlistController)
+        modlistController.setEnabledSet([*modList, "factorio-unit-test"])
+        modlistController.writeConfigurationFile()
+
+        # Configure new settings, the file is only rewritten if it differs
+        instance.settingsController.writeSettingsBytes(
+            self.__encodeSettings(settingCustomisation)
+        )
+
+    def __setupTestFiles(
+        self, testConfigurations: UnitTestConfiguration
+    ) -> ResolvedTests:
+        # Link all test files into the test bundle and populate the test list file,
+        # parallel instances link the bundle of the shared mod directory
+        testModDirectory = self.modDirectory / self.testModFolderName
+        resolvedTests = resolveTests(
+            testConfigurations, self.modDirectory, self.modIndex
+        )
+        for pattern in resolvedTests.unmatchedPatterns:
+            self.logger(f"No matching test files found for {pattern}")
 
-        # Configure new settings (default settings + custom settings for this setup)
-        self.settingsController.readSettingsFile()
-        for settingsStage in settingCustomisation.keys():
-            for settingsName, settingsValue in settingCustomisation.get(
-                settingsStage
-            ).items():
-                self.settingsController.setSettingValue(
-                    settingsStage, settingsName, settingsValue
+        syncFiles(
+            {testFile.path.name: testFile.path for testFile in resolvedTests.files},
+            testModDirectory / "temp",
+            linkOrCopyFile,
+        )
+
+        # Only rewrite the test list when the resolved tests changed
+        testListFileStr = resolvedTests.getTestList()
+        testListPath = testModDirectory / "temp-test-list.lua"
+        if (
+            not testListPath.exists()
+            or testListPath.read_text(encoding="utf-8") != testListFileStr
+        ):
+            testListPath.write_text(testListFileStr, encoding="utf-8")
+        return resolvedTests
+
+    def __setupTestOptions(
+        self, instance: UnitTestInstance, testOptions: dict[str, Any]
+    ) -> None:
+        # Options read by the factorio-unit-test mod at runtime
+        testOptionsFileStr = "return {\n"
+        for optionName, optionValue in testOptions.items():
+            testOptionsFileStr += (
+                f"  {optionName} = {self.__toLuaValue(optionValue)},\n"
+            )
+        testOptionsFileStr += "}\n"
+        with (
+            instance.modDirectory / self.testModFolderName / "temp-test-options.lua"
+        ).open("w", encoding="utf-8") as tempTestOptionsFile:
+            tempTestOptionsFile.write(testOptionsFileStr)
+
+    def __toLuaValue(self, value: Any) -> str:
+        if value is None:
+            return "nil"
+        if type(value) is bool:
+            return "true" if value else "false"
+        if type(value) is int:
+            return repr(value)
+        if type(value) is float:
+            if math.isnan(value):
+                return "(0/0)"
+            if math.isinf(value):
+                return "math.huge" if value > 0 else "-math.huge"
+            return repr(value)
+        if type(value) is str:
+            return '"' + "".join(self.__escapeLuaChar(c) for c in value) + '"'
+        if type(value) in (list, tuple):
+            return "{" + ", ".join(self.__toLuaValue(v) for v in value) + "}"
+        if type(value) is dict:
+            return (
+                "{"
+                + ", ".join(
+                    f"[{self.__toLuaValue(k)}] = {self.__toLuaValue(v)}"
+                    for k, v in value.items()
                 )
-        self.settingsController.writeSettingsFile()
-
-    def __setupTestFiles(self, modName: str, testFiles: dict[str, Any]) -> None:
-        # Copy across all test files and populate test list file
-        modDirectory = self.modlistController.modDirectory
-        testDir = modDirectory / "factorio-unit-test/temp"
-        if testDir.exists():
-            shutil.rmtree(testDir)
-        testDir.mkdir()
-
-        # Build up test list file as we go
-        testListFileStr = "return {\n"
-
-        for test in testFiles.keys():
-            if test.startswith("common."):
-                test = test[7:]  # Remove 'common.' prefix
-                # Take from factorio-unit-test mod rather than the mod being tested
-                file_paths = sorted(
-                    (modDirectory / "factorio-unit-test" / "unit-tests").glob(test + ".lua")
+                + "}"
+            )
+        raise ValueError(f"Type '{type(value).__name__}' cannot be passed to Lua.")
+
+    @staticmethod
+    def __escapeLuaChar(char: str) -> str:
+        # Like string.format("%q"), control characters use three digits so a
+        # following digit can't become part of the escape sequence
+        if char in ('"', "\\"):
+            return "\\" + char
+        if char == "\n":
+            return "\\n"
+        if char == "\r":
+            return "\\r"
+        if ord(char) < 0x20 or ord(char) == 0x7F:
+            return f"\\{ord(char):03d}"
+        return char
+
+    def __executeUnitTests(
+        self,
+        instance: UnitTestInstance,
+        factorioArgs: list[str],
+        configNames: list[str],
+    ) -> dict[str, bool]:
+        # Execute unit tests for the current test configuration(s), the mod runs
+        # the tests once per configuration within a single launch
+        instance.factorioController.launchGame(factorioArgs)
+        testResults: dict[str, bool] = dict()
+        for configIndex, configName in enumerate(configNames):
+            if configIndex > 0:
+                self.__logTestConfiguration(instance, configName)
+            testResults[configName] = instance.factorioController.executeUnitTests()
+            self.configurationResults[configName] = ConfigurationResult(
+                configName,
+                testResults[configName],
+                testCases=instance.factorioController.testCases,
+                messages=instance.factorioController.configurationMessages,
+            )
+            if instance.factorioController.timeoutReport is not None:
+                self.failureReports[configName] = (
+                    instance.factorioController.timeoutReport
                 )
-                if not file_paths:
-                    self.logger(f"No matching test files found for common.{test}")
-                for file_path in file_paths:
-                    shutil.copy(file_path, testDir / file_path.name)
-                    testListFileStr += f'  "{file_path.stem}",\n'
-            else:
-                file_paths = sorted((modDirectory / modName / "unit-tests").glob(test + ".lua"))
-                if not file_paths:
-                    self.logger(f"No matching test files found for {test}")
-                for file_path in file_paths:
-                    shutil.copy(file_path, testDir / file_path.name)
-                    testListFileStr += f'  "{file_path.stem}",\n'
-
-        testListFileStr += "}\n"
-        with (modDirectory / "factorio-unit-test" / "temp-test-list.lua").open(
-            "w"
-        ) as tempTestListFile:
-            tempTestListFile.write(testListFileStr)
-
-    def __executeUnitTests(self) -> bool:
-        # Execute unit tests for the current test configuration
-        self.factorioController.launchGame()
-        testResult: bool = self.factorioController.executeUnitTests()
-        self.factorioController.terminateGame()
-        return testResult
+            if not instance.factorioController.finished:
+                # The game crashed, failed to load mods or hung, the remaining
+                # configurations of this launch can't be tested anymore
+                for remainingName in configNames[configIndex + 1 :]:
+                    testResults[remainingName] = False
+                    self.failureReports[remainingName] = (
+                        f"not tested, the launch broke in {configName}"
+                    )
+                    self.configurationResults[remainingName] = ConfigurationResult(
+                        remainingName,
+                        False,
+                        failureReport=self.failureReports[remainingName],
+                    )
+                break
+        instance.factorioController.terminateGame()
+        return testResults
 
 
 """
@@ -2,6 +2,7 @@ from __future__ import annotations
 from typing import Optional, TextIO
 
 import os
+import threading
 from datetime import datetime
 from pathlib import Path
 
@@ -10,6 +11,7 @@ class UnitTestLogger:
     logToFile: bool
     logFilePath: Path
     logFileHandler: Optional[TextIO]
+    lock: threading.Lock
 
     def __init__(self, logToFile: bool = False):
         self.logToFile = logToFile
@@ -17,6 +19,7 @@ class UnitTestLogger:
         log_filename = f"unit_test_{datetime.now().strftime('%Y%m%d-%H%M%S')}.txt"
         self.logFilePath = log_dir / log_filename
         self.logFileHandler = None
+        self.lock = threading.Lock()  # parallel jobs share one logger
 
         if self.logToFile:
             self.logFilePath.parent.mkdir(parents=True, exist_ok=True)
@@ -31,13 +34,14 @@ class UnitTestLogger:
 
     def __call__(self, msg: str, leading_newline: bool = False) -> None:
         lead = "\n" if leading_newline else ""
-        print(f"{lead}factorio-unit-test: {msg}")
-        if self.logToFile and self.logFileHandler:
-            print(
-                f"{lead}factorio-unit-test: {msg}",
-                file=self.logFileHandler,
-                flush=True,
-            )
+        with self.lock:
+            print(f"{lead}factorio-unit-test: {msg}")
+            if self.logToFile and self.logFileHandler:
+                print(
+                    f"{lead}factorio-unit-test: {msg}",
+                    file=self.logFileHandler,
+                    flush=True,
+                )
 
 
 if __name__ == "__main__":
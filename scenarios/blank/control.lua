@@ -0,0 +1,11 @@
+-- A minimal scenario for unit testing: no freeplay intro or crash site, and a
+-- small lab tile map so as little time as possible is spent on map generation.
+script.on_init(function()
+  local surface = game.surfaces["nauvis"]
+  surface.generate_with_lab_tiles = true
+
+  local map_gen_settings = surface.map_gen_settings
+  map_gen_settings.width = 64
+  map_gen_settings.height = 64
+  surface.map_gen_settings = map_gen_settings
+end)
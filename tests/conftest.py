@@ -0,0 +1,146 @@
+import sys
+import hashlib
+import json
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+# factorio-unit-test.py runs from the repository root and imports the python
+# package from there, the tests do the same
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+class StandInPortal:
+    """A local stand-in for the mod portal API and its downloads.
+
+    Downloads support Range requests, mod responses carry an ETag and answer
+    conditional requests with 304. Every request is recorded with its headers.
+    """
+
+    def __init__(self):
+        self.files: dict[str, bytes] = {}  # download path -> content
+        self.mods: dict[str, dict] = {}  # mod name -> API data
+        self.ignoreRange = False
+        self.truncateAfter: dict[str, int] = {}  # download path -> bytes sent once
+        self.failListRequests = False
+        self.requests: list[tuple[str, dict[str, str]]] = []
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self.__createHandler())
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, args=(0.05,), daemon=True
+        )
+        self.thread.start()
+
+    def addFile(self, path: str, content: bytes) -> tuple[str, str]:
+        # Returns the download url and sha1 of the file
+        self.files[path] = content
+        return f"{self.url}{path}", hashlib.sha1(content).hexdigest()
+
+    def addMod(self, modName: str, versions: list[str]) -> None:
+        self.mods[modName] = {
+            "name": modName,
+            "releases": [{"version": version} for version in versions],
+        }
+
+    def requestedPaths(self) -> list[str]:
+        return [path for path, _ in self.requests]
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def etag(self, modName: str) -> str:
+        releases = self.mods[modName]["releases"]
+        return f'"{modName}-{releases[-1]["version"]}"'
+
+    def __createHandler(self):
+        portal = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                portal.requests.append((self.path, dict(self.headers)))
+                path, _, query = self.path.partition("?")
+                if path in portal.files:
+                    self.sendFile(path)
+                elif path == "/api/mods":
+                    self.sendModList(urllib.parse.parse_qs(query))
+                elif path.startswith("/api/mods/"):
+                    self.sendMod(urllib.parse.unquote(path[len("/api/mods/") :]))
+                else:
+                    self.send_error(404)
+
+            def sendFile(self, path):
+                content = portal.files[path]
+                offset = 0
+                rangeHeader = self.headers.get("Range")
+                if rangeHeader and not portal.ignoreRange:
+                    offset = int(rangeHeader[len("bytes=") :].rstrip("-"))
+                    if offset >= len(content):
+                        self.send_error(416)
+                        return
+                    self.send_response(206)
+                    self.send_header(
+                        "Content-Range",
+                        f"bytes {offset}-{len(content) - 1}/{len(content)}",
+                    )
+                else:
+                    self.send_response(200)
+                self.send_header("Content-Length", str(len(content) - offset))
+                self.end_headers()
+                body = content[offset:]
+                if path in portal.truncateAfter:
+                    # The connection drops after part of the body
+                    body = body[: portal.truncateAfter.pop(path)]
+                    self.close_connection = True
+                self.wfile.write(body)
+
+            def sendModList(self, query):
+                if portal.failListRequests:
+                    self.send_error(500)
+                    return
+                names = query.get("namelist", [""])[0].split(",")
+                results = [
+                    {
+                        "name": name,
+                        "latest_release": portal.mods[name]["releases"][-1],
+                    }
+                    for name in names
+                    if name in portal.mods
+                ]
+                self.sendJson({"results": results})
+
+            def sendMod(self, modName):
+                if modName not in portal.mods:
+                    self.send_error(404)
+                    return
+                etag = portal.etag(modName)
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                self.sendJson(portal.mods[modName], {"ETag": etag})
+
+            def sendJson(self, data, headers=None):
+                body = json.dumps(data).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # keep the test output clean
+
+        return Handler
+
+
+@pytest.fixture
+def standInPortal():
+    portal = StandInPortal()
+    yield portal
+    portal.close()
@@ -0,0 +1,85 @@
+import subprocess
+import sys
+
+from python.game_output_reader import GameEventType, GameOutputReader
+
+# Lines as printed by the factorio-unit-test mod, the timing line contains a LuaProfiler
+gameOutput = [
+    "   0.512 Loading mod core 0.0.0 (data.lua)",
+    "factorio-unit-test: Starting 2 unit tests...",
+    "factorio-unit-test: Starting unit test unit_test_001.",
+    "factorio-unit-test:     Recipe x is broken.",
+    "factorio-unit-test: Timing of unit test unit_test_001:"
+    " Duration: 12.345678ms, 3.5 KiB Lua memory, 0 ticks",
+    "factorio-unit-test: Unit test unit_test_001 FAILED!",
+    "factorio-unit-test: Starting unit test unit_test_002.",
+    "factorio-unit-test: Timing of unit test unit_test_002:"
+    " Duration: 1500ms, -0.2 KiB Lua memory, 41 ticks",
+    "factorio-unit-test: Unit test unit_test_002 PASSED!",
+    "factorio-unit-test: Finished testing! Some unit tests failed!",
+]
+
+
+def startGameOutput(lines):
+    # A process printing the lines stands in for the game
+    return (
+        subprocess.Popen(
+            [sys.executable, "-c", "import sys; sys.stdout.write(sys.stdin.read())"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+        ),
+        "\n".join(lines) + "\n",
+    )
+
+
+def readEvents(lines):
+    process, output = startGameOutput(lines)
+    reader = GameOutputReader(process)
+    process.stdin.write(output.encode("utf-8"))
+    process.stdin.close()
+    events = list(reader.events())
+    reader.join()
+    process.stdout.close()
+    return events
+
+
+def test_parsesUnitTestOutput():
+    events = readEvents(gameOutput)
+    assert [(event.type, event.testName) for event in events] == [
+        (GameEventType.MESSAGE, None),
+        (GameEventType.TEST_STARTED, "unit_test_001"),
+        (GameEventType.MESSAGE, None),
+        (GameEventType.TEST_TIMING, "unit_test_001"),
+        (GameEventType.TEST_FAILED, "unit_test_001"),
+        (GameEventType.TEST_STARTED, "unit_test_002"),
+        (GameEventType.TEST_TIMING, "unit_test_002"),
+        (GameEventType.TEST_PASSED, "unit_test_002"),
+        (GameEventType.FINISHED, None),
+        (GameEventType.EXITED, None),
+    ]
+    assert events[-2].passed is False
+
+
+def test_parsesProfilerTimings():
+    timings = [
+        event.timing
+        for event in readEvents(gameOutput)
+        if event.type is GameEventType.TEST_TIMING
+    ]
+    assert [
+        (timing.durationMs, timing.memoryKiB, timing.ticks) for timing in timings
+    ] == [(12.345678, 3.5, 0), (1500.0, -0.2, 41)]
+
+
+def test_parsesLoadErrorsAndCrashes():
+    events = readEvents(
+        [
+            "   1.234 Error ModManager.cpp:1560: Failed to load mod my-mod",
+            "   2.345 Error MainLoop.cpp:1234: Exception at tick 12",
+        ]
+    )
+    assert [(event.type, event.message) for event in events[:2]] == [
+        (GameEventType.MOD_LOAD_ERROR, "Failed to load mod my-mod"),
+        (GameEventType.CRASH, "2.345 Error MainLoop.cpp:1234: Exception at tick 12"),
+    ]
@@ -0,0 +1,111 @@
+import urllib.error
+
+import pytest
+
+from python.mod_download_engine import ModDownload, ModDownloadEngine
+
+modZip = bytes(range(256)) * 1024  # larger than a chunk
+
+
+@pytest.fixture
+def engine(tmp_path):
+    return ModDownloadEngine(tmp_path / "cache", retries=1, timeout=10)
+
+
+def createDownload(portal, tmp_path, content=modZip, sha1=None):
+    url, contentSha1 = portal.addFile("/download/my-mod_1.0.0.zip", content)
+    return ModDownload(
+        "my-mod",
+        "my-mod_1.0.0.zip",
+        url,
+        sha1 or contentSha1,
+        tmp_path / "mods" / "my-mod_1.0.0.zip",
+    )
+
+
+def getPartPath(engine, download):
+    return engine.cacheDirectory / download.sha1[:2] / f"{download.sha1}.zip.part"
+
+
+def writePart(engine, download, content):
+    partPath = getPartPath(engine, download)
+    partPath.parent.mkdir(parents=True)
+    partPath.write_bytes(content)
+
+
+def test_downloadAndInstall(standInPortal, engine, tmp_path):
+    download = createDownload(standInPortal, tmp_path)
+    download.destination.parent.mkdir()
+    engine.install(download)
+    assert download.destination.read_bytes() == modZip
+    assert engine.isCached(download)
+    assert not getPartPath(engine, download).exists()
+
+    # Installing again is served from the cache
+    engine.install(download)
+    assert len(standInPortal.requests) == 1
+
+
+def test_resumeWithRange(standInPortal, engine, tmp_path):
+    download = createDownload(standInPortal, tmp_path)
+    writePart(engine, download, modZip[:1000])
+    assert engine.fetch(download).read_bytes() == modZip
+    [(_, headers)] = standInPortal.requests
+    assert headers["Range"] == "bytes=1000-"
+
+
+def test_resumeAfterDroppedConnection(standInPortal, engine, tmp_path):
+    download = createDownload(standInPortal, tmp_path)
+    standInPortal.truncateAfter["/download/my-mod_1.0.0.zip"] = 100000
+    assert engine.fetch(download).read_bytes() == modZip
+    [(_, firstHeaders), (_, retryHeaders)] = standInPortal.requests
+    assert "Range" not in firstHeaders
+    assert retryHeaders["Range"] == "bytes=100000-"
+
+
+def test_completePartIsAnswered416(standInPortal, engine, tmp_path):
+    download = createDownload(standInPortal, tmp_path)
+    writePart(engine, download, modZip)
+    assert engine.fetch(download).read_bytes() == modZip
+    [(_, headers)] = standInPortal.requests
+    assert headers["Range"] == f"bytes={len(modZip)}-"
+
+
+def test_restartWhenRangeIsIgnored(standInPortal, engine, tmp_path):
+    download = createDownload(standInPortal, tmp_path)
+    writePart(engine, download, b"stale bytes")
+    standInPortal.ignoreRange = True
+    assert engine.fetch(download).read_bytes() == modZip
+    assert len(standInPortal.requests) == 1
+
+
+def test_rejectChecksumMismatch(standInPortal, engine, tmp_path):
+    download = createDownload(standInPortal, tmp_path, sha1="0" * 40)
+    with pytest.raises(ValueError, match="Checksum mismatch"):
+        engine.fetch(download)
+    assert not getPartPath(engine, download).exists()
+    assert not engine.isCached(download)
+    assert engine.fetchAll([download])["my-mod"].startswith(
+        "Could not download 'my-mod_1.0.0.zip': Checksum mismatch"
+    )
+
+
+def test_clientErrorsAreNotRetried(standInPortal, engine, tmp_path):
+    download = createDownload(standInPortal, tmp_path)
+    download.url = f"{standInPortal.url}/download/missing.zip"
+    with pytest.raises(urllib.error.HTTPError):
+        engine.fetch(download)
+    assert len(standInPortal.requests) == 1
+
+
+def test_offline(standInPortal, engine, tmp_path):
+    download = createDownload(standInPortal, tmp_path)
+    engine.fetch(download)
+    standInPortal.requests.clear()
+
+    offlineEngine = ModDownloadEngine(engine.cacheDirectory, offline=True)
+    assert offlineEngine.fetch(download).read_bytes() == modZip
+    otherDownload = createDownload(standInPortal, tmp_path, content=b"other")
+    with pytest.raises(FileNotFoundError, match="not in the download cache"):
+        offlineEngine.fetch(otherDownload)
+    assert standInPortal.requests == []
@@ -0,0 +1,79 @@
+import pytest
+
+from python.mod_portal_cache import ModPortalCache
+
+
+@pytest.fixture
+def portal(standInPortal):
+    standInPortal.addMod("my-mod", ["1.0.0", "1.1.0"])
+    standInPortal.addMod("other-mod", ["0.1.0"])
+    return standInPortal
+
+
+def createCache(portal, tmp_path, **options):
+    return ModPortalCache(tmp_path / "cache", portalUrl=portal.url, **options)
+
+
+def test_fetchAndReuseFreshEntries(portal, tmp_path):
+    cache = createCache(portal, tmp_path)
+    results = cache.getMods(["my-mod", "other-mod", "missing-mod"])
+    assert results["my-mod"] == portal.mods["my-mod"]
+    assert results["other-mod"] == portal.mods["other-mod"]
+    assert results["missing-mod"] == "Could not find a mod named 'missing-mod'."
+    with pytest.raises(NameError):
+        cache.getMod("missing-mod")
+    assert sorted(portal.requestedPaths()) == [
+        "/api/mods/missing-mod",
+        "/api/mods/my-mod",
+        "/api/mods/other-mod",
+    ]
+
+    # Fresh entries are read back from the cache file without asking the portal
+    portal.requests.clear()
+    assert createCache(portal, tmp_path).getMod("my-mod") == portal.mods["my-mod"]
+    assert portal.requests == []
+
+
+def test_renewUnchangedWithListRequest(portal, tmp_path):
+    createCache(portal, tmp_path).getMods(["my-mod", "other-mod"])
+    portal.requests.clear()
+
+    portal.addMod("other-mod", ["0.1.0", "0.2.0"])
+    cache = createCache(portal, tmp_path, maxAgeSeconds=-1)
+    assert cache.getMods(["my-mod", "other-mod"]) == {
+        "my-mod": portal.mods["my-mod"],
+        "other-mod": portal.mods["other-mod"],
+    }
+    # Only the changed mod is requested on its own
+    [listPath, modPath] = portal.requestedPaths()
+    assert listPath.startswith("/api/mods?namelist=my-mod%2Cother-mod")
+    assert modPath == "/api/mods/other-mod"
+
+
+def test_revalidateWithETag(portal, tmp_path):
+    createCache(portal, tmp_path).getMod("my-mod")
+    portal.requests.clear()
+
+    portal.failListRequests = True
+    cache = createCache(portal, tmp_path, maxAgeSeconds=-1)
+    assert cache.getMod("my-mod") == portal.mods["my-mod"]
+    [_, (path, headers)] = portal.requests
+    assert path == "/api/mods/my-mod"
+    assert headers["If-None-Match"] == portal.etag("my-mod")
+
+    # The 304 renewed the entry
+    portal.requests.clear()
+    assert createCache(portal, tmp_path).getMod("my-mod") == portal.mods["my-mod"]
+    assert portal.requests == []
+
+
+def test_offline(portal, tmp_path):
+    createCache(portal, tmp_path).getMod("my-mod")
+    portal.requests.clear()
+
+    cache = createCache(portal, tmp_path, maxAgeSeconds=-1, offline=True)
+    assert cache.getMods(["my-mod", "other-mod"]) == {
+        "my-mod": portal.mods["my-mod"],
+        "other-mod": "Could not find a mod named 'other-mod' in the offline cache.",
+    }
+    assert portal.requests == []
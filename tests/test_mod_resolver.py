@@ -0,0 +1,113 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from python.mod_directory_index import ModDirectoryIndex
+from python.mod_resolver import ModDependency, ModResolver
+
+
+@pytest.mark.parametrize(
+    "dependency, kind, name, operator, version",
+    [
+        ("base", "required", "base", None, None),
+        ("base >= 2.0", "required", "base", ">=", "2.0"),
+        ("? bobplates>=1.1.0", "optional", "bobplates", ">=", "1.1.0"),
+        ("(?) angels refining < 0.12", "optional", "angels refining", "<", "0.12"),
+        ("! quality", "incompatible", "quality", None, None),
+        ("~ space-age = 2.0.7", "required", "space-age", "=", "2.0.7"),
+    ],
+)
+def test_parseDependency(dependency, kind, name, operator, version):
+    modDependency = ModDependency(dependency)
+    assert modDependency.kind == kind
+    assert modDependency.name == name
+    assert modDependency.operator == operator
+    assert modDependency.version == version
+
+
+@pytest.mark.parametrize("dependency", ["", "base >=", "base >= 1..2", "base => 1"])
+def test_invalidDependency(dependency):
+    with pytest.raises(ValueError):
+        ModDependency(dependency)
+
+
+def test_isSatisfiedBy():
+    assert ModDependency("base >= 2.0").isSatisfiedBy("2.0.0")
+    assert ModDependency("base >= 0.9").isSatisfiedBy("0.10.0")
+    assert not ModDependency("base < 2").isSatisfiedBy("2.0.0")
+    assert ModDependency("base = 2.0").isSatisfiedBy("2.0.0")
+    assert ModDependency("base").isSatisfiedBy(None)
+
+
+def addMod(modDirectory: Path, name: str, version: str, dependencies=None) -> None:
+    info = {"name": name, "version": version}
+    if dependencies is not None:
+        info["dependencies"] = dependencies
+    modFolder = modDirectory / f"{name}_{version}"
+    modFolder.mkdir()
+    (modFolder / "info.json").write_text(json.dumps(info), encoding="utf-8")
+
+
+@pytest.fixture
+def modDirectory(tmp_path):
+    modDirectory = tmp_path / "mods"
+    modDirectory.mkdir()
+    return modDirectory
+
+
+def createResolver(modDirectory: Path) -> ModResolver:
+    modResolver = ModResolver(ModDirectoryIndex(modDirectory))
+    modResolver.scanModDirectory()
+    return modResolver
+
+
+def test_resolveAddsRequiredDependencies(modDirectory):
+    addMod(modDirectory, "a", "1.0.0", ["base >= 2.0", "b", "? c", "! d"])
+    addMod(modDirectory, "b", "1.0.0")
+    addMod(modDirectory, "c", "1.0.0")
+
+    resolvedMods, errors = createResolver(modDirectory).resolve(["a"])
+    assert resolvedMods == ["a", "base", "b"]
+    assert errors == []
+
+
+def test_resolveUsesTheHighestVersion(modDirectory):
+    addMod(modDirectory, "a", "1.0.0", ["b >= 0.10"])
+    addMod(modDirectory, "b", "0.9.0")
+    addMod(modDirectory, "b", "0.10.0")
+
+    modResolver = createResolver(modDirectory)
+    assert modResolver.getMod("b").version == "0.10.0"
+    assert modResolver.resolve(["a"])[1] == []
+
+
+def test_resolveReportsErrors(modDirectory):
+    addMod(modDirectory, "a", "1.0.0", ["b >= 2.0", "missing"])
+    addMod(modDirectory, "b", "1.0.0", ["! c"])
+    addMod(modDirectory, "c", "1.0.0")
+
+    resolvedMods, errors = createResolver(modDirectory).resolve(["a", "c"])
+    assert resolvedMods == ["a", "c", "b", "missing", "base"]
+    assert errors == [
+        "Mod missing is not installed.",
+        "Mod a requires b >= 2.0, but version 1.0.0 is installed.",
+        "Mod b is incompatible with c.",
+    ]
+
+
+def test_invalidModsOnlyFailModListsUsingThem(modDirectory):
+    addMod(modDirectory, "a", "1.0.0")
+    addMod(modDirectory, "bad-version", "one")
+    addMod(modDirectory, "bad-dependency", "1.0.0", ["base >= 1..2"])
+
+    modResolver = createResolver(modDirectory)
+    assert modResolver.resolve(["a"]) == (["a", "base"], [])
+
+    _, errors = modResolver.resolve(["a", "bad-version", "bad-dependency"])
+    assert errors == [
+        "Mod bad-version (bad-version_one) has an invalid info.json:"
+        " Invalid version 'one'.",
+        "Mod bad-dependency (bad-dependency_1.0.0) has an invalid info.json:"
+        " Invalid version '1..2'.",
+    ]
@@ -0,0 +1,70 @@
+import os
+import zipfile
+
+import pytest
+
+from python.mod_sync import packageZip
+
+
+@pytest.fixture
+def modFolder(tmp_path):
+    modFolder = tmp_path / "my-mod"
+    (modFolder / "prototypes").mkdir(parents=True)
+    (modFolder / "__pycache__").mkdir()
+    (modFolder / "info.json").write_text('{"name": "my-mod"}', encoding="utf-8")
+    (modFolder / "data.lua").write_text('require("prototypes.items")', encoding="utf-8")
+    (modFolder / "prototypes" / "items.lua").write_bytes(bytes(range(256)) * 64)
+    (modFolder / "__pycache__" / "ignored.pyc").write_bytes(b"ignored")
+    return modFolder
+
+
+def readZip(zipPath):
+    with zipfile.ZipFile(zipPath) as modZip:
+        assert modZip.testzip() is None
+        return {info.filename: modZip.read(info) for info in modZip.infolist()}
+
+
+def test_packageZipRoundTrip(modFolder, tmp_path):
+    zipPath = tmp_path / "my-mod_1.0.0.zip"
+    assert packageZip(modFolder, zipPath, "my-mod_1.0.0") == (3, 0)
+    assert readZip(zipPath) == {
+        "my-mod_1.0.0/data.lua": b'require("prototypes.items")',
+        "my-mod_1.0.0/info.json": b'{"name": "my-mod"}',
+        "my-mod_1.0.0/prototypes/items.lua": bytes(range(256)) * 64,
+    }
+    assert not zipPath.with_name(zipPath.name + ".tmp").exists()
+
+
+def test_unchangedZipIsNotRewritten(modFolder, tmp_path):
+    zipPath = tmp_path / "my-mod_1.0.0.zip"
+    packageZip(modFolder, zipPath, "my-mod_1.0.0")
+    zipStats = zipPath.stat()
+    assert packageZip(modFolder, zipPath, "my-mod_1.0.0") == (0, 3)
+    assert zipPath.stat().st_mtime_ns == zipStats.st_mtime_ns
+
+
+def test_changedFilesAreRepacked(modFolder, tmp_path):
+    zipPath = tmp_path / "my-mod_1.0.0.zip"
+    packageZip(modFolder, zipPath, "my-mod_1.0.0")
+
+    # Same size and timestamp, only the content (CRC) differs
+    dataPath = modFolder / "data.lua"
+    dataStats = dataPath.stat()
+    dataPath.write_text('require("prototypes.fluid")', encoding="utf-8")
+    os.utime(dataPath, ns=(dataStats.st_atime_ns, dataStats.st_mtime_ns))
+    (modFolder / "prototypes" / "items.lua").unlink()
+    (modFolder / "control.lua").write_text("", encoding="utf-8")
+
+    assert packageZip(modFolder, zipPath, "my-mod_1.0.0") == (3, 0)
+    assert readZip(zipPath) == {
+        "my-mod_1.0.0/control.lua": b"",
+        "my-mod_1.0.0/data.lua": b'require("prototypes.fluid")',
+        "my-mod_1.0.0/info.json": b'{"name": "my-mod"}',
+    }
+
+
+def test_invalidZipIsReplaced(modFolder, tmp_path):
+    zipPath = tmp_path / "my-mod_1.0.0.zip"
+    zipPath.write_bytes(b"not a zip")
+    assert packageZip(modFolder, zipPath, "my-mod_1.0.0") == (3, 0)
+    assert len(readZip(zipPath)) == 3
@@ -0,0 +1,32 @@
+import pytest
+
+from python.mod_version import ModVersion, parseVersion
+
+
+def test_comparesNumerically():
+    assert ModVersion("0.10.0") > ModVersion("0.9.0")
+    assert ModVersion("1.1.100") > ModVersion("1.1.99")
+    assert sorted(["2.0.1", "0.18.47", "1.1.110", "1.1.9"], key=ModVersion) == [
+        "0.18.47",
+        "1.1.9",
+        "1.1.110",
+        "2.0.1",
+    ]
+
+
+def test_missingPartsAreZero():
+    assert ModVersion("2.0") == ModVersion("2.0.0")
+    assert ModVersion("2") < ModVersion("2.0.1")
+    assert str(ModVersion(" 1.1 ")) == "1.1.0"
+    assert repr(ModVersion("1.2.3")) == "ModVersion('1.2.3')"
+
+
+@pytest.mark.parametrize("version", ["", "1.x.0", "1..2", "v1.0.0"])
+def test_invalidVersions(version):
+    with pytest.raises(ValueError, match="Invalid version"):
+        ModVersion(version)
+
+
+def test_parseVersionIsCached():
+    assert parseVersion("1.0.0") is parseVersion("1.0.0")
+    assert parseVersion("1.0") == parseVersion("1.0.0")
@@ -0,0 +1,110 @@
+import hashlib
+import json
+
+from python.mod_directory_index import ModDirectoryIndex
+from python.unit_test_configuration import UnitTestConfiguration
+from python.unit_test_controller import findModFolder, resolveTests
+
+
+def createModDirectory(tmp_path):
+    modDirectory = tmp_path / "mods"
+    modFolder = modDirectory / "my-mod_1.0.0"
+    (modFolder / "unit-tests").mkdir(parents=True)
+    (modFolder / "info.json").write_text(
+        json.dumps({"name": "my-mod", "version": "1.0.0"}), encoding="utf-8"
+    )
+    for testName in ("unit-test-b", "unit-test-a", "helper"):
+        (modFolder / "unit-tests" / f"{testName}.lua").write_text(
+            f"-- {testName}", encoding="utf-8"
+        )
+    commonTestFolder = modDirectory / "factorio-unit-test" / "unit-tests"
+    commonTestFolder.mkdir(parents=True)
+    for testName in ("unit-test-001", "unit-test-002", "unit-test-010"):
+        (commonTestFolder / f"{testName}.lua").write_text(
+            f"-- {testName}", encoding="utf-8"
+        )
+    return modDirectory
+
+
+def createConfiguration(tests):
+    testConfigurations = UnitTestConfiguration("my-mod", None)
+    testConfigurations.tests = tests
+    return testConfigurations
+
+
+def test_resolvesPatternsInOrder(tmp_path):
+    modDirectory = createModDirectory(tmp_path)
+    modIndex = ModDirectoryIndex(modDirectory)
+    modIndex.refresh()
+    testConfigurations = createConfiguration(
+        {"unit-test-*": {}, "common.unit-test-00?": {}, "missing": {}}
+    )
+
+    resolvedTests = resolveTests(testConfigurations, modDirectory, modIndex)
+    assert [(testFile.pattern, testFile.name) for testFile in resolvedTests.files] == [
+        ("unit-test-*", "unit-test-a"),
+        ("unit-test-*", "unit-test-b"),
+        ("common.unit-test-00?", "unit-test-001"),
+        ("common.unit-test-00?", "unit-test-002"),
+    ]
+    assert resolvedTests.unmatchedPatterns == ("missing",)
+    assert resolvedTests.files[0].path == (
+        modDirectory / "my-mod_1.0.0" / "unit-tests" / "unit-test-a.lua"
+    )
+    assert resolvedTests.files[0].sha1 == hashlib.sha1(b"-- unit-test-a").hexdigest()
+    assert resolvedTests.getTestList() == (
+        "return {\n"
+        '  "unit-test-a",\n'
+        '  "unit-test-b",\n'
+        '  "unit-test-001",\n'
+        '  "unit-test-002",\n'
+        "}\n"
+    )
+
+
+def test_resolvedTestsAreCached(tmp_path):
+    modDirectory = createModDirectory(tmp_path)
+    modIndex = ModDirectoryIndex(modDirectory)
+    modIndex.refresh()
+    testConfigurations = createConfiguration({"unit-test-*": {}})
+
+    resolvedTests = resolveTests(testConfigurations, modDirectory, modIndex)
+    (modDirectory / "my-mod_1.0.0" / "unit-tests" / "unit-test-c.lua").touch()
+    assert resolveTests(testConfigurations, modDirectory, modIndex) is resolvedTests
+
+
+def test_unindexedModUsesItsDefaultFolder(tmp_path):
+    modDirectory = tmp_path / "mods"
+    (modDirectory / "my-mod" / "unit-tests").mkdir(parents=True)
+    (modDirectory / "my-mod" / "unit-tests" / "unit-test-a.lua").touch()
+    testConfigurations = createConfiguration({"unit-test-a": {}})
+
+    resolvedTests = resolveTests(
+        testConfigurations, modDirectory, ModDirectoryIndex(modDirectory)
+    )
+    assert [testFile.name for testFile in resolvedTests.files] == ["unit-test-a"]
+
+
+def test_versionedFoldersAreFoundThroughTheIndex(tmp_path):
+    modDirectory = createModDirectory(tmp_path)
+    testModFolder = modDirectory / "factorio-unit-test_0.2.0"
+    (modDirectory / "factorio-unit-test").rename(testModFolder)
+    (testModFolder / "info.json").write_text(
+        json.dumps({"name": "factorio-unit-test", "version": "0.2.0"}),
+        encoding="utf-8",
+    )
+    modIndex = ModDirectoryIndex(modDirectory)
+    modIndex.refresh()
+
+    assert findModFolder(modDirectory, modIndex, "my-mod") == (
+        modDirectory / "my-mod_1.0.0"
+    )
+    assert findModFolder(modDirectory, modIndex, "other-mod") == (
+        modDirectory / "other-mod"
+    )
+    resolvedTests = resolveTests(
+        createConfiguration({"common.unit-test-010": {}}), modDirectory, modIndex
+    )
+    assert [testFile.path for testFile in resolvedTests.files] == [
+        testModFolder / "unit-tests" / "unit-test-010.lua"
+    ]
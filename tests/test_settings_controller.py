@@ -0,0 +1,142 @@
+import struct
+from pathlib import Path
+
+from python.settings_controller import SettingsController
+
+
+def encodeString(value: str) -> bytes:
+    data = value.encode("utf-8")
+    return b"\x00" + bytes([len(data)]) + data
+
+
+def encodeDictionary(entries: list[tuple[str, bytes]]) -> bytes:
+    return (
+        b"\x05\x00"
+        + struct.pack("<I", len(entries))
+        + b"".join(encodeString(key) + value for key, value in entries)
+    )
+
+
+def encodeSetting(value: bytes) -> bytes:
+    return encodeDictionary([("value", value)])
+
+
+# A mod-settings.dat as written by the game, following
+# https://wiki.factorio.com/Mod_settings_file_format
+settingsFile = (
+    struct.pack("<4H", 2, 0, 28, 0)
+    + b"\x00"
+    + encodeDictionary(
+        [
+            (
+                "startup",
+                encodeDictionary(
+                    [
+                        ("bool-setting", encodeSetting(b"\x01\x00\x01")),
+                        (
+                            "double-setting",
+                            encodeSetting(b"\x02\x00" + struct.pack("<d", 0.5)),
+                        ),
+                    ]
+                ),
+            ),
+            (
+                "runtime-global",
+                encodeDictionary(
+                    [
+                        (
+                            "string-setting",
+                            encodeSetting(b"\x03\x00" + encodeString("é")),
+                        ),
+                        (
+                            "int-setting",
+                            encodeSetting(b"\x06\x00" + struct.pack("<q", -3)),
+                        ),
+                    ]
+                ),
+            ),
+            ("runtime-per-user", encodeDictionary([])),
+        ]
+    )
+)
+
+
+def decode(data: bytes, modDirectory: Path = Path("mods")) -> SettingsController:
+    controller = SettingsController(modDirectory=modDirectory)
+    controller.settings = controller.decodeSettings(data)
+    controller.indexSettings()
+    return controller
+
+
+def test_decodeSettings():
+    settings = decode(settingsFile).settings
+    assert settings["version"] == [2, 0, 28, 0]
+    assert settings["startup"] == {
+        0: ["bool-setting", {0: ["value", True]}],
+        1: ["double-setting", {0: ["value", 0.5]}],
+    }
+    assert settings["runtime-global"] == {
+        0: ["string-setting", {0: ["value", "é"]}],
+        1: ["int-setting", {0: ["value", -3]}],
+    }
+    assert settings["runtime-per-user"] == {}
+
+
+def test_encodeSettingsRoundTrip():
+    assert decode(settingsFile).encodeSettings() == settingsFile
+
+
+def test_encodeChangedSettings():
+    controller = decode(settingsFile)
+    controller.setSettingValue("startup", "bool-setting", False)
+    controller.setSettingValue("runtime-per-user", "new-setting", "x" * 300)
+    controller.setSettingValue("runtime-global", "int-setting", 2**40)
+
+    reread = decode(controller.encodeSettings())
+    assert reread.settings["startup"][0] == ["bool-setting", {0: ["value", False]}]
+    assert reread.settings["runtime-global"][1] == [
+        "int-setting",
+        {0: ["value", 2**40]},
+    ]
+    assert reread.settings["runtime-per-user"] == {
+        0: ["new-setting", {0: ["value", "x" * 300]}]
+    }
+
+
+def test_writeSettingsFileSkipsUnchangedFiles(tmp_path):
+    controller = decode(settingsFile, tmp_path)
+    assert controller.writeSettingsFile() is True
+    assert (tmp_path / "mod-settings.dat").read_bytes() == settingsFile
+    assert controller.writeSettingsFile() is False
+    assert not (tmp_path / "mod-settings.dat.tmp").exists()
+
+
+def test_settingStageAccessByName():
+    controller = decode(settingsFile)
+    assert controller["startup"]["double-setting"] == 0.5
+    assert list(controller["runtime-global"]) == ["string-setting", "int-setting"]
+    assert "string-setting" not in controller["startup"]
+
+    controller["runtime-global"]["string-setting"] = "changed"
+    assert controller["runtime-global"]["string-setting"] == "changed"
+    assert controller.settingIndex["string-setting"] == ("runtime-global", 0)
+
+
+def test_removeSettingKeepsSlotsConsecutive():
+    controller = decode(settingsFile)
+    del controller["runtime-global"]["string-setting"]
+    assert controller.settings["runtime-global"] == {
+        0: ["int-setting", {0: ["value", -3]}]
+    }
+    assert controller.settingIndex["int-setting"] == ("runtime-global", 0)
+    assert "string-setting" not in controller.settingIndex
+
+
+def test_copySettingsIsIndependent():
+    controller = decode(settingsFile)
+    copy = SettingsController(modDirectory=Path("mods"))
+    copy.copySettings(controller)
+    copy["startup"]["bool-setting"] = False
+    copy["startup"]["added-setting"] = "value"
+    assert controller["startup"]["bool-setting"] is True
+    assert "added-setting" not in controller.settingIndex
@@ -0,0 +1,65 @@
+import pytest
+
+from python.unit_test_controller import shardConfigurations
+
+configurations = [(f"config-{index}", {"mods": []}) for index in range(1, 6)]
+
+
+def configNames(shardedConfigurations):
+    return [configName for configName, _ in shardedConfigurations]
+
+
+def test_configurationsAreDistributedRoundRobin():
+    shards = [shardConfigurations(configurations, index, 2) for index in (1, 2)]
+    assert configNames(shards[0][0]) == ["config-1", "config-3", "config-5"]
+    assert configNames(shards[1][0]) == ["config-2", "config-4"]
+    assert shards[0][1] is None and shards[1][1] is None
+
+
+def test_eachConfigurationIsTestedOnce():
+    for shardCount in range(1, 6):
+        shardedNames = [
+            configName
+            for shardIndex in range(1, shardCount + 1)
+            for configName in configNames(
+                shardConfigurations(configurations, shardIndex, shardCount)[0]
+            )
+        ]
+        assert sorted(shardedNames) == configNames(configurations)
+
+
+def test_fewerConfigurationsThanShardsSplitTheTests():
+    shards = [
+        shardConfigurations(configurations[:2], index, 5) for index in range(1, 6)
+    ]
+    assert [configNames(configs) for configs, _ in shards] == [
+        ["config-1"],
+        ["config-2"],
+        ["config-1"],
+        ["config-2"],
+        ["config-1"],
+    ]
+    assert [testShard for _, testShard in shards] == [
+        (1, 3),
+        (1, 2),
+        (2, 3),
+        (2, 2),
+        (3, 3),
+    ]
+
+
+def test_singleShardPerConfigurationKeepsAllTests():
+    assert shardConfigurations(configurations[:2], 2, 3) == (
+        [configurations[1]],
+        None,
+    )
+
+
+def test_noConfigurations():
+    assert shardConfigurations([], 1, 3) == ([], None)
+
+
+@pytest.mark.parametrize("shardIndex, shardCount", [(0, 2), (3, 2), (1, 0)])
+def test_invalidShard(shardIndex, shardCount):
+    with pytest.raises(ValueError, match="is invalid"):
+        shardConfigurations(configurations, shardIndex, shardCount)
@@ -0,0 +1,193 @@
+import json
+import subprocess
+import sys
+import xml.etree.ElementTree as ElementTree
+from pathlib import Path
+
+# Imported as modules, pytest would collect the Test* classes otherwise
+from python import game_output_reader, test_report
+from python.factorio_controller import FactorioController
+from python.test_report import ConfigurationResult
+
+
+def createTestCase(name, status, durationMs=None, messages=()):
+    testCase = test_report.TestCaseResult(name)
+    testCase.status = status
+    if durationMs is not None:
+        testCase.timing = game_output_reader.TestTiming(durationMs, 12.5, 3)
+    testCase.messages = list(messages)
+    return testCase
+
+
+def createReport():
+    report = test_report.TestReport("my-mod")
+    report.add(
+        ConfigurationResult(
+            "passing",
+            True,
+            testCases={
+                "unit_test_001": createTestCase("unit_test_001", "passed", 1500),
+                "unit_test_002": createTestCase(
+                    "unit_test_002", "passed", 250, ["note"]
+                ),
+            },
+        )
+    )
+    report.add(
+        ConfigurationResult(
+            "failing",
+            False,
+            failureReport="No game output for 60s, stalled in unit test unit_test_002",
+            testCases={
+                "unit_test_001": createTestCase(
+                    "unit_test_001", "failed", 100, ["Recipe x is broken."]
+                ),
+                "unit_test_002": createTestCase("unit_test_002", "error"),
+            },
+            messages=["configuration message"],
+        )
+    )
+    report.add(ConfigurationResult("cached", True, cached=True))
+    report.add(
+        ConfigurationResult("crashed", False, failureReport="unresolvable mod list")
+    )
+    return report
+
+
+def test_junitXml(tmp_path):
+    reportPath = tmp_path / "reports" / "report.xml"
+    createReport().write(reportPath)
+    testSuites = ElementTree.parse(reportPath).getroot()
+
+    assert testSuites.tag == "testsuites"
+    assert testSuites.get("name") == "my-mod"
+    assert {key: testSuites.get(key) for key in ("tests", "failures", "errors")} == {
+        "tests": "6",
+        "failures": "1",
+        "errors": "2",
+    }
+    assert testSuites.get("skipped") == "1"
+    assert testSuites.get("time") == "1.850"
+
+    passing, failing, cached, crashed = testSuites.findall("testsuite")
+    assert [testCase.get("time") for testCase in passing] == ["1.500", "0.250"]
+    assert passing.find("testcase[@name='unit_test_002']/system-out").text == "note"
+
+    failure = failing.find("testcase[@name='unit_test_001']/failure")
+    assert failure.text == "Recipe x is broken."
+    error = failing.find("testcase[@name='unit_test_002']/error")
+    assert error.get("message").startswith("No game output for 60s")
+    assert failing.find("system-out").text == "configuration message"
+
+    assert cached.find("testcase[@name='configuration']/skipped") is not None
+    assert (
+        crashed.find("testcase[@name='configuration']/error").get("message")
+        == "unresolvable mod list"
+    )
+
+
+def test_json(tmp_path):
+    reportPath = tmp_path / "report.json"
+    createReport().write(reportPath)
+    report = json.loads(reportPath.read_text(encoding="utf-8"))
+
+    assert report["mod"] == "my-mod"
+    assert report["passed"] is False
+    assert [config["name"] for config in report["configurations"]] == [
+        "passing",
+        "failing",
+        "cached",
+        "crashed",
+    ]
+    failing = report["configurations"][1]
+    assert failing["failureReport"].startswith("No game output")
+    assert failing["tests"][0] == {
+        "name": "unit_test_001",
+        "status": "failed",
+        "durationMs": 100,
+        "memoryKiB": 12.5,
+        "ticks": 3,
+        "messages": ["Recipe x is broken."],
+    }
+    assert failing["tests"][1]["durationMs"] is None
+    assert report["configurations"][2]["cached"] is True
+
+
+def test_passedReport():
+    report = test_report.TestReport("my-mod")
+    report.add(ConfigurationResult("passing", True))
+    assert report.toDict()["passed"] is True
+
+
+def runStandInGame(lines):
+    # Feeds game output through FactorioController like a launched game would
+    factorioController = FactorioController(Path(sys.executable), log=lambda msg: None)
+    factorioController.factorioProcess = subprocess.Popen(
+        [sys.executable, "-c", "import sys; sys.stdout.write(sys.stdin.read())"],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+    )
+    factorioController.outputReader = game_output_reader.GameOutputReader(
+        factorioController.factorioProcess, factorioController
+    )
+    factorioController.factorioProcess.stdin.write(
+        ("\n".join(lines) + "\n").encode("utf-8")
+    )
+    factorioController.factorioProcess.stdin.close()
+    passed = factorioController.executeUnitTests()
+    factorioController.terminateGame()
+    return ConfigurationResult(
+        "config",
+        passed,
+        testCases=factorioController.testCases,
+        messages=factorioController.configurationMessages,
+    )
+
+
+def test_reportOfGameOutput(tmp_path):
+    configurationResult = runStandInGame(
+        [
+            "factorio-unit-test: Starting 2 unit tests...",
+            "factorio-unit-test: Starting unit test unit_test_001.",
+            "factorio-unit-test:     Recipe x is broken.",
+            "factorio-unit-test: Timing of unit test unit_test_001:"
+            " Duration: 250ms, 3.5 KiB Lua memory, 2 ticks",
+            "factorio-unit-test: Unit test unit_test_001 FAILED!",
+            "factorio-unit-test: Starting unit test unit_test_002.",
+            "factorio-unit-test: Timing of unit test unit_test_002:"
+            " Duration: 1500ms, 0.0 KiB Lua memory, 0 ticks",
+            "factorio-unit-test: Unit test unit_test_002 PASSED!",
+            "factorio-unit-test: Finished testing! Some unit tests failed!",
+        ]
+    )
+    report = test_report.TestReport("my-mod")
+    report.add(configurationResult)
+
+    assert report.toDict()["configurations"][0]["tests"] == [
+        {
+            "name": "unit_test_001",
+            "status": "failed",
+            "durationMs": 250.0,
+            "memoryKiB": 3.5,
+            "ticks": 2,
+            "messages": ["    Recipe x is broken."],
+        },
+        {
+            "name": "unit_test_002",
+            "status": "passed",
+            "durationMs": 1500.0,
+            "memoryKiB": 0.0,
+            "ticks": 0,
+            "messages": [],
+        },
+    ]
+
+    reportPath = tmp_path / "report.xml"
+    report.write(reportPath)
+    testSuite = ElementTree.parse(reportPath).getroot().find("testsuite")
+    assert [testCase.get("time") for testCase in testSuite.findall("testcase")] == [
+        "0.250",
+        "1.500",
+    ]
+    assert testSuite.get("time") == "1.750"
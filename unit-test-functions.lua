@@ -5,10 +5,45 @@ functions.test_successful = true -- unit test succeeded.
 functions.test_failed = nil -- unit test failed.
 functions.test_invalid = false -- unit testing structure failed.
 
+local function msg_prefix(indentation)
+  indentation = indentation and indentation >= 0 and math.floor(indentation + 0.5) or 2
+  return "factorio-unit-test:" .. string.format("%" .. 2 * indentation + 1 .. "s", " ")
+end
+
 function functions.print_msg(msg, indentation)
   -- indentation should not be used by unit tests, this is only used for the unit test interface!
-  indentation = indentation and indentation >= 0 and math.floor(indentation + 0.5) or 2
-  print("factorio-unit-test:" .. string.format("%" .. 2 * indentation + 1 .. "s", " ") .. msg)
+  print(msg_prefix(indentation) .. msg)
+end
+
+function functions.print_localised_msg(msg, indentation)
+  -- like print_msg, for localised strings (e.g. containing a LuaProfiler)
+  localised_print({ "", msg_prefix(indentation), msg })
+end
+
+-- Long running unit tests spread their work over several ticks: instead of a result,
+-- a unit test can return a function, which the unit test interface calls in the next
+-- step to continue the unit test. The unit test finishes once a call returns a result.
+-- Up to steps_per_tick steps (an option of the unit test config, default 1000) are
+-- executed per game tick.
+--
+-- Returns such a function, calling step_func(value) for one value of the array per step.
+-- A step_func returning a value other than nil finishes the unit test with that result,
+-- after all values finish_func() is called for the result of the unit test.
+function functions.for_each_step(values, step_func, finish_func)
+  local position = 0
+  local function continuation()
+    position = position + 1
+    local value = values[position]
+    if value == nil then
+      return finish_func()
+    end
+    local result = step_func(value)
+    if result ~= nil then
+      return result
+    end
+    return continuation
+  end
+  return continuation
 end
 
 return functions
@@ -1,18 +1,24 @@
 local unit_test_names = require("temp-test-list")
 
+-- Unit tests in the order of the test list, the tests of a file are sorted by name
 local unit_tests = {}
 
 for _, unit_test_name in ipairs(unit_test_names) do
   local unit_test_path = "temp." .. unit_test_name
   local status, unit_test_funcs = pcall(require, unit_test_path)
   if status then
+    local names = {}
     for name, unit_test_func in pairs(unit_test_funcs) do
       if type(unit_test_func) == "function" then
-        unit_tests[name] = unit_test_func
+        table.insert(names, name)
       else
         error(string.format("Unit test '%s' is not a function!", name))
       end
     end
+    table.sort(names)
+    for _, name in ipairs(names) do
+      table.insert(unit_tests, { name = name, file_name = unit_test_name, func = unit_test_funcs[name] })
+    end
   else
     error(string.format("Failed to load unit test '%s':\n%s", unit_test_name, unit_test_funcs))
   end
@@ -20,37 +26,130 @@ end
 
 local unit_test_functions = require("unit-test-functions")
 
-local unit_tests_result = unit_test_functions.test_successful
+-- Selects the unit tests named in test_options.tests (by test or file name),
+-- then keeps every shard.count-th of those for test_options.test_shard
+local function select_unit_tests(test_options)
+  local selected_unit_tests = {}
+  local filter = nil
+  local matched_names = {}
+  if test_options.tests then
+    filter = {}
+    for _, name in ipairs(test_options.tests) do
+      filter[name] = true
+    end
+  end
+  for _, unit_test in ipairs(unit_tests) do
+    if filter == nil or filter[unit_test.name] or filter[unit_test.file_name] then
+      matched_names[unit_test.name] = true
+      matched_names[unit_test.file_name] = true
+      table.insert(selected_unit_tests, unit_test)
+    end
+  end
+  for _, name in ipairs(test_options.tests or {}) do
+    if not matched_names[name] then
+      unit_test_functions.print_msg(string.format("No unit test named %q.", name), 0)
+    end
+  end
 
-local execute_unit_tests = function()
-  unit_test_functions.print_msg("Starting " .. #unit_tests .. " unit tests...", 0)
-  for unit_test_name, unit_test_func in pairs(unit_tests) do
-    unit_test_functions.print_msg(string.format("Starting unit test %s.", unit_test_name), 0)
-    local unit_test_result = unit_test_func()
-    if unit_test_result == unit_test_functions.test_successful then
-      unit_test_functions.print_msg(string.format("Unit test %s PASSED!", unit_test_name), 0)
-    elseif unit_test_result == unit_test_functions.test_failed then -- soft failure
-      unit_test_functions.print_msg(string.format("Unit test %s FAILED!", unit_test_name), 0)
-      if unit_tests_result == unit_test_functions.test_successful then
-        unit_tests_result = unit_test_functions.test_failed
+  local shard = test_options.test_shard
+  if shard then
+    local shard_unit_tests = {}
+    for position, unit_test in ipairs(selected_unit_tests) do
+      if (position - 1) % shard.count == shard.index - 1 then
+        table.insert(shard_unit_tests, unit_test)
       end
-    elseif unit_test_result == unit_test_functions.test_invalid then -- hard failure
-      unit_test_functions.print_msg(
-        string.format("Unit test %s FAILED! Resolve issue(s) and rerun this test.", unit_test_name),
-        0
-      )
-      unit_tests_result = unit_test_functions.test_invalid
-      break
-    else
-      unit_test_functions.print_msg(string.format("Unexpected result for unit test %s!", unit_test_name), 0)
-      break
     end
+    selected_unit_tests = shard_unit_tests
   end
-  if unit_tests_result == unit_test_functions.test_successful then
+  return selected_unit_tests
+end
+
+-- A test run is a resumable state machine, every call of run_step executes one
+-- step: starting a unit test, or continuing the one that returned a continuation
+local function start_run(test_options)
+  local run = {
+    unit_tests = select_unit_tests(test_options or {}),
+    position = 1,
+    result = unit_test_functions.test_successful,
+    continuation = nil, -- of the current unit test, when it didn't finish in one step
+    profiler = nil, -- duration of the current unit test, excluding the ticks in between its steps
+    memory_before = 0,
+    tick_before = 0,
+  }
+  unit_test_functions.print_msg("Starting " .. #run.unit_tests .. " unit tests...", 0)
+  return run
+end
+
+local function finish_run(run)
+  if run.result == unit_test_functions.test_successful then
     unit_test_functions.print_msg("Finished testing! All unit tests passed!", 0)
   else
     unit_test_functions.print_msg("Finished testing! Some unit tests failed!", 0)
   end
+  return true
+end
+
+-- Prints the duration of the unit test, the growth of the Lua memory and the number of ticks it was spread over
+local function print_timing(run, unit_test_name)
+  unit_test_functions.print_localised_msg({
+    "",
+    string.format("Timing of unit test %s: ", unit_test_name),
+    run.profiler,
+    string.format(
+      ", %.1f KiB Lua memory, %d ticks",
+      collectgarbage("count") - run.memory_before,
+      game.tick - run.tick_before
+    ),
+  }, 0)
+end
+
+-- Returns true once all unit tests finished
+local function run_step(run)
+  local unit_test = run.unit_tests[run.position]
+  if unit_test == nil then
+    return finish_run(run)
+  end
+  local unit_test_name = unit_test.name
+
+  local unit_test_result
+  if run.continuation then
+    run.profiler.restart()
+    unit_test_result = run.continuation()
+  else
+    unit_test_functions.print_msg(string.format("Starting unit test %s.", unit_test_name), 0)
+    run.profiler = helpers.create_profiler()
+    run.memory_before = collectgarbage("count")
+    run.tick_before = game.tick
+    unit_test_result = unit_test.func()
+  end
+  run.profiler.stop()
+  if type(unit_test_result) == "function" then
+    run.continuation = unit_test_result -- continue in the next step
+    return false
+  end
+  run.continuation = nil
+  run.position = run.position + 1
+  print_timing(run, unit_test_name)
+
+  if unit_test_result == unit_test_functions.test_successful then
+    unit_test_functions.print_msg(string.format("Unit test %s PASSED!", unit_test_name), 0)
+  elseif unit_test_result == unit_test_functions.test_failed then -- soft failure
+    unit_test_functions.print_msg(string.format("Unit test %s FAILED!", unit_test_name), 0)
+    if run.result == unit_test_functions.test_successful then
+      run.result = unit_test_functions.test_failed
+    end
+  elseif unit_test_result == unit_test_functions.test_invalid then -- hard failure
+    unit_test_functions.print_msg(
+      string.format("Unit test %s FAILED! Resolve issue(s) and rerun this test.", unit_test_name),
+      0
+    )
+    run.result = unit_test_functions.test_invalid
+    return finish_run(run)
+  else
+    unit_test_functions.print_msg(string.format("Unexpected result for unit test %s!", unit_test_name), 0)
+    return finish_run(run)
+  end
+  return false
 end
 
-return execute_unit_tests
+return { start_run = start_run, run_step = run_step }
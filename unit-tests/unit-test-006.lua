@@ -3,6 +3,7 @@
 -- technology at least depends on one technology of the same science level, or
 -- depends on a technology unlocking the required science level.
 local unit_test_functions = require("unit-test-functions")
+local prototype_index = require("prototype-index")
 
 local technologies_to_ignore = {}
 
@@ -238,12 +239,11 @@ end
 local function calculate_tech_unlock_level(technology_prototype, effect_level_from_start)
   local tech_effect_level = effect_level_from_start or 0
   local item_prototypes = prototypes.item
-  local recipe_prototypes = prototypes.recipe
+  local recipe_products = prototype_index.recipe_products
 
   for _, tech_effect in pairs(technology_prototype.effects) do
     if tech_effect.type == "unlock-recipe" then
-      local recipe_prototype = recipe_prototypes[tech_effect.recipe]
-      for _, recipe_product in pairs(recipe_prototype.products) do
+      for _, recipe_product in pairs(recipe_products[tech_effect.recipe]) do
         local recipe_product_level = science_pack_level[recipe_product.name]
         if recipe_product_level then
           tech_effect_level = math.max(tech_effect_level, recipe_product_level)
@@ -295,9 +295,9 @@ end
 local function calculate_unlock_level_from_start()
   local effect_level_from_start = 0
   local recipe_prototypes = prototypes.recipe
-  for _, recipe_prototype in pairs(recipe_prototypes) do
+  for recipe_name, recipe_prototype in pairs(recipe_prototypes) do
     if not recipe_prototype.hidden and recipe_prototype.enabled then
-      for _, recipe_product in pairs(recipe_prototype.products) do
+      for _, recipe_product in pairs(prototype_index.recipe_products[recipe_name]) do
         local recipe_product_level = science_pack_level[recipe_product.name]
         if recipe_product_level then
           effect_level_from_start = math.max(effect_level_from_start, recipe_product_level)
@@ -309,6 +309,11 @@ local function calculate_unlock_level_from_start()
 end
 
 local unit_test_006 = function()
+  -- start from scratch, the unit tests run once per configuration variant
+  technologies_to_ignore = {}
+  bonus_upgrade_technologies = {}
+  science_pack_level = {}
+
   local unit_test_result = unit_test_functions.test_successful
   calculate_tech_bonus_effects()
   calculate_science_pack_level()
@@ -317,7 +322,15 @@ local unit_test_006 = function()
   local tech_ingredient_levels = {} -- the technology level defined by the research ingredients
   local tech_unlock_levels = {} -- the technology level defined by the research effects
   local effect_level_from_start = calculate_unlock_level_from_start() -- the technology level unlocked at the start of a new game
-  for tech_name, tech_prototype in pairs(tech_prototypes) do
+  local tech_names = {}
+  for tech_name, _ in pairs(tech_prototypes) do
+    table.insert(tech_names, tech_name)
+  end
+
+  -- checks one technology per step
+  local function check_tech(tech_name)
+    local tech_prototype = tech_prototypes[tech_name]
+
     -- first calculate if this technology is a bonus technology
     if tech_unlocks_only_bonus_upgrades(tech_prototype) then
       local is_first_bonus_upgrade = true
@@ -414,7 +427,9 @@ local unit_test_006 = function()
     end
   end
 
-  return unit_test_result
+  return unit_test_functions.for_each_step(tech_names, check_tech, function()
+    return unit_test_result
+  end)
 end
 
 return {unit_test_006 = unit_test_006}
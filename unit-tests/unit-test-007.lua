@@ -1,34 +1,22 @@
 -- This unit test checks for items and fluids that are unused
 local unit_test_functions = require("unit-test-functions")
+local prototype_index = require("prototype-index")
 
 local item_recipes_to_ignore = {}
 
 local fluid_recipes_to_ignore = {}
 
-local function has_recipe(recipe_filters, recipes_to_ignore)
-  local recipe_prototypes = prototypes.get_recipe_filtered(recipe_filters)
-
-  if #recipe_prototypes == 0 then
-    return false
-  else
-    local used = false
-    for recipe_name, recipe in pairs(recipe_prototypes) do
-      if not recipes_to_ignore[recipe_name] then
-        used = true
-        break
-      end
+local function has_recipe(consuming_recipes, recipes_to_ignore)
+  for recipe_name, recipe in pairs(consuming_recipes or {}) do
+    if not recipe.hidden and not recipes_to_ignore[recipe_name] then
+      return true
     end
-
-    return used
   end
+  return false
 end
 
 local function has_generator(fluid_name)
-  local generator_filters = {
-    { filter = "type", type = "fusion-generator", mode = "and" },
-  }
-  local generator_prototypes = prototypes.get_entity_filtered(generator_filters)
-  for _, generator_prototype in pairs(generator_prototypes) do
+  for _, generator_prototype in pairs(prototype_index.entities_by_type["fusion-generator"]) do
     for _, fluidbox in pairs(generator_prototype.fluidbox_prototypes) do
       if fluidbox.production_type == "input" and fluidbox.filter and fluidbox.filter.name == fluid_name then
         return true
@@ -39,14 +27,16 @@ local function has_generator(fluid_name)
 end
 
 local unit_test_007 = function()
+  -- reset the ignore lists filled by a previous test variant
+  item_recipes_to_ignore = {}
+  fluid_recipes_to_ignore = {}
+
   local unit_test_result = unit_test_functions.test_successful
 
   local items_to_ignore = {}
 
   -- Ignore recipe result items that create rockets, which are 'used' to launch to space
-  local rocket_silo_filters = {}
-  table.insert(rocket_silo_filters, { filter = "type", invert = false, mode = "and", type = "rocket-silo" })
-  local rocket_silo_prototypes = prototypes.get_entity_filtered(rocket_silo_filters)
+  local rocket_silo_prototypes = prototype_index.entities_by_type["rocket-silo"]
   local rocket_silo_fixed_recipe_names = {} -- fixed recipe names in rocket silos
   local rocket_silo_recipe_categories = {} -- rocket silo crafting categories without fixed recipes
   for _, rocket_silo_prototype in pairs(rocket_silo_prototypes) do
@@ -58,23 +48,18 @@ local unit_test_007 = function()
       end
     end
   end
-  local rocket_silo_recipe_filters = {} -- create list of recipes using the list of rocket silo crafting categories
-  for rocket_silo_recipe_category, _ in pairs(rocket_silo_recipe_categories) do
-    table.insert(
-      rocket_silo_recipe_filters,
-      { filter = "category", invert = false, mode = "or", category = rocket_silo_recipe_category }
-    )
-  end
   local rocket_silo_recipes = {} -- create a list of all recipes that can be made in a rocket silo
-  if #rocket_silo_recipe_filters > 0 then
-    rocket_silo_recipes = prototypes.get_recipe_filtered(rocket_silo_recipe_filters)
+  for rocket_silo_recipe_category, _ in pairs(rocket_silo_recipe_categories) do
+    for _, rocket_silo_recipe in pairs(prototype_index.category_recipes[rocket_silo_recipe_category] or {}) do
+      table.insert(rocket_silo_recipes, rocket_silo_recipe)
+    end
   end
   local recipe_prototypes = prototypes.recipe
   for _, rocket_silo_fixed_recipe_name in pairs(rocket_silo_fixed_recipe_names) do
     table.insert(rocket_silo_recipes, recipe_prototypes[rocket_silo_fixed_recipe_name]) -- extend the recipe list with the fixed recipes
   end
   for _, rocket_silo_recipe in pairs(rocket_silo_recipes) do
-    for _, rocket_silo_product in pairs(rocket_silo_recipe.products) do
+    for _, rocket_silo_product in pairs(prototype_index.recipe_products[rocket_silo_recipe.name]) do
       if
         rocket_silo_product.type == "item"
         and (rocket_silo_product.amount or (rocket_silo_product.amount_min and rocket_silo_product.probability))
@@ -142,16 +127,7 @@ local unit_test_007 = function()
   for item_name, item in pairs(item_prototypes) do
     -- TODO: Remove this check when "hidden" can be used as and ItemPrototypeFilter
     if not item.hidden then
-      local recipe_filters = {}
-      table.insert(recipe_filters, { filter = "hidden", invert = true, mode = "and" })
-      table.insert(recipe_filters, {
-        filter = "has-ingredient-item",
-        invert = false,
-        mode = "and",
-        elem_filters = { { filter = "name", name = item_name } },
-      })
-
-      if not has_recipe(recipe_filters, item_recipes_to_ignore) then
+      if not has_recipe(prototype_index.item_consumers[item_name], item_recipes_to_ignore) then
         unit_test_functions.print_msg(string.format("No (useful) recipe is using item %q as an ingredient.", item_name))
         unit_test_result = unit_test_functions.test_failed
       end
@@ -167,16 +143,7 @@ local unit_test_007 = function()
   local fluid_prototypes = prototypes.get_fluid_filtered(fluid_filters)
 
   for fluid_name, fluid in pairs(fluid_prototypes) do
-    local recipe_filters = {}
-    table.insert(recipe_filters, { filter = "hidden", invert = true, mode = "and" })
-    table.insert(recipe_filters, {
-      filter = "has-ingredient-fluid",
-      invert = false,
-      mode = "and",
-      elem_filters = { { filter = "name", name = fluid_name } },
-    })
-
-    if not has_recipe(recipe_filters, fluid_recipes_to_ignore) and not has_generator(fluid_name) then
+    if not has_recipe(prototype_index.fluid_consumers[fluid_name], fluid_recipes_to_ignore) and not has_generator(fluid_name) then
       unit_test_functions.print_msg(string.format("No (useful) recipe is using fluid %q as an ingredient.", fluid_name))
       unit_test_result = unit_test_functions.test_failed
     end
@@ -1,6 +1,7 @@
 -- This unit test validates that each visible item and fluid has a valid source:
 -- A visible recipe, can be mined, or is dropped as loot
 local unit_test_functions = require("unit-test-functions")
+local prototype_index = require("prototype-index")
 
 local items_to_ignore = {}
 local fluids_to_ignore = {}
@@ -10,32 +11,17 @@ local recipe_categories_to_ignore = {
   "barreling-pump",
 }
 
-local function has_recipe(recipe_filters, recipes_to_ignore)
-  local recipe_prototypes = prototypes.get_recipe_filtered(recipe_filters)
-
-  if #recipe_prototypes == 0 then
-    return false
-  elseif #recipes_to_ignore == 0 then
-    return true
-  else
-    local used = false
-    for recipe_name, recipe in pairs(recipe_prototypes) do
-      if not recipes_to_ignore[recipe_name] then
-        used = true
-        break
-      end
+local function has_recipe(producing_recipes, recipes_to_ignore)
+  for recipe_name, recipe in pairs(producing_recipes or {}) do
+    if not recipe.hidden and (#recipes_to_ignore == 0 or not recipes_to_ignore[recipe_name]) then
+      return true
     end
-
-    return used
   end
+  return false
 end
 
 local function has_generator(fluid_name)
-  local generator_filters = {
-    { filter = "type", type = "fusion-reactor", mode = "and" },
-  }
-  local generator_prototypes = prototypes.get_entity_filtered(generator_filters)
-  for _, generator_prototype in pairs(generator_prototypes) do
+  for _, generator_prototype in pairs(prototype_index.entities_by_type["fusion-reactor"]) do
     for _, fluidbox in pairs(generator_prototype.fluidbox_prototypes) do
       if fluidbox.production_type == "output" and fluidbox.filter and fluidbox.filter.name == fluid_name then
         return true
@@ -46,6 +32,12 @@ local function has_generator(fluid_name)
 end
 
 local unit_test_008 = function()
+  -- reset the ignore lists filled by a previous test variant
+  items_to_ignore = {}
+  fluids_to_ignore = {}
+  item_recipes_to_ignore = {}
+  fluid_recipes_to_ignore = {}
+
   local unit_test_result = unit_test_functions.test_successful
 
   -- Ignore items that intentionally have no crafting recipe (in Vanilla this only applies to the Pistol)
@@ -209,16 +201,7 @@ local unit_test_008 = function()
     for item_name, item in pairs(item_prototypes) do
     -- TODO: Remove this check when "hidden" can be used as and ItemPrototypeFilter
     if not item.hidden and not items_to_ignore[item_name] then
-      local recipe_filters = {}
-      table.insert(recipe_filters, { filter = "hidden", invert = true, mode = "and" })
-      table.insert(recipe_filters, {
-        filter = "has-product-item",
-        invert = false,
-        mode = "and",
-        elem_filters = { { filter = "name", name = item_name } },
-      })
-
-      if not has_recipe(recipe_filters, item_recipes_to_ignore) then
+      if not has_recipe(prototype_index.item_producers[item_name], item_recipes_to_ignore) then
         unit_test_functions.print_msg(string.format("No recipe is creating item %q as a product.", item_name))
         unit_test_result = unit_test_functions.test_failed
       end
@@ -234,16 +217,7 @@ local unit_test_008 = function()
 
   for fluid_name, fluid in pairs(fluid_prototypes) do
     if not fluids_to_ignore[fluid_name] then
-      local recipe_filters = {}
-      table.insert(recipe_filters, { filter = "hidden", invert = true, mode = "and" })
-      table.insert(recipe_filters, {
-        filter = "has-product-fluid",
-        invert = false,
-        mode = "and",
-        elem_filters = { { filter = "name", name = fluid_name } },
-      })
-
-      if not has_recipe(recipe_filters, fluid_recipes_to_ignore) and not has_generator(fluid_name) then
+      if not has_recipe(prototype_index.fluid_producers[fluid_name], fluid_recipes_to_ignore) and not has_generator(fluid_name) then
         unit_test_functions.print_msg(string.format("No recipe is creating fluid %q as a product.", fluid_name))
         unit_test_result = unit_test_functions.test_failed
       end
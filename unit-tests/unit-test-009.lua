@@ -2,6 +2,7 @@
 -- and has an item to place it
 -- Also checks that each visible recipe has an entity or character that can craft it
 local unit_test_functions = require("unit-test-functions")
+local prototype_index = require("prototype-index")
 
 local entities_to_ignore_recipe = {
   ["recycler"] = true,
@@ -21,37 +22,24 @@ local entities_to_ignore_item = {
   ["infinity-pipe"] = true,
 }
 
-local function has_recipe(recipe_filters, recipes_to_ignore)
-  local recipe_prototypes = prototypes.get_recipe_filtered(recipe_filters)
-
-  if #recipe_prototypes == 0 then
-    return false
-  else
-    local used = false
-    for recipe_name, recipe in pairs(recipe_prototypes) do
-      if not recipes_to_ignore[recipe_name] then
-        used = true
-        break
+local function has_recipe(crafting_categories, recipes_to_ignore)
+  if next(crafting_categories) == nil then
+    return true -- without categories the recipe filters were empty, which matched all recipes
+  end
+  for category_name, _ in pairs(crafting_categories) do
+    for recipe_name, recipe in pairs(prototype_index.category_recipes[category_name] or {}) do
+      if not recipe.hidden and not recipes_to_ignore[recipe_name] then
+        return true
       end
     end
-
-    return used
   end
+  return false
 end
 
 local function try_find_character_for(recipe)
-  local entity_filters = {}
-  table.insert(entity_filters, { filter = "name", name = "character", mode = "and" })
-  table.insert(entity_filters, { filter = "hidden", invert = true, mode = "and" })
-  table.insert(entity_filters, { filter = "type", type = "character", mode = "and" })
-
-  local entities = prototypes.get_entity_filtered(entity_filters)
-
-  for entity_name, entity in pairs(entities) do
-    for category_name, _ in pairs(entity.crafting_categories) do
-      if recipe.category == category_name then
-        return true
-      end
+  for entity_name, entity in pairs(prototype_index.category_characters[recipe.category] or {}) do
+    if entity_name == "character" and not entity.hidden then
+      return true
     end
   end
 end
@@ -62,7 +50,7 @@ local function try_find_entity_for(recipe)
   local fluid_ingredient_count = 0
   local fluid_product_count = 0
 
-  for _, ingredient in pairs(recipe.ingredients) do
+  for _, ingredient in pairs(prototype_index.recipe_ingredients[recipe.name]) do
     if ingredient.type == "item" then
       item_ingredient_count = item_ingredient_count + 1
     elseif ingredient.type == "fluid" then
@@ -70,30 +58,17 @@ local function try_find_entity_for(recipe)
     end
   end
 
-  for _, product in pairs(recipe.products) do
+  for _, product in pairs(prototype_index.recipe_products[recipe.name]) do
     if product.type == "fluid" then
       fluid_product_count = fluid_product_count + 1
     end
   end
 
   -- Try find an entity that can craft this recipe
-  local entity_filters = {}
-  table.insert(entity_filters, { filter = "type", type = "assembling-machine", mode = "or" })
-  table.insert(entity_filters, { filter = "crafting-category", crafting_category = recipe.category, mode = "and" })
-  table.insert(entity_filters, { filter = "hidden", invert = true, mode = "and" })
-
-  table.insert(entity_filters, { filter = "type", type = "furnace", mode = "or" })
-  table.insert(entity_filters, { filter = "crafting-category", crafting_category = recipe.category, mode = "and" })
-  table.insert(entity_filters, { filter = "hidden", invert = true, mode = "and" })
-
-  table.insert(entity_filters, { filter = "type", type = "rocket-silo", mode = "or" })
-  table.insert(entity_filters, { filter = "crafting-category", crafting_category = recipe.category, mode = "and" })
-  table.insert(entity_filters, { filter = "hidden", invert = true, mode = "and" })
-
-  local entity_prototypes = prototypes.get_entity_filtered(entity_filters)
-
-  for entity_name, entity in pairs(entity_prototypes) do
-    if
+  for entity_name, entity in pairs(prototype_index.category_machines[recipe.category] or {}) do
+    if entity.hidden then
+      -- continue
+    elseif
       (not entity.fixed_recipe or (entity.fixed_recipe == recipe.name))
       and (entity.ingredient_count >= item_ingredient_count)
     then
@@ -155,13 +130,7 @@ local unit_test_009 = function()
 
   for entity_name, entity in pairs(entity_prototypes) do
     if not entities_to_ignore_recipe[entity_name] then
-      local recipe_filters = {}
-      for category_name, _ in pairs(entity.crafting_categories) do
-        table.insert(recipe_filters, { filter = "category", invert = false, mode = "or", category = category_name })
-        table.insert(recipe_filters, { filter = "hidden", invert = true, mode = "and" })
-      end
-
-      if not has_recipe(recipe_filters, {}) then
+      if not has_recipe(entity.crafting_categories, {}) then
         unit_test_functions.print_msg(
           string.format("There are no available recipes that can be crafted in entity %q.", entity_name)
         )
@@ -197,19 +166,7 @@ local unit_test_009 = function()
 
   for entity_name, entity in pairs(entity_prototypes) do
     if not entities_to_ignore_item[entity_name] then
-      local item_filters = {}
-      for _, item in pairs(entity.items_to_place_this) do
-        local item_name
-        if type(item) == "string" then
-          item_name = item
-        else
-          item_name = item.name
-        end
-        table.insert(item_filters, { filter = "name", invert = false, mode = "or", name = item_name })
-        --table.insert(item_filters, { filter = "hidden", invert = true, mode = "and" })
-      end
-
-      local item_prototypes = prototypes.get_item_filtered(item_filters)
+      local item_prototypes = prototype_index.entity_items[entity_name] or {}
       local found_item = false
       
       for item_name, item in pairs(item_prototypes) do
@@ -1,6 +1,7 @@
 -- This unit test validates that each ingredients for each visible recipe are
 -- either unlocked at the same time or unlocked by a prerequisite technology
 local unit_test_functions = require("unit-test-functions")
+local prototype_index = require("prototype-index")
 
 local starting_unlocks = { items = {}, fluids = {}, categories = {} }
 local processed_techs = {}
@@ -17,6 +18,7 @@ local function process_tech(tech)
   for _, effect in pairs(tech.effects) do
     if effect.type == "unlock-recipe" then
       local recipe = prototypes.recipe[effect.recipe]
+      local recipe_products = prototype_index.recipe_products[recipe.name]
       recipes[recipe.name] = {
         processed = false,
         ingredients = { items = {}, fluids = {} },
@@ -40,7 +42,7 @@ local function process_tech(tech)
       end
 
       if not skip then
-        for _, product in pairs(recipe.products) do
+        for _, product in pairs(recipe_products) do
           if product.type == "item" then
             recipes[recipe.name].products.items[product.name] = true
 
@@ -76,9 +78,7 @@ local function process_tech(tech)
 
             -- TODO instead check if item is ammo that creates projectile that creates a capture-robot entity
             if item.name == "capture-robot-rocket" then
-              for _, spawner in pairs(prototypes.get_entity_filtered({
-                { filter = "type", mode = "and", type = "unit-spawner" },
-              })) do
+              for _, spawner in pairs(prototype_index.entities_by_type["unit-spawner"]) do
                 entity = spawner.captured_spawner_entity
                 if entity and entity.crafting_categories then
                   for category_name, _ in pairs(entity.crafting_categories) do
@@ -112,15 +112,15 @@ local function process_tech(tech)
       end
 
       -- Skip building recipes
-      if (ignore_building_recipes == true) and (#recipe.products == 1) and (recipe.products[1].type == "item") then
-        local item = prototypes.item[recipe.products[1].name]
+      if (ignore_building_recipes == true) and (#recipe_products == 1) and (recipe_products[1].type == "item") then
+        local item = prototypes.item[recipe_products[1].name]
         if item.place_result then
           skip = true
         end
       end
 
       if not skip then
-        for _, ingredient in pairs(recipe.ingredients) do
+        for _, ingredient in pairs(prototype_index.recipe_ingredients[recipe.name]) do
           if ingredient.type == "item" then
             recipes[recipe.name].ingredients.items[ingredient.name] = true
           else
@@ -136,26 +136,23 @@ local function process_tech(tech)
 
       -- Items from Burnt Result
 
-      local item_filters = {}
-      table.insert(item_filters, { filter = "name", mode = "and", name = item_names })
-      table.insert(item_filters, { filter = "burnt-result", mode = "and" })
-      local item_prototypes = prototypes.get_item_filtered(item_filters)
-
-      for _, item in pairs(item_prototypes) do
-        recipes[recipe.name].products.items[item.burnt_result.name] = true
+      local item_prototypes = prototypes.item
+      for _, item_name in pairs(item_names) do
+        local item = item_prototypes[item_name]
+        if item and item.burnt_result then
+          recipes[recipe.name].products.items[item.burnt_result.name] = true
+        end
       end
 
       -- Fluids from Boilers
       -- Fluids from Offshore Pumps
 
-      local item_filters = {}
-      table.insert(item_filters, { filter = "name", mode = "and", name = item_names })
-      table.insert(item_filters, { filter = "place-result", mode = "and" })
-      local item_prototypes = prototypes.get_item_filtered(item_filters)
-
-      for _, item in pairs(item_prototypes) do
-        local entity = item.place_result
-        if entity.type == "boiler" then
+      for _, item_name in pairs(item_names) do
+        local item = item_prototypes[item_name]
+        local entity = item and item.place_result
+        if not entity then
+          -- continue
+        elseif entity.type == "boiler" then
           for _, fluidbox in pairs(entity.fluidbox_prototypes) do
             if fluidbox.filter and fluidbox.production_type == "output" then
               recipes[recipe.name].products.fluids[fluidbox.filter.name] = true
@@ -195,9 +192,7 @@ local function process_tech(tech)
         { filter = "minable", mode = "and" },
         { filter = "autoplace", mode = "and" },
       })
-      local drills = prototypes.get_entity_filtered({
-        { filter = "type", mode = "and", type = "mining-drill" }
-      })
+      local drills = prototype_index.entities_by_type["mining-drill"]
       for _, resource in pairs(resources) do
         for _, drill in pairs(drills) do
           for category, _ in pairs(drill.resource_categories) do
@@ -427,7 +422,7 @@ local function make_starting_unlocks()
 
   for _, recipe in pairs(recipe_prototypes) do
     if recipe.hidden_from_player_crafting then
-      for _, product in pairs(recipe.products) do
+      for _, product in pairs(prototype_index.recipe_products[recipe.name]) do
         if product.type == "item" then
           starting_unlocks.items[product.name] = true
         else
@@ -646,6 +641,14 @@ local function add_ignores()
 end
 
 local unit_test_010 = function()
+  -- clear the results of a previous test variant
+  starting_unlocks = { items = {}, fluids = {}, categories = {} }
+  processed_techs = {}
+  unit_test_result = unit_test_functions.test_successful
+  ignored_unlocks = {}
+  ignore_building_recipes = false
+  skip_test = false
+
   add_ignores()
 
   if skip_test == true then
@@ -657,46 +660,25 @@ local unit_test_010 = function()
 
   -- Build list of technologies with the items and fluids unlocked by each
 
-  local tech_filters = {}
-  table.insert(tech_filters, { filter = "hidden", invert = true, mode = "and" })
-  table.insert(tech_filters, { filter = "enabled", invert = false, mode = "and" })
-  local tech_prototypes = prototypes.get_technology_filtered(tech_filters)
-
-  local I = 0
-  local escape = false
-
-  while (#tech_prototypes > I) and (escape == false) do
-    escape = true
-    for tech_name, tech in pairs(tech_prototypes) do
-      if not processed_techs[tech_name] then
-        local all_prereqs_processed = true
-        for prereq_name, prereq in pairs(tech.prerequisites) do
-          if not processed_techs[prereq_name] then
-            all_prereqs_processed = false
-            break
-          end
-        end
-
-        if all_prereqs_processed then
-          processed_techs[tech_name] = process_tech(tech)
-          I = I + 1
-          escape = false
-        end
-      end
-    end
+  -- Prerequisites come first in the tech order, so they are always processed before the techs depending on them
+  local tech_prototypes = prototypes.technology
+  local function process_next_tech(tech_name) -- one technology per step
+    processed_techs[tech_name] = process_tech(tech_prototypes[tech_name])
   end
 
-  if escape == true then
-    unit_test_functions.print_msg("The following techs were not checked. Possibly due to hidden prerequisites")
-    unit_test_result = unit_test_functions.test_failed
-    for tech_name, tech in pairs(tech_prototypes) do
-      if not processed_techs[tech_name] then
+  local function finish()
+    if #prototype_index.unordered_techs > 0 then
+      unit_test_functions.print_msg("The following techs were not checked. Possibly due to hidden prerequisites")
+      unit_test_result = unit_test_functions.test_failed
+      for _, tech_name in ipairs(prototype_index.unordered_techs) do
         unit_test_functions.print_msg(tech_name)
       end
     end
+
+    return unit_test_result
   end
 
-  return unit_test_result
+  return unit_test_functions.for_each_step(prototype_index.tech_order, process_next_tech, finish)
 end
 
 return {unit_test_010 = unit_test_010}
@@ -1,5 +1,6 @@
 -- This unit test validates that recipes are not unlocked by both a technology and one of it's prerequite technologies
 local unit_test_functions = require("unit-test-functions")
+local prototype_index = require("prototype-index")
 
 local starting_unlocks = { recipes = {} }
 local processed_techs = {}
@@ -62,51 +63,35 @@ local function make_starting_unlocks()
 end
 
 local unit_test_012 = function()
+  -- clear the results of a previous test variant
+  starting_unlocks = { recipes = {} }
+  processed_techs = {}
+  unit_test_result = unit_test_functions.test_successful
+
   -- Build lists recipes unlocked at the start of the game
   make_starting_unlocks()
 
   -- Build list of technologies with recipes
 
-  local tech_filters = {}
-  table.insert(tech_filters, { filter = "hidden", invert = true, mode = "and" })
-  table.insert(tech_filters, { filter = "enabled", invert = false, mode = "and" })
-  local tech_prototypes = prototypes.get_technology_filtered(tech_filters)
-
-  local I = 0
-  local escape = false
-
-  while (#tech_prototypes > I) and (escape == false) do
-    escape = true
-    for tech_name, tech in pairs(tech_prototypes) do
-      if not processed_techs[tech_name] then
-        local all_prereqs_processed = true
-        for prereq_name, prereq in pairs(tech.prerequisites) do
-          if not processed_techs[prereq_name] then
-            all_prereqs_processed = false
-            break
-          end
-        end
-
-        if all_prereqs_processed then
-          processed_techs[tech_name] = process_tech(tech)
-          I = I + 1
-          escape = false
-        end
-      end
-    end
+  -- Prerequisites come first in the tech order, so they are always processed before the techs depending on them
+  local tech_prototypes = prototypes.technology
+  local function process_next_tech(tech_name) -- one technology per step
+    processed_techs[tech_name] = process_tech(tech_prototypes[tech_name])
   end
 
-  if escape == true then
-    unit_test_functions.print_msg("The following techs were not checked. Possibly due to hidden prerequisites")
-    unit_test_result = unit_test_functions.test_failed
-    for tech_name, tech in pairs(tech_prototypes) do
-      if not processed_techs[tech_name] then
+  local function finish()
+    if #prototype_index.unordered_techs > 0 then
+      unit_test_functions.print_msg("The following techs were not checked. Possibly due to hidden prerequisites")
+      unit_test_result = unit_test_functions.test_failed
+      for _, tech_name in ipairs(prototype_index.unordered_techs) do
         unit_test_functions.print_msg(tech_name)
       end
     end
+
+    return unit_test_result
   end
 
-  return unit_test_result
+  return unit_test_functions.for_each_step(prototype_index.tech_order, process_next_tech, finish)
 end
 
 return {unit_test_012 = unit_test_012}
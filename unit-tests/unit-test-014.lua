@@ -1,28 +1,30 @@
 -- This unit test attempts to validates recycling recipes
 local unit_test_functions = require("unit-test-functions")
+local prototype_index = require("prototype-index")
 
 local function check_recipe_products(item, recycing_recipe)
   local item_name = item.name
-  if #recycing_recipe.products == 1 and (recycing_recipe.products[1].name == item_name) then
+  local recycling_products = prototype_index.recipe_products[recycing_recipe.name]
+  if #recycling_products == 1 and (recycling_products[1].name == item_name) then
     return unit_test_functions.test_successful
   end
 
   -- Recycling into the item's spoil result is ok (e.g. nutrients)
-  if item.spoil_result and (item.spoil_result.name == recycing_recipe.products[1].name) then
+  if item.spoil_result and (item.spoil_result.name == recycling_products[1].name) then
     return unit_test_functions.test_successful
   end
 
   -- Try find the base recipe
-  local recipe = prototypes.recipe[item_name]
-  if not recipe then
+  local recipe_ingredients = prototype_index.recipe_ingredients[item_name]
+  if not recipe_ingredients then
     unit_test_functions.print_msg(string.format("Could not find original recipe for item %q.", item_name))
     return unit_test_functions.test_failed
   end
 
   -- Check that all recycling products are ingredients
-  for _, product in pairs(recycing_recipe.products) do
+  for _, product in pairs(recycling_products) do
     local found = false
-    for _, ingredient in pairs(recipe.ingredients) do
+    for _, ingredient in pairs(recipe_ingredients) do
       if ingredient.type == "item" and ingredient.name == product.name then
         found = true
         break
@@ -35,10 +37,10 @@ local function check_recipe_products(item, recycing_recipe)
   end
 
   -- Check that all item ingredients are recycling products
-  for _, ingredient in pairs(recipe.ingredients) do
+  for _, ingredient in pairs(recipe_ingredients) do
     local found = false
     if ingredient.type == "item" then
-      for _, product in pairs(recycing_recipe.products) do
+      for _, product in pairs(recycling_products) do
         if product.name == ingredient.name then
           found = true
           break